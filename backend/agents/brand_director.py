@@ -1,32 +1,68 @@
-import json
-import asyncio
+import copy
+import hashlib
 import os
+import re
 import google.generativeai as genai
-from models import BrandStrategy, DetailedBrandRequest
-from typing import Union
+from pydantic import ValidationError
+from models import BrandRequest, BrandStrategy, DetailedBrandRequest
+from services.cache import TieredCache, hash_key, normalize_text
+from services.gemini_service import generate_content, model_available, stream_content
+from services.partial_json import IncrementalJSONParser
+from services.structured_output import complete_fields, json_config, repair_json
+from typing import Any, Callable, Dict, Optional, Union
+
+# Called with every strategy field parsed so far while the response streams in
+PartialCallback = Callable[[Dict[str, Any]], None]
+
+
+def normalize_request(request: Union[str, BrandRequest, DetailedBrandRequest]) -> Dict[str, Any]:
+    """Normalized request fields; near-identical requests produce the same dict"""
+    if isinstance(request, BrandRequest):
+        request = request.startup_idea
+    if isinstance(request, str):
+        return {"startup_idea": normalize_text(request)}
+
+    fields: Dict[str, Any] = {}
+    for name, value in request.model_dump(exclude={"bypass_cache", "max_seconds"}).items():
+        if isinstance(value, str):
+            fields[name] = normalize_text(value)
+        elif isinstance(value, list):
+            fields[name] = sorted(normalize_text(v) for v in value)
+        else:
+            fields[name] = value
+    return fields
+
+
+def request_hash(request: Union[str, BrandRequest, DetailedBrandRequest]) -> str:
+    """Stable hash identifying a request regardless of model or prompt version"""
+    return hash_key(normalize_request(request))
+
+
+def create_strategy_cache() -> TieredCache:
+    """Strategy cache from the STRATEGY_CACHE_* settings"""
+    return TieredCache(
+        "strategy_cache",
+        max_entries=int(os.getenv("STRATEGY_CACHE_SIZE", "256")),
+        ttl_seconds=float(os.getenv("STRATEGY_CACHE_TTL", "86400")),
+        db_path=os.getenv("STRATEGY_CACHE_DB") or None
+    )
 
 
 class BrandDirector:
-    def __init__(self):
+    def __init__(self, model: Optional[genai.GenerativeModel] = None, streaming: Optional[bool] = None,
+                 strategy_cache: Optional[TieredCache] = None):
+        # Stream the response so early fields (name, tagline, colors) can be used before it finishes
+        if streaming is None:
+            streaming = os.getenv("BRAND_DIRECTOR_STREAMING", "true").lower() != "false"
+        self.streaming = streaming
+
         try:
             print("Initializing BrandDirector...")
-            # Configure Google Gemini API directly
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                raise ValueError(
-                    "GOOGLE_API_KEY environment variable is required")
-
-            print(f"API key found: {api_key[:10]}...")
-            genai.configure(api_key=api_key)
-
-            # Try gemini-1.5-pro first as it's more widely available
-            try:
-                self.model = genai.GenerativeModel('gemini-2.5-pro')
-                print("Using gemini-2.5-pro model")
-            except Exception as e:
-                print(f"Failed to load gemini-2.5-pro: {e}")
-                self.model = genai.GenerativeModel('gemini-pro')
-                print("Falling back to gemini-pro model")
+            if model is not None:
+                # Shared model from the service container
+                self.model = model
+            else:
+                self.model = self._create_model()
 
             print("BrandDirector initialized successfully")
         except Exception as e:
@@ -39,35 +75,36 @@ class BrandDirector:
         
         Your task is to analyze startup ideas through multiple strategic lenses and create comprehensive, actionable brand strategies.
         
-        For each startup idea, provide a detailed brand strategy in JSON format with the following structure:
+        For each startup idea, provide a detailed brand strategy in JSON format with the following structure,
+        keeping the fields in this order:
         {
             "company_name": "Unique, trademark-friendly name with strong recall value",
-            "alternative_names": ["List of 3-4 alternative name options"],
             "tagline": "Specific benefit-driven tagline that promises transformation (3-8 words)",
-            "positioning_statement": "For [target] who [need], [brand] is the [category] that [unique benefit]",
-            
             "industry": "Primary industry or sector",
+            "brand_archetype": "One of: Explorer, Sage, Hero, Outlaw, Magician, Regular Person, Lover, Jester, Caregiver, Creator, Ruler, Innocent",
+            "brand_personality": ["List of 3-5 personality traits"],
+            
+            "color_scheme": {
+                "primary": "#hexcode with WCAG AA contrast",
+                "secondary": "#hexcode",
+                "accent": "#hexcode"
+            },
+            "logo_style": "Specific style direction avoiding clichés",
+            "visual_elements": ["5-7 specific visual elements that reinforce brand identity"],
+            
+            "unique_value_proposition": "What makes this 10x better than alternatives",
             "target_audience": "Detailed description including demographics, psychographics, and behavioral patterns",
+            "positioning_statement": "For [target] who [need], [brand] is the [category] that [unique benefit]",
+            
+            "alternative_names": ["List of 3-4 alternative name options"],
             "customer_pain_points": ["3-5 specific, urgent problems this solves"],
-            "unique_value_proposition": "What makes this 10x better than alternatives",
             "competitive_advantage": "Sustainable moat or unfair advantage (network effects, proprietary tech, etc.)",
-            
-            "brand_personality": ["List of 3-5 personality traits"],
-            "brand_archetype": "One of: Explorer, Sage, Hero, Outlaw, Magician, Regular Person, Lover, Jester, Caregiver, Creator, Ruler, Innocent",
             "brand_values": [
                 {"value": "Core value name", "explanation": "How this value manifests in the brand"},
                 {"value": "Second value", "explanation": "Practical application"}
             ],
             "brand_story": "50-100 word narrative about why this company exists and the change it seeks to create",
             
-            "color_scheme": {
-                "primary": "#hexcode with WCAG AA contrast",
-                "secondary": "#hexcode",
-                "accent": "#hexcode",
-                "rationale": "Why these colors support the brand personality"
-            },
-            "logo_style": "Specific style direction avoiding clichés",
-            "visual_elements": ["5-7 specific visual elements that reinforce brand identity"],
             "typography_recommendations": {
                 "primary": "Font suggestion for headlines",
                 "secondary": "Font for body text",
@@ -101,8 +138,61 @@ class BrandDirector:
         
         Always respond with valid JSON only, no additional text."""
 
-    async def analyze_startup_idea(self, request: Union[str, DetailedBrandRequest]) -> BrandStrategy:
-        """Analyze startup idea and generate brand strategy"""
+        # Strategies are cached per (model, prompt version, normalized request) so
+        # retries and repeated ideas skip the most expensive call we make. Pass the
+        # container's cache so every director shares one memory tier.
+        self.prompt_version = hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()[:12]
+        self.strategy_cache = strategy_cache if strategy_cache is not None else create_strategy_cache()
+
+    def _create_model(self) -> genai.GenerativeModel:
+        # Configure Google Gemini API directly
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "GOOGLE_API_KEY environment variable is required")
+
+        print(f"API key found: {api_key[:10]}...")
+        genai.configure(api_key=api_key)
+
+        # Try gemini-2.5-pro first, falling back to gemini-pro
+        try:
+            model = genai.GenerativeModel('gemini-2.5-pro')
+            print("Using gemini-2.5-pro model")
+        except Exception as e:
+            print(f"Failed to load gemini-2.5-pro: {e}")
+            model = genai.GenerativeModel('gemini-pro')
+            print("Falling back to gemini-pro model")
+        return model
+
+    def _cache_key(self, request: Union[str, DetailedBrandRequest]) -> str:
+        """Hash the normalized request so near-identical ideas share an entry"""
+        return hash_key(self.model.model_name, self.prompt_version, normalize_request(request))
+
+    async def analyze_startup_idea(self, request: Union[str, DetailedBrandRequest], bypass_cache: bool = False,
+                                   on_partial: Optional[PartialCallback] = None) -> BrandStrategy:
+        """Analyze startup idea and generate brand strategy.
+        
+        When streaming, on_partial receives the fields parsed so far each time
+        another one completes. It is not called for cached strategies.
+        """
+        cache_key = self._cache_key(request)
+        if not bypass_cache:
+            found, cached = await self.strategy_cache.get(cache_key)
+            if found:
+                print("Brand strategy served from cache")
+                return BrandStrategy(**cached)
+
+        # While the model's breaker is open the strategy comes from the alternate model;
+        # don't let it stand in for this model's answer in the cache
+        primary = model_available(self.model)
+        strategy = await self._generate_strategy(request, on_partial)
+        if primary:
+            await self.strategy_cache.set(cache_key, strategy.model_dump())
+        return strategy
+
+    async def _generate_strategy(self, request: Union[str, DetailedBrandRequest],
+                                 on_partial: Optional[PartialCallback] = None) -> BrandStrategy:
+        """Call Gemini and parse the response into a BrandStrategy"""
         try:
             # Build context based on request type
             if isinstance(request, str):
@@ -128,75 +218,75 @@ class BrandDirector:
 
             # Generate response using Gemini
             print(f"Sending request to Gemini API...")
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                full_prompt
-            )
-
-            # Extract text and parse JSON
-            response_text = response.text.strip()
+            if self.streaming:
+                response_text = await self._stream_response(full_prompt, on_partial)
+            else:
+                response = await generate_content(
+                    self.model,
+                    full_prompt,
+                    generation_config=json_config(BrandStrategy)
+                )
+                response_text = response.text
             print(f"Gemini response received - length: {len(response_text)}")
-            print(f"First 500 chars: {response_text[:500]}")
-            
-            if not response_text:
+
+            if not response_text.strip():
                 raise Exception("Gemini returned empty response")
 
-            # Remove any markdown formatting if present
-            if response_text.startswith('```json'):
-                response_text = response_text.replace(
-                    '```json', '').replace('```', '').strip()
-            elif response_text.startswith('```'):
-                response_text = response_text.replace('```', '').strip()
-
-            # Parse the JSON response
-            brand_data = json.loads(response_text)
-
-            # Handle target_audience if it's a complex object instead of string
-            if 'target_audience' in brand_data and isinstance(brand_data['target_audience'], dict):
-                # Convert dict to string description
-                target_dict = brand_data['target_audience']
-                if 'description' in target_dict:
-                    brand_data['target_audience'] = target_dict['description']
-                else:
-                    # Fallback: convert the whole dict to a readable string
-                    brand_data['target_audience'] = str(target_dict)
-
-            # Handle color_scheme if it has rationale field
-            if 'color_scheme' in brand_data and 'rationale' in brand_data['color_scheme']:
-                # Remove rationale from color_scheme as it's not in the model
-                del brand_data['color_scheme']['rationale']
-
-            # Ensure required fields have default values if missing
-            brand_data.setdefault('alternative_names', [])
-            brand_data.setdefault('customer_pain_points', [])
-            brand_data.setdefault('brand_values', [])
-            brand_data.setdefault('domain_suggestions', [])
-            brand_data.setdefault('social_handles_availability', {})
-            brand_data.setdefault('typography_recommendations', None)
-
-            # Validate and create BrandStrategy object
-            strategy = BrandStrategy(**brand_data)
-
-            return strategy
-
-        except json.JSONDecodeError as e:
-            # Log and raise the error instead of fallback
-            print(f"JSON parsing error: {e}")
-            print(f"Full response text: {response_text if 'response_text' in locals() else 'No response'}")
-            raise Exception(f"Failed to parse Gemini response as JSON: {e}")
+            # Salvage truncated or noisy output, then re-ask only for whatever is missing or invalid
+            brand_data = repair_json(response_text)
+            return await complete_fields(self.model, full_prompt, BrandStrategy, brand_data)
+
         except Exception as e:
             print(f"Brand analysis error: {type(e).__name__}: {e}")
             import traceback
             traceback.print_exc()
             raise Exception(f"Brand generation failed: {e}")
 
-    def _create_fallback_strategy(self, startup_idea: str) -> BrandStrategy:
+    async def _stream_response(self, prompt: str, on_partial: Optional[PartialCallback] = None) -> str:
+        """Stream the response text, reporting top-level fields as soon as each one is complete"""
+        parser = IncrementalJSONParser()
+        # Schema-constrained like the non-streaming call. The SDK can't pin property order, so
+        # the prompt's order (logo fields first) is a request; the draft waits for all of them.
+        async for chunk in stream_content(self.model, prompt, generation_config=json_config(BrandStrategy)):
+            completed = parser.feed(chunk)
+            if completed and on_partial is not None:
+                try:
+                    on_partial(copy.deepcopy(parser.fields))
+                except Exception as e:
+                    # Partial updates are advisory; the full parse below is authoritative
+                    print(f"Partial strategy callback failed: {e}")
+        return parser.text
+
+    def fallback_strategy(self, request: Union[str, DetailedBrandRequest],
+                          streamed: Optional[Dict[str, Any]] = None) -> BrandStrategy:
+        """Generic strategy for when Gemini can't answer in time.
+
+        Fields Gemini already streamed are kept, and the generic copy uses
+        the streamed company name, so the package stays consistent with
+        anything (like the logo) already started from them.
+        """
+        streamed = dict(streamed or {})
+        name = streamed.get("company_name")
+        generic = self._create_fallback_strategy(
+            request if isinstance(request, str) else request.startup_idea,
+            name.strip() if isinstance(name, str) and name.strip() else "StartupCo"
+        ).model_dump()
+        try:
+            return BrandStrategy.model_validate({**generic, **streamed})
+        except ValidationError as e:
+            # Drop the streamed fields that don't validate; the generic ones always do
+            invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+            kept = {key: value for key, value in streamed.items() if key not in invalid}
+            return BrandStrategy.model_validate({**generic, **kept})
+
+    def _create_fallback_strategy(self, startup_idea: str, company_name: str = "StartupCo") -> BrandStrategy:
         """Create a basic fallback strategy if AI fails"""
+        slug = re.sub(r"[^a-z0-9]", "", company_name.lower()) or "startupco"
         return BrandStrategy(
-            company_name="StartupCo",
+            company_name=company_name,
             alternative_names=["InnovateCo", "TechVenture", "NextGen"],
             tagline="Innovation Made Simple",
-            positioning_statement="For forward-thinking professionals who need cutting-edge solutions, StartupCo is the technology platform that delivers innovation made simple",
+            positioning_statement=f"For forward-thinking professionals who need cutting-edge solutions, {company_name} is the technology platform that delivers innovation made simple",
 
             industry="Technology",
             target_audience="Tech-savvy professionals aged 25-45 looking for innovative solutions",
@@ -219,7 +309,7 @@ class BrandDirector:
                 {"value": "Reliability",
                     "explanation": "Building trust through consistent performance"}
             ],
-            brand_story="Born from frustration with overcomplicated enterprise software, StartupCo exists to democratize access to powerful technology. We believe innovation should empower, not overwhelm.",
+            brand_story=f"Born from frustration with overcomplicated enterprise software, {company_name} exists to democratize access to powerful technology. We believe innovation should empower, not overwhelm.",
 
             color_scheme={
                 "primary": "#6366f1",
@@ -235,8 +325,7 @@ class BrandDirector:
                 "rationale": "Clean, modern sans-serif fonts that convey professionalism and approachability"
             },
 
-            domain_suggestions=["startupco.com",
-                                "getstartupco.com", "startupco.io"],
+            domain_suggestions=[f"{slug}.com", f"get{slug}.com", f"{slug}.io"],
             social_handles_availability={
                 "instagram": True,
                 "twitter": True,
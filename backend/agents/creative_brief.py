@@ -0,0 +1,116 @@
+import os
+from typing import Dict, Any, Optional
+import google.generativeai as genai
+from pydantic import ValidationError
+from models import BrandStrategy, VideoScript
+from services.gemini_service import generate_content
+from services.structured_output import json_config, repair_json
+from agents.social_media_agent import PLATFORMS
+
+class CreativeBriefWriter:
+    """Writes all platform copy and the video script in a single Gemini call.
+
+    The social and video prompts share the same brand context, so batching
+    them saves three round-trips and the repeated input tokens. Anything
+    missing or malformed in the response is left out of the brief so the
+    caller can fall back to the per-item agents for just those pieces.
+    """
+
+    def __init__(self, model: Optional[genai.GenerativeModel] = None):
+        # Configure Google Gemini for brief generation
+        api_key = os.getenv("GOOGLE_API_KEY")
+        if model is not None:
+            self.model = model
+        elif api_key:
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel('gemini-2.5-pro')
+        else:
+            self.model = None
+
+    async def write_brief(self, strategy: BrandStrategy) -> Dict[str, Any]:
+        """Return {"copy": {platform: text}, "script": {...}} with whatever parsed cleanly"""
+        brief: Dict[str, Any] = {"copy": {}, "script": None}
+        if not self.model:
+            return brief
+
+        try:
+            # Platform keys vary, so this uses plain JSON mode rather than a schema
+            response = await generate_content(
+                self.model,
+                self._create_brief_prompt(strategy),
+                generation_config=json_config()
+            )
+            data = repair_json(response.text)
+        except Exception as e:
+            print(f"Creative brief generation error: {e}")
+            return brief
+
+        if not isinstance(data, dict):
+            print("Creative brief response was not a JSON object")
+            return brief
+
+        social_copy = data.get("social_copy")
+        if not isinstance(social_copy, dict):
+            social_copy = {}
+        for platform in PLATFORMS:
+            copy = social_copy.get(platform["name"])
+            if isinstance(copy, str) and copy.strip():
+                brief["copy"][platform["name"]] = copy.strip()
+
+        try:
+            brief["script"] = VideoScript.model_validate(data.get("video_script")).model_dump()
+        except ValidationError as e:
+            print(f"Creative brief video script was unusable: {e.error_count()} errors")
+
+        return brief
+
+    def _create_brief_prompt(self, strategy: BrandStrategy) -> str:
+        """Create one prompt covering every platform's copy and the video script"""
+        platform_specs = "\n".join(
+            f"        - {p['name']}: {p['post_type']}; strategy: {p['content_strategy']}; "
+            f"tone: {p['tone']}; format: {p['format']}"
+            for p in PLATFORMS
+        )
+        copy_fields = ",\n".join(
+            f'                "{p["name"]}": "Post copy for {p["name"]}"' for p in PLATFORMS
+        )
+
+        return f"""You are the creative lead for {strategy.company_name}, writing social media copy and a promotional video script.
+
+        Brand context:
+        - Company: {strategy.company_name}
+        - Tagline: {strategy.tagline}
+        - Value proposition: {strategy.unique_value_proposition}
+        - Target audience: {strategy.target_audience}
+        - Pain points addressed: {', '.join(strategy.customer_pain_points[:3])}
+        - Brand personality: {', '.join(strategy.brand_personality)}
+        - Brand story: {strategy.brand_story}
+
+        Social posts to write:
+{platform_specs}
+
+        Each post should hook attention in the first line, address a specific pain point,
+        present the solution naturally, include a clear call-to-action and use appropriate
+        hashtags (3-5 for Instagram/LinkedIn, 2-3 for Twitter). It should feel native to its platform.
+
+        The video script is for a compelling 5-second video that tells an emotional,
+        memorable micro-story focused on transformation.
+
+        Respond with this exact JSON structure:
+        {{
+            "social_copy": {{
+{copy_fields}
+            }},
+            "video_script": {{
+                "hook": "Opening text/scene that grabs attention (0-1s)",
+                "problem_visualization": "Show the problem visually (1-2s)",
+                "solution_reveal": "Reveal the solution dramatically (2-3s)",
+                "benefit_demonstration": "Show the transformation/benefit (3-4s)",
+                "cta": "Call to action text (4-5s)",
+                "key_messages": ["3-4 short text overlays throughout the video"],
+                "visual_directions": "Specific visual style and mood directions",
+                "music_mood": "Type of background music (upbeat, dramatic, etc.)"
+            }}
+        }}
+
+        Return only the JSON structure, no explanations."""
@@ -1,60 +1,94 @@
 import asyncio
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 import google.generativeai as genai
 from models import BrandStrategy, GeneratedAsset
-from services.fal_service import FALService
+from services.fal_service import FALService, ProgressCallback, split_progress
+from services.gemini_service import generate_content
+
+# Share of each platform's progress covered by writing its copy
+COPY_PROGRESS = 30
+
+# Platform strategies for the generated posts
+PLATFORMS = [
+    {
+        "name": "instagram",
+        "post_type": "carousel",
+        "content_strategy": "problem-agitation-solution",
+        "tone": "conversational, visual, aspirational",
+        "format": "3-slide carousel with hook, problem, solution"
+    },
+    {
+        "name": "linkedin",
+        "post_type": "thought_leadership",
+        "content_strategy": "industry_insight",
+        "tone": "professional, insightful, data-driven",
+        "format": "professional insight with statistics and CTA"
+    },
+    {
+        "name": "twitter",
+        "post_type": "thread_starter",
+        "content_strategy": "controversial_take",
+        "tone": "bold, concise, engaging",
+        "format": "provocative statement that sparks discussion"
+    }
+]
 
 class SocialMediaAgent:
-    def __init__(self):
-        self.fal_service = FALService()
+    def __init__(self, fal_service: Optional[FALService] = None, model: Optional[genai.GenerativeModel] = None,
+                 max_concurrency: Optional[int] = None):
+        self.fal_service = fal_service or FALService()
+        
+        # Bound how many copy/image calls one package has in flight at once. The agent is
+        # shared by every package, so the semaphore itself is created per create_social_posts call.
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("SOCIAL_MAX_CONCURRENCY", "3"))
+        self.max_concurrency = max(1, max_concurrency)
         
         # Configure Google Gemini for copy generation
         api_key = os.getenv("GOOGLE_API_KEY")
-        if api_key:
+        if model is not None:
+            self.model = model
+        elif api_key:
             genai.configure(api_key=api_key)
             self.model = genai.GenerativeModel('gemini-2.5-pro')
         else:
             self.model = None
     
-    async def create_social_posts(self, strategy: BrandStrategy) -> List[GeneratedAsset]:
-        """Generate social media posts with actual copy for different platforms"""
-        # Define platform strategies
-        platforms = [
-            {
-                "name": "instagram",
-                "post_type": "carousel",
-                "content_strategy": "problem-agitation-solution",
-                "tone": "conversational, visual, aspirational",
-                "format": "3-slide carousel with hook, problem, solution"
-            },
-            {
-                "name": "linkedin",
-                "post_type": "thought_leadership",
-                "content_strategy": "industry_insight",
-                "tone": "professional, insightful, data-driven",
-                "format": "professional insight with statistics and CTA"
-            },
-            {
-                "name": "twitter",
-                "post_type": "thread_starter",
-                "content_strategy": "controversial_take",
-                "tone": "bold, concise, engaging",
-                "format": "provocative statement that sparks discussion"
-            }
-        ]
+    async def create_social_posts(self, strategy: BrandStrategy, on_progress: Optional[ProgressCallback] = None,
+                                  prewritten_copy: Optional[Dict[str, str]] = None) -> List[GeneratedAsset]:
+        """Generate social media posts with actual copy for different platforms.
+        
+        Platforms run concurrently and each platform's visual starts as soon
+        as its own copy is written. Platforms found in prewritten_copy (for
+        example from a creative brief) skip the copy call.
+        """
+        prewritten_copy = prewritten_copy or {}
+        reporters = split_progress(on_progress, [platform["name"] for platform in PLATFORMS])
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        return list(await asyncio.gather(*(
+            self._create_platform_post(strategy, platform, reporters[platform["name"]], semaphore,
+                                       prewritten_copy.get(platform["name"]))
+            for platform in PLATFORMS
+        )))
+    
+    async def _create_platform_post(self, strategy: BrandStrategy, platform: Dict, on_progress: Optional[ProgressCallback],
+                                    semaphore: asyncio.Semaphore, copy: Optional[str] = None) -> GeneratedAsset:
+        """Write one platform's copy, then generate its visual"""
+        if copy is None:
+            async with semaphore:
+                if on_progress:
+                    on_progress(5, "Writing copy...")
+                copy = await self._generate_social_copy(strategy, platform)
         
-        # Generate copy for each platform
-        posts_with_copy = []
-        for platform in platforms:
-            copy = await self._generate_social_copy(strategy, platform)
-            posts_with_copy.append({
-                "platform": platform,
-                "copy": copy
-            })
+        image_progress = None
+        if on_progress:
+            on_progress(COPY_PROGRESS, "Copy written, creating visual...")
+            image_progress = lambda progress, message: on_progress(COPY_PROGRESS + progress * (100 - COPY_PROGRESS) // 100, message)
         
-        # Now generate visuals with the actual copy
-        return await self.fal_service.generate_social_posts_with_copy(strategy, posts_with_copy)
+        async with semaphore:
+            return await self.fal_service.generate_social_post_with_copy(strategy, platform, copy, image_progress)
     
     async def _generate_social_copy(self, strategy: BrandStrategy, platform: Dict) -> str:
         """Generate platform-specific social media copy"""
@@ -92,8 +126,8 @@ class SocialMediaAgent:
         Keep it concise and impactful. Return only the post copy, no explanations."""
         
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            response = await generate_content(
+                self.model,
                 prompt
             )
             return response.text.strip()
@@ -1,17 +1,20 @@
-import asyncio
 import os
 from typing import Optional, Dict
 import google.generativeai as genai
-from models import BrandStrategy, GeneratedAsset
-from services.fal_service import FALService
+from models import BrandStrategy, GeneratedAsset, VideoScript
+from services.fal_service import FALService, ProgressCallback
+from services.gemini_service import generate_content
+from services.structured_output import complete_fields, json_config, repair_json
 
 class VideoCreator:
-    def __init__(self):
-        self.fal_service = FALService()
+    def __init__(self, fal_service: Optional[FALService] = None, model: Optional[genai.GenerativeModel] = None):
+        self.fal_service = fal_service or FALService()
         
         # Configure Google Gemini for script generation
         api_key = os.getenv("GOOGLE_API_KEY")
-        if api_key:
+        if model is not None:
+            self.model = model
+        elif api_key:
             genai.configure(api_key=api_key)
             self.model = genai.GenerativeModel('gemini-2.5-pro')
         else:
@@ -20,10 +23,23 @@ class VideoCreator:
     async def create_promotional_video(self, strategy: BrandStrategy, logo_url: Optional[str] = None) -> GeneratedAsset:
         """Generate promotional video with story-driven script"""
         # First generate a compelling video script
-        script = await self._generate_video_script(strategy)
+        script = await self.create_video_script(strategy)
         
         # Then create the video with the script
-        return await self.fal_service.generate_promotional_video_with_script(strategy, script, logo_url)
+        return await self.render_video(strategy, script, logo_url)
+    
+    async def create_video_script(self, strategy: BrandStrategy) -> Dict:
+        """Generate the video script on its own so it can be scheduled separately"""
+        return await self._generate_video_script(strategy)
+    
+    def fallback_script(self, strategy: BrandStrategy) -> Dict:
+        """Template script for when Gemini can't answer in time"""
+        return self._get_fallback_script(strategy)
+    
+    async def render_video(self, strategy: BrandStrategy, script: Dict, logo_url: Optional[str] = None,
+                           on_progress: Optional[ProgressCallback] = None) -> GeneratedAsset:
+        """Render a promotional video from an existing script"""
+        return await self.fal_service.generate_promotional_video_with_script(strategy, script, logo_url, on_progress)
     
     async def _generate_video_script(self, strategy: BrandStrategy) -> Dict:
         """Generate a story-driven video script"""
@@ -60,20 +76,15 @@ class VideoCreator:
         Return only the JSON structure, no explanations."""
         
         try:
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt
+            response = await generate_content(
+                self.model,
+                prompt,
+                generation_config=json_config(VideoScript)
             )
             
-            # Parse the JSON response
-            import json
-            script_text = response.text.strip()
-            if script_text.startswith('```json'):
-                script_text = script_text.replace('```json', '').replace('```', '').strip()
-            elif script_text.startswith('```'):
-                script_text = script_text.replace('```', '').strip()
-            
-            return json.loads(script_text)
+            # Keep whatever parsed and only re-ask for the missing keys
+            script = await complete_fields(self.model, prompt, VideoScript, repair_json(response.text))
+            return script.model_dump()
             
         except Exception as e:
             print(f"Script generation error: {e}")
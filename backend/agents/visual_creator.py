@@ -1,19 +1,23 @@
 import asyncio
-from typing import List
+from typing import List, Optional
 from models import BrandStrategy, GeneratedAsset
-from services.fal_service import FALService
+from services.fal_service import FALService, ProgressCallback
 
 class VisualCreator:
-    def __init__(self):
-        self.fal_service = FALService()
+    def __init__(self, fal_service: Optional[FALService] = None):
+        self.fal_service = fal_service or FALService()
     
-    async def generate_logo(self, strategy: BrandStrategy) -> GeneratedAsset:
+    async def generate_logo(self, strategy: BrandStrategy, on_progress: Optional[ProgressCallback] = None) -> GeneratedAsset:
         """Generate company logo"""
-        return await self.fal_service.generate_logo(strategy)
+        return await self.fal_service.generate_logo(strategy, on_progress)
     
-    async def generate_mockup(self, strategy: BrandStrategy) -> GeneratedAsset:
+    async def generate_logo_draft(self, strategy: BrandStrategy) -> GeneratedAsset:
+        """Generate a fast low-step preview of the logo"""
+        return await self.fal_service.generate_logo_draft(strategy)
+    
+    async def generate_mockup(self, strategy: BrandStrategy, on_progress: Optional[ProgressCallback] = None) -> GeneratedAsset:
         """Generate website mockup"""
-        return await self.fal_service.generate_website_mockup(strategy)
+        return await self.fal_service.generate_website_mockup(strategy, on_progress)
     
     async def generate_all_visuals(self, strategy: BrandStrategy) -> List[GeneratedAsset]:
         """Generate all visual assets in parallel"""
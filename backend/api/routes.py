@@ -1,9 +1,17 @@
-import json
+import asyncio
 import os
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-from models import BrandRequest, DetailedBrandRequest, ProgressUpdate, BrandPackage, RegenerateRequest, RegenerateResponse
-from typing import Union
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from models import BatchBrandRequest, BrandRequest, DetailedBrandRequest, ProgressUpdate, BrandPackage, RegenerateRequest, RegenerateResponse
+from services.asset_store import iter_file, parse_range
+from services.batch_scheduler import BatchRun
+from services.container import ServiceContainer
+from services.package_export import PackageExporter, export_filename
+from services.rate_limiter import priority_class, set_priority
+from services.job_manager import Job
+from services.serializer import JSONBytesResponse, dumps
+from services.sse_delta import DeltaEncoder
+from typing import Optional, Union
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -11,37 +19,62 @@ load_dotenv()
 
 router = APIRouter()
 
-# Lazy load orchestrator to handle missing API keys gracefully
-orchestrator = None
+def get_services(request: Request) -> ServiceContainer:
+    """Shared clients and stores, created once in the app lifespan"""
+    return request.app.state.services
 
-def get_orchestrator():
-    global orchestrator
-    if orchestrator is None:
-        from orchestrator import BrandOrchestrator
-        orchestrator = BrandOrchestrator()
-    return orchestrator
+def start_generation_job(services: ServiceContainer, request: Union[BrandRequest, DetailedBrandRequest]) -> Job:
+    # Generations run as background jobs so a dropped connection doesn't lose work
+    orch = services.orchestrator()
+    return services.job_manager.submit(lambda: orch.create_brand_package(request))
+
+def stream_job_events(job: Job, last_event_id: int = 0, compact: bool = False) -> StreamingResponse:
+    """Stream a job's events as SSE, resuming after last_event_id.
+    
+    With compact set, the stream starts with a snapshot and continues with
+    deltas; large results are sent once as separate "result"/"package" events.
+    """
+    async def event_generator():
+        encoder = DeltaEncoder()
+        async for event in job.stream(last_event_id, raw=compact):
+            if event is None:
+                # Keep proxies from closing an idle connection
+                yield b": keep-alive\n\n"
+                continue
+            event_id, data = event
+            if not compact:
+                # Format as Server-Sent Events
+                yield b"id: %d\ndata: %b\n\n" % (event_id, data)
+                continue
+            frames = encoder.encode(data)
+            for position, (event_type, payload) in enumerate(frames):
+                # Only the last frame of an update carries its id, so a resume never skips part of it
+                id_line = b"id: %d\n" % event_id if position == len(frames) - 1 else b""
+                yield b"%bevent: %b\ndata: %b\n\n" % (id_line, event_type.encode(), dumps(payload))
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+            "X-Job-Id": job.id
+        }
+    )
 
 @router.post("/generate-brand")
-async def generate_brand_package(request: Union[BrandRequest, DetailedBrandRequest]):
-    """Generate a complete brand package with real-time updates via Server-Sent Events"""
+async def generate_brand_package(request: Union[BrandRequest, DetailedBrandRequest],
+                                 services: ServiceContainer = Depends(get_services),
+                                 format: str = Query("full", description="full, or compact for snapshot + delta events")):
+    """Generate a complete brand package with real-time updates via Server-Sent Events.
+    
+    The work runs as a background job; the X-Job-Id response header can be used
+    with /api/jobs/{job_id}/events to resume the stream after a disconnect.
+    """
     try:
-        orch = get_orchestrator()
-        
-        async def event_generator():
-            async for update in orch.create_brand_package(request):
-                # Format as Server-Sent Events
-                data = update.model_dump_json()
-                yield f"data: {data}\n\n"
-        
-        return StreamingResponse(
-            event_generator(),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"  # Disable nginx buffering
-            }
-        )
+        job = start_generation_job(services, request)
+        return stream_job_events(job, compact=format == "compact")
     
     except Exception as e:
         import traceback
@@ -53,41 +86,213 @@ async def generate_brand_package(request: Union[BrandRequest, DetailedBrandReque
         print(f"Generation error: {error_details}")
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
+@router.post("/generate-brand/batch")
+async def generate_brand_batch(batch: BatchBrandRequest, services: ServiceContainer = Depends(get_services)):
+    """Generate packages for many ideas over one SSE connection.
+    
+    Items share generation slots with other batches round-robin. Each update
+    is an "item" event tagged with the item's index; a "summary" event with
+    throughput stats closes the stream. Disconnecting cancels the batch.
+    """
+    try:
+        orch = services.orchestrator()
+    except Exception as e:
+        print(f"Batch setup error: {e}")
+        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+    
+    async def run_bulk(request: Union[BrandRequest, DetailedBrandRequest]):
+        # Runs inside the item's own task, so only this item's upstream calls are marked bulk
+        set_priority("bulk")
+        async for update in orch.create_brand_package(request):
+            yield update
+    
+    run = BatchRun(batch.items, run_bulk, services.batch_scheduler)
+    
+    async def event_generator():
+        yield b"event: batch\ndata: %b\n\n" % dumps({"batch_id": run.id, "items": len(batch.items)})
+        async for index, update in run.events():
+            yield b'event: item\ndata: {"index":%d,"update":%b}\n\n' % (index, dumps(update))
+        yield b"event: summary\ndata: %b\n\n" % dumps(run.summary())
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+            "X-Batch-Id": run.id
+        }
+    )
+
 @router.post("/generate-brand-detailed")
-async def generate_brand_package_detailed(request: DetailedBrandRequest):
+async def generate_brand_package_detailed(request: DetailedBrandRequest,
+                                          services: ServiceContainer = Depends(get_services)):
     """Generate a brand package with detailed questionnaire input"""
-    return await generate_brand_package(request)
+    return await generate_brand_package(request, services, "full")
+
+@router.post("/jobs", status_code=202)
+async def create_job(request: Union[BrandRequest, DetailedBrandRequest],
+                     services: ServiceContainer = Depends(get_services)):
+    """Start brand generation in the background and return its job id"""
+    try:
+        job = start_generation_job(services, request)
+    except Exception as e:
+        print(f"Job creation error: {e}")
+        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+    
+    return {"job_id": job.id, "events_url": f"/api/jobs/{job.id}/events"}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, services: ServiceContainer = Depends(get_services)):
+    """Current status of a background generation job"""
+    job = services.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.summary()
 
-@router.post("/regenerate-asset")
-async def regenerate_asset(request: RegenerateRequest):
+@router.get("/jobs/{job_id}/events")
+async def get_job_events(
+    job_id: str,
+    last_event_id: Optional[str] = Header(None),
+    after: Optional[int] = Query(None, description="Resume after this event id, for clients that can't set Last-Event-ID"),
+    format: str = Query("full", description="full, or compact for snapshot + delta events"),
+    services: ServiceContainer = Depends(get_services)
+):
+    """Stream a job's progress as SSE, honoring Last-Event-ID on reconnect"""
+    job = services.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    resume_from = after or 0
+    if last_event_id:
+        try:
+            resume_from = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid Last-Event-ID: {last_event_id}")
+    
+    return stream_job_events(job, resume_from, compact=format == "compact")
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, services: ServiceContainer = Depends(get_services)):
+    """Cancel a running background job"""
+    if services.job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {"cancelled": services.job_manager.cancel(job_id)}
+
+@router.get("/packages/{package_id}", response_model=BrandPackage)
+async def get_package(package_id: str, services: ServiceContainer = Depends(get_services)):
+    """Fetch a previously generated brand package"""
+    package = await services.package_store.get(package_id)
+    if package is None:
+        raise HTTPException(status_code=404, detail=f"Package not found: {package_id}")
+    return JSONBytesResponse(package)
+
+@router.get("/packages/{package_id}/export.zip")
+async def export_package(package_id: str, services: ServiceContainer = Depends(get_services)):
+    """Download a package as a ZIP: strategy as JSON and Markdown plus every asset, streamed as it is built"""
+    package = await services.package_store.get(package_id)
+    if package is None:
+        raise HTTPException(status_code=404, detail=f"Package not found: {package_id}")
+    
+    exporter = PackageExporter(services.asset_store)
+    return StreamingResponse(
+        exporter.stream(package),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(package)}"'}
+    )
+
+@router.get("/packages", response_model=BrandPackage)
+async def find_package(request_hash: str = Query(..., description="Hash of the normalized brand request"),
+                       services: ServiceContainer = Depends(get_services)):
+    """Fetch the most recent package generated for a request hash"""
+    package = await services.package_store.find_by_request_hash(request_hash)
+    if package is None:
+        raise HTTPException(status_code=404, detail=f"No package for request hash: {request_hash}")
+    return JSONBytesResponse(package)
+
+@router.post("/regenerate-asset", response_model=RegenerateResponse)
+async def regenerate_asset(request: RegenerateRequest, services: ServiceContainer = Depends(get_services)):
     """Regenerate a specific asset with a new prompt"""
     try:
-        from services.fal_service import FALService
-        fal_service = FALService()
+        fal_service = services.fal_service
+        
+        # A user is waiting on this, so it goes ahead of standard and bulk generation
+        with priority_class("interactive"):
+            # Regenerate based on asset type
+            if request.asset_type == "logo":
+                # Override the prompt creation with the user's new prompt
+                assets = await fal_service.regenerate_logo(request.brand_strategy, request.new_prompt, request.variants,
+                                                           request.seed, request.variant_index)
+            elif request.asset_type == "mockup":
+                assets = await fal_service.regenerate_mockup(request.brand_strategy, request.new_prompt, request.variants,
+                                                             request.seed, request.variant_index)
+            elif request.asset_type == "social_post":
+                platform = request.metadata.get("platform", "instagram") if request.metadata else "instagram"
+                assets = await fal_service.regenerate_social_post(request.brand_strategy, request.new_prompt, platform, request.variants,
+                                                                  request.seed, request.variant_index)
+            elif request.asset_type == "video":
+                assets = await fal_service.regenerate_video(request.brand_strategy, request.new_prompt, request.variants,
+                                                            request.seed, request.variant_index)
+            else:
+                raise HTTPException(status_code=400, detail=f"Invalid asset type: {request.asset_type}")
         
-        # Regenerate based on asset type
-        if request.asset_type == "logo":
-            # Override the prompt creation with the user's new prompt
-            asset = await fal_service.regenerate_logo(request.brand_strategy, request.new_prompt)
-        elif request.asset_type == "mockup":
-            asset = await fal_service.regenerate_mockup(request.brand_strategy, request.new_prompt)
-        elif request.asset_type == "social_post":
-            platform = request.metadata.get("platform", "instagram") if request.metadata else "instagram"
-            asset = await fal_service.regenerate_social_post(request.brand_strategy, request.new_prompt, platform)
-        elif request.asset_type == "video":
-            asset = await fal_service.regenerate_video(request.brand_strategy, request.new_prompt)
-        else:
-            raise HTTPException(status_code=400, detail=f"Invalid asset type: {request.asset_type}")
+        if services.asset_store is not None:
+            assets = await services.asset_store.mirror_assets(assets)
         
-        return RegenerateResponse(success=True, asset=asset)
+        return JSONBytesResponse(RegenerateResponse(success=True, asset=assets[0], assets=assets))
     
     except Exception as e:
         import traceback
         print(f"Regeneration error: {traceback.format_exc()}")
-        return RegenerateResponse(success=False, error=str(e))
+        return JSONBytesResponse(RegenerateResponse(success=False, error=str(e)))
+
+@router.get("/assets/{digest}")
+async def get_asset(digest: str, request: Request, services: ServiceContainer = Depends(get_services)):
+    """Serve a mirrored asset by sha256, with Range and conditional request support"""
+    store = services.asset_store
+    asset = await asyncio.to_thread(store.get, digest) if store is not None else None
+    if asset is None:
+        raise HTTPException(status_code=404, detail=f"Asset not found: {digest}")
+    
+    headers = {
+        "ETag": asset.etag,
+        "Accept-Ranges": "bytes",
+        # Content-addressed, so the bytes behind a URL never change
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or asset.etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == asset.etag):
+        try:
+            byte_range = parse_range(range_header, asset.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{asset.size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{asset.size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(iter_file(asset.path, start, end), status_code=206,
+                                     media_type=asset.content_type, headers=headers)
+    
+    headers["Content-Length"] = str(asset.size)
+    return StreamingResponse(iter_file(asset.path, 0, asset.size - 1), media_type=asset.content_type, headers=headers)
+
+@router.get("/metrics")
+async def metrics(services: ServiceContainer = Depends(get_services)):
+    """Runtime counters for caches and other shared components"""
+    if not services.orchestrator_ready:
+        return {"status": "idle", "message": "Orchestrator not initialized yet", **services.stats()}
+    
+    return {"status": "ok", **services.stats()}
 
 @router.get("/test-agents")
-async def test_agents():
+async def test_agents(services: ServiceContainer = Depends(get_services)):
     """Test endpoint to verify all agents are working"""
     try:
         # Check API keys first
@@ -103,7 +308,7 @@ async def test_agents():
         
         # Test brand director
         from agents.brand_director import BrandDirector
-        director = BrandDirector()
+        director = BrandDirector(model=services.gemini_model, strategy_cache=services.strategy_cache)
         
         test_idea = "AI-powered fitness app that creates personalized workout plans"
         strategy = await director.analyze_startup_idea(test_idea)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark JSON serialization of ProgressUpdate payloads across package sizes"""
+
+import argparse
+import json
+import time
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from models import AgentProgress, AgentStatus, BrandPackage, BrandStrategy, GeneratedAsset, ProgressUpdate
+from services.serializer import SERIALIZERS
+
+def build_update(asset_count: int) -> ProgressUpdate:
+    """A completed update carrying a package with asset_count assets"""
+    strategy = BrandStrategy(
+        company_name="Benchmark Co",
+        alternative_names=["Bench", "Marky", "Tempo"],
+        tagline="Measure twice, ship once",
+        positioning_statement="For engineers who need numbers, Benchmark Co is the tool that measures everything",
+        industry="Developer Tools",
+        target_audience="Backend engineers",
+        customer_pain_points=["Slow endpoints", "Unclear regressions", "Noisy metrics"],
+        unique_value_proposition="Repeatable measurements in seconds",
+        competitive_advantage="Opinionated defaults",
+        brand_personality=["precise", "calm", "honest"],
+        brand_archetype="Sage",
+        brand_values=[{"value": "Accuracy", "explanation": "Numbers you can trust"}],
+        brand_story="Built by people tired of guessing. " * 5,
+        color_scheme={"primary": "#1A1A2E", "secondary": "#16213E", "accent": "#E94560"},
+        logo_style="Minimal wordmark",
+        visual_elements=["grids", "graphs"],
+        domain_suggestions=["benchmark.co"],
+        social_handles_availability={"twitter": True, "instagram": False}
+    )
+    assets = [
+        GeneratedAsset(
+            type="social_post",
+            url=f"https://fal.media/files/example/{index:04d}.png",
+            filename=f"asset_{index}.png",
+            metadata={"prompt": "A clean product shot on a gradient background " * 4, "seed": index, "width": 1080, "height": 1080}
+        )
+        for index in range(asset_count)
+    ]
+    package = BrandPackage(
+        id="benchmark",
+        strategy=strategy,
+        assets=assets,
+        created_at="2024-01-01T00:00:00",
+        status="completed",
+        generation_time_seconds=90,
+        stage_timings={"strategy": 12.5, "logo": 20.1, "video": 60.3}
+    )
+    agents = [
+        AgentProgress(agent_name=name, status=AgentStatus.COMPLETED, progress=100, message="Done",
+                      result={"assets": [asset.model_dump() for asset in assets]})
+        for name in ["Brand Director", "Visual Creator", "Social Media Agent", "Video Creator"]
+    ]
+    return ProgressUpdate(
+        package_id="benchmark",
+        overall_progress=100,
+        current_agent="Complete",
+        agents=agents,
+        message="Brand package ready",
+        completed=True,
+        result=package
+    )
+
+def candidates():
+    """Serializers to compare on a model payload, including the paths they replace"""
+    yield "model_dump_json (str)", lambda update: update.model_dump_json().encode()
+    yield "fastapi default", lambda update: json.dumps(jsonable_encoder(update)).encode()
+    for name, serializer in SERIALIZERS.items():
+        yield name, serializer
+
+def dict_candidates():
+    """Serializers to compare on the same update as a plain dict (compact stream frames)"""
+    yield "json.dumps", lambda snapshot: json.dumps(snapshot).encode()
+    for name, serializer in SERIALIZERS.items():
+        yield name, serializer
+
+def measure(func, update: Any, seconds: float) -> float:
+    """Calls per second over roughly `seconds` of wall time"""
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            func(update)
+        calls += 50
+    return calls / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="0,4,16,64,256", help="Comma-separated asset counts")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time spent on each measurement")
+    args = parser.parse_args()
+
+    print(f"{'assets':>7} {'bytes':>9} {'serializer':<24} {'ops/s':>10} {'MB/s':>8}")
+    print("=" * 62)
+    for size in [int(value) for value in args.sizes.split(",")]:
+        update = build_update(size)
+        payload_size = len(update.model_dump_json())
+        for name, func in candidates():
+            rate = measure(func, update, args.seconds)
+            print(f"{size:>7} {payload_size:>9} {name:<24} {rate:>10.0f} {rate * payload_size / 1e6:>8.1f}")
+        snapshot = update.model_dump(mode="json")
+        for name, func in dict_candidates():
+            rate = measure(func, snapshot, args.seconds)
+            print(f"{size:>7} {payload_size:>9} {'dict: ' + name:<24} {rate:>10.0f} {rate * payload_size / 1e6:>8.1f}")
+        print("-" * 62)
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
@@ -6,14 +7,25 @@ import os
 
 # Import routes
 from api.routes import router as api_router
+from services.circuit_breaker import CLOSED, get_circuit_breakers
+from services.container import ServiceContainer
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One set of clients, models and stores for the whole process
+    app.state.services = ServiceContainer()
+    app.state.services.warm_up()
+    yield
+    await app.state.services.aclose()
+
 app = FastAPI(
     title="InstantBrand AI Backend",
     description="AI-powered brand package generation using Google ADK and FAL AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -37,10 +49,14 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    circuits = get_circuit_breakers().stats()
+    # Still a 200: the service works (with fallbacks) while an upstream is out
+    degraded = any(circuit["state"] != CLOSED for circuit in circuits.values())
     return {
-        "status": "healthy",
+        "status": "degraded" if degraded else "healthy",
         "google_adk": "configured" if os.getenv("GOOGLE_API_KEY") else "not configured",
-        "fal_ai": "configured" if os.getenv("FAL_KEY") else "not configured"
+        "fal_ai": "configured" if os.getenv("FAL_KEY") else "not configured",
+        "circuits": circuits
     }
 
 if __name__ == "__main__":
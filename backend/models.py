@@ -1,9 +1,11 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, BeforeValidator, Field, model_validator
+from typing import Annotated, List, Optional, Dict, Any, Union
 from enum import Enum
 
 class BrandRequest(BaseModel):
     startup_idea: str = Field(..., min_length=10, max_length=500, description="Description of the startup idea")
+    bypass_cache: bool = Field(False, description="Skip cached results and regenerate the brand strategy")
+    max_seconds: Optional[int] = Field(None, ge=30, le=1800, description="Deadline for the whole package; stages that overrun fall back to degraded output")
 
 class DetailedBrandRequest(BaseModel):
     startup_idea: str = Field(..., min_length=10, max_length=1000, description="Description of the startup idea")
@@ -16,6 +18,12 @@ class DetailedBrandRequest(BaseModel):
     budget_constraints: Optional[str] = Field(None, description="Budget level: bootstrap, funded, enterprise")
     timeline: Optional[str] = Field(None, description="Launch timeline")
     industry_vertical: str = Field(..., description="Specific industry or vertical")
+    bypass_cache: bool = Field(False, description="Skip cached results and regenerate the brand strategy")
+    max_seconds: Optional[int] = Field(None, ge=30, le=1800, description="Deadline for the whole package; stages that overrun fall back to degraded output")
+
+class BatchBrandRequest(BaseModel):
+    items: List[Union[BrandRequest, DetailedBrandRequest]] = Field(..., min_length=1, max_length=100,
+                                                                  description="Startup ideas to brand, in order")
 
 class AgentStatus(str, Enum):
     PENDING = "pending"
@@ -30,6 +38,20 @@ class AgentProgress(BaseModel):
     message: str
     result: Optional[Dict[str, Any]] = None
 
+def _audience_text(value: Any) -> Any:
+    """Gemini sometimes describes the audience as an object; keep its description"""
+    if isinstance(value, dict):
+        return value.get("description") or str(value)
+    return value
+
+
+def _colors_only(value: Any) -> Any:
+    """Drop the rationale Gemini may add next to the colors; clients render every entry as a swatch"""
+    if isinstance(value, dict):
+        return {name: color for name, color in value.items() if name != "rationale"}
+    return value
+
+
 class BrandStrategy(BaseModel):
     # Core brand elements
     company_name: str
@@ -39,7 +61,7 @@ class BrandStrategy(BaseModel):
     
     # Market analysis
     industry: str
-    target_audience: str
+    target_audience: Annotated[str, BeforeValidator(_audience_text)]
     customer_pain_points: List[str] = Field(default_factory=list, description="3-5 specific problems this solves")
     unique_value_proposition: str = Field(..., description="What makes this 10x better")
     competitive_advantage: str = Field(..., description="Moat or unfair advantage")
@@ -47,18 +69,34 @@ class BrandStrategy(BaseModel):
     # Brand identity
     brand_personality: List[str]
     brand_archetype: str = Field(..., description="Explorer, Sage, Hero, Outlaw, etc.")
-    brand_values: List[Dict[str, str]] = Field(default_factory=list, description="Core values with explanations")
+    brand_values: List[Dict[str, str]] = Field(default_factory=list, description="Core values with explanations",
+                                               json_schema_extra={"items": {"type": "object", "properties": {
+                                                   "value": {"type": "string"}, "explanation": {"type": "string"}}}})
     brand_story: str = Field(..., description="50-100 word narrative about why this exists")
     
     # Visual identity
-    color_scheme: Dict[str, str]  # {"primary": "#hex", "secondary": "#hex", "accent": "#hex"}
+    color_scheme: Annotated[Dict[str, str], BeforeValidator(_colors_only)] = Field(..., description="Hex colors", json_schema_extra={
+        "properties": {"primary": {"type": "string"}, "secondary": {"type": "string"}, "accent": {"type": "string"}},
+        "required": ["primary", "secondary", "accent"]})
     logo_style: str
     visual_elements: List[str]
-    typography_recommendations: Optional[Dict[str, str]] = Field(None, description="Font suggestions")
+    typography_recommendations: Optional[Dict[str, str]] = Field(None, description="Font suggestions", json_schema_extra={
+        "properties": {"primary": {"type": "string"}, "secondary": {"type": "string"}, "rationale": {"type": "string"}}})
     
     # Implementation guidance
     domain_suggestions: List[str] = Field(default_factory=list, description="Available domain options")
-    social_handles_availability: Dict[str, bool] = Field(default_factory=dict, description="Platform handle availability")
+    social_handles_availability: Dict[str, bool] = Field(default_factory=dict, description="Platform handle availability", json_schema_extra={
+        "properties": {name: {"type": "boolean"} for name in ["instagram", "twitter", "linkedin", "tiktok"]}})
+
+class VideoScript(BaseModel):
+    hook: str = Field(..., description="Opening text/scene that grabs attention (0-1s)")
+    problem_visualization: str = Field(..., description="Show the problem visually (1-2s)")
+    solution_reveal: str = Field(..., description="Reveal the solution dramatically (2-3s)")
+    benefit_demonstration: str = Field(..., description="Show the transformation/benefit (3-4s)")
+    cta: str = Field(..., description="Call to action text (4-5s)")
+    key_messages: List[str] = Field(..., description="3-4 short text overlays throughout the video")
+    visual_directions: str = Field(..., description="Specific visual style and mood directions")
+    music_mood: str = Field(..., description="Type of background music (upbeat, dramatic, etc.)")
 
 class GeneratedAsset(BaseModel):
     type: str  # "logo", "mockup", "social_post", "video"
@@ -73,6 +111,9 @@ class BrandPackage(BaseModel):
     created_at: str
     status: str
     generation_time_seconds: Optional[int] = None
+    stage_timings: Optional[Dict[str, float]] = Field(None, description="Seconds spent in each pipeline stage")
+    deadlines: Optional[Dict[str, Any]] = Field(None, description="Package deadline, each stage's time budget and the stages that missed theirs")
+    request_hash: Optional[str] = Field(None, description="Hash of the normalized request; GET /api/packages?request_hash= finds the latest package for it")
 
 class ProgressUpdate(BaseModel):
     package_id: str
@@ -82,6 +123,8 @@ class ProgressUpdate(BaseModel):
     message: str
     completed: bool = False
     result: Optional[BrandPackage] = None
+    partial_strategy: Optional[Dict[str, Any]] = Field(None, description="Strategy fields known before the Brand Director finishes")
+    preview_assets: Optional[Dict[str, GeneratedAsset]] = Field(None, description="Assets shown before the package completes, by slot; a draft is replaced when its final render lands")
 
 class RegenerateRequest(BaseModel):
     asset_type: str = Field(..., description="Type of asset to regenerate: logo, mockup, social_post, video")
@@ -89,8 +132,18 @@ class RegenerateRequest(BaseModel):
     new_prompt: str = Field(..., description="New/modified prompt for regeneration")
     brand_strategy: BrandStrategy = Field(..., description="Brand strategy for context")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata like platform for social posts")
+    variants: int = Field(1, ge=1, le=4, description="Number of variants to generate in one request")
+    seed: Optional[int] = Field(None, ge=0, lt=2 ** 31, description="Seed from a variant's metadata; send its variants too to reproduce it")
+    variant_index: Optional[int] = Field(None, ge=0, description="Regenerate only this variant of the seeded set (from its metadata)")
+
+    @model_validator(mode="after")
+    def _variant_in_set(self) -> "RegenerateRequest":
+        if self.variant_index is not None and self.variant_index >= self.variants:
+            raise ValueError("variant_index must be less than variants")
+        return self
 
 class RegenerateResponse(BaseModel):
     success: bool
-    asset: Optional[GeneratedAsset] = None
+    asset: Optional[GeneratedAsset] = None  # First variant, for clients that expect one asset
+    assets: List[GeneratedAsset] = Field(default_factory=list)
     error: Optional[str] = None
\ No newline at end of file
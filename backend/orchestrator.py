@@ -1,250 +1,657 @@
 import asyncio
+import functools
+import os
+import time
 import uuid
 from datetime import datetime
-from typing import AsyncGenerator, List
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Sequence
 from models import (
     BrandRequest, DetailedBrandRequest, BrandPackage, BrandStrategy, GeneratedAsset,
     ProgressUpdate, AgentProgress, AgentStatus
 )
 from typing import Union
+from pydantic import ValidationError, create_model
 from agents.brand_director import BrandDirector
 from agents.visual_creator import VisualCreator
-from agents.social_media_agent import SocialMediaAgent
+from agents.social_media_agent import SocialMediaAgent, PLATFORMS
 from agents.video_creator import VideoCreator
+from agents.creative_brief import CreativeBriefWriter
+from agents.brand_director import request_hash
+from services.asset_store import AssetStore
+from services.cache import TieredCache
+from services.fal_service import FALService, LOGO_PROMPT_FIELDS, ProgressCallback, placeholder_asset
+from services.logo_derivatives import LogoDerivatives
+from services.package_store import PackageStore, create_package_store
+
+# Just the strategy fields the logo prompt reads, validated (and coerced) as BrandStrategy would
+LogoDraft = create_model("LogoDraft", **{
+    name: (BrandStrategy.model_fields[name].annotation, BrandStrategy.model_fields[name])
+    for name in LOGO_PROMPT_FIELDS
+})
+
+
+def logo_draft_strategy(fields: Dict[str, Any]) -> BrandStrategy:
+    """BrandStrategy carrying only the logo prompt fields, so the logo can start
+    before the rest of the strategy has streamed in. Other required fields are
+    left unset; only the logo stage may read it."""
+    draft = LogoDraft.model_validate({name: fields[name] for name in LOGO_PROMPT_FIELDS})
+    return BrandStrategy.model_construct(**dict(draft))
+
+
+# Share of the overall progress bar owned by each agent
+AGENT_WEIGHTS = {
+    "Brand Director": 20,
+    "Visual Creator": 30,
+    "Social Media Agent": 20,
+    "Video Creator": 30,
+}
+
+# Graph stages reported under each agent
+AGENT_STAGES = {
+    "Brand Director": ["strategy"],
+    "Visual Creator": ["logo", "mockup"],
+    "Social Media Agent": ["social"],
+    "Video Creator": ["script", "video"],
+}
+
+# Strategy fields streamed to clients before the Brand Director finishes
+PARTIAL_STRATEGY_FIELDS = ["company_name", "tagline", "color_scheme"]
+
+# Largest fraction of the package deadline each stage may use. A stage's
+# budget is also capped by the time left before the deadline itself.
+STAGE_BUDGET_SHARES = {
+    "strategy": 0.3,
+    "brief": 0.2,
+    "script": 0.2,
+    "logo": 0.4,
+    "mockup": 0.3,
+    "social": 0.4,
+    "video": 0.9,
+    "mirror_images": 0.15,
+    "mirror_video": 0.15,
+    "derivatives": 0.1,
+}
+
+
+class StageError(Exception):
+    """Raised by TaskGraph when a stage fails; carries the failing stage name"""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Deadline:
+    """A package's overall time limit, split into per-stage budgets"""
+
+    def __init__(self, max_seconds: float, shares: Optional[Dict[str, float]] = None):
+        self.max_seconds = max_seconds
+        self.shares = shares or STAGE_BUDGET_SHARES
+        self.expires_at = time.monotonic() + max_seconds
+        self.budgets: Dict[str, float] = {}
+        self.missed: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, stage: str) -> float:
+        """Seconds a stage starting now may run"""
+        budget = min(self.shares.get(stage, 1.0) * self.max_seconds, self.remaining())
+        self.budgets[stage] = round(budget, 3)
+        return budget
+
+    def miss(self, stage: str) -> None:
+        print(f"Stage '{stage}' missed its {self.budgets.get(stage)}s budget, using fallback")
+        self.missed.append(stage)
+
+    def report(self) -> Dict[str, Any]:
+        return {"max_seconds": self.max_seconds, "budgets": self.budgets, "missed": self.missed}
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[..., Awaitable[Any]], inputs: Sequence[str] = (),
+                 fallback: Optional[Callable[..., Awaitable[Any]]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.fallback = fallback
+
+
+class TaskGraph:
+    """Minimal dependency-graph scheduler.
+
+    Each stage declares the names of the results it consumes. A stage is
+    started as soon as all of its inputs exist, so independent stages run
+    concurrently and wall-clock time follows the longest path.
+
+    With a deadline, a stage that has a fallback is cancelled once it
+    overruns its budget, and the fallback (called with the same inputs)
+    produces its result instead.
+    """
+
+    def __init__(self, deadline: Optional[Deadline] = None):
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, float] = {}
+        self.deadline = deadline
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], inputs: Sequence[str] = (),
+            fallback: Optional[Callable[..., Awaitable[Any]]] = None) -> None:
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, func, inputs, fallback)
+
+    async def run(self, initial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run every stage and return all results keyed by stage name"""
+        results: Dict[str, Any] = dict(initial or {})
+        pending = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while pending or running:
+                # Start every stage whose inputs are now available
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.inputs):
+                        kwargs = {dep: results[dep] for dep in stage.inputs}
+                        running[asyncio.create_task(self._timed(name, self._call(stage, kwargs)))] = name
+                        del pending[name]
+
+                if not running:
+                    missing = {name: [d for d in s.inputs if d not in results] for name, s in pending.items()}
+                    raise ValueError(f"Unsatisfiable stage inputs: {missing}")
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is not None:
+                        raise StageError(name, task.exception())
+                    results[name] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return results
+
+    async def _call(self, stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        if self.deadline is None or stage.fallback is None:
+            return await stage.func(**kwargs)
+        budget = self.deadline.budget(stage.name)
+        try:
+            return await asyncio.wait_for(stage.func(**kwargs), timeout=budget)
+        except asyncio.TimeoutError:
+            self.deadline.miss(stage.name)
+        return await stage.fallback(**kwargs)
+
+    async def _timed(self, name: str, coro: Awaitable[Any]) -> Any:
+        started = time.monotonic()
+        try:
+            return await coro
+        finally:
+            self.timings[name] = round(time.monotonic() - started, 3)
+
+
+class ProgressTracker:
+    """Collects per-stage progress and publishes ProgressUpdate snapshots to a queue"""
+
+    def __init__(self, package_id: str):
+        self.package_id = package_id
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.agents = [
+            AgentProgress(agent_name="Brand Director", status=AgentStatus.PENDING, progress=0, message="Analyzing startup idea..."),
+            AgentProgress(agent_name="Visual Creator", status=AgentStatus.PENDING, progress=0, message="Waiting for brand strategy..."),
+            AgentProgress(agent_name="Social Media Agent", status=AgentStatus.PENDING, progress=0, message="Waiting for brand strategy..."),
+            AgentProgress(agent_name="Video Creator", status=AgentStatus.PENDING, progress=0, message="Waiting for brand strategy...")
+        ]
+        self.stage_progress = {stage: 0 for stages in AGENT_STAGES.values() for stage in stages}
+        self.current_agent = "Brand Director"
+        self.partial_strategy: Optional[Dict[str, Any]] = None
+        # Every strategy field streamed so far, for building a consistent fallback
+        self.streamed_strategy: Dict[str, Any] = {}
+        # Assets clients can show early, by slot; a later asset in a slot replaces the earlier one
+        self.preview_assets: Dict[str, GeneratedAsset] = {}
+
+    def agent(self, name: str) -> AgentProgress:
+        return next(a for a in self.agents if a.agent_name == name)
+
+    def overall_progress(self) -> int:
+        total = sum(AGENT_WEIGHTS[a.agent_name] * a.progress / 100 for a in self.agents)
+        return min(int(total), 100)
+
+    def stage(self, agent_name: str, stage: str, progress: int, message: str,
+              status: Optional[AgentStatus] = None) -> None:
+        """Record progress for one stage and publish a snapshot"""
+        self.stage_progress[stage] = progress
+        agent = self.agent(agent_name)
+        stages = AGENT_STAGES[agent_name]
+        agent.progress = int(sum(self.stage_progress[s] for s in stages) / len(stages))
+        agent.message = message
+        if status is not None:
+            agent.status = status
+        elif agent.status == AgentStatus.PENDING:
+            agent.status = AgentStatus.IN_PROGRESS
+        self.current_agent = agent_name
+        self.publish(message)
+
+    def reporter(self, agent_name: str, stage: str, label: Optional[str] = None) -> ProgressCallback:
+        """Build a callback that feeds upstream progress signals into one stage"""
+        def report(progress: int, message: str):
+            self.stage(agent_name, stage, progress, f"{label}: {message}" if label else message)
+        return report
+
+    def publish(self, message: str, completed: bool = False, result: Optional[BrandPackage] = None,
+                overall_progress: Optional[int] = None, current_agent: Optional[str] = None) -> None:
+        self.queue.put_nowait(ProgressUpdate(
+            package_id=self.package_id,
+            overall_progress=self.overall_progress() if overall_progress is None else overall_progress,
+            current_agent=current_agent or self.current_agent,
+            agents=[a.model_copy() for a in self.agents],
+            message=message,
+            completed=completed,
+            result=result,
+            partial_strategy=self.partial_strategy,
+            preview_assets=dict(self.preview_assets) or None
+        ))
+
 
 class BrandOrchestrator:
-    def __init__(self):
+    def __init__(self, early_video_start: Optional[bool] = None, creative_brief: Optional[bool] = None,
+                 package_store: Optional[PackageStore] = None, fal_service: Optional[FALService] = None,
+                 gemini_model: Optional[Any] = None, asset_store: Optional[AssetStore] = None,
+                 logo_derivatives: Optional[LogoDerivatives] = None, progressive_logo: Optional[bool] = None,
+                 strategy_cache: Optional[TieredCache] = None):
+        # Submit Veo3 as soon as the script exists instead of waiting for the logo.
+        # The video prompt does not use the logo, so this only changes scheduling.
+        if early_video_start is None:
+            early_video_start = os.getenv("VIDEO_EARLY_START", "true").lower() != "false"
+        self.early_video_start = early_video_start
+
+        # Write all platform copy and the video script in one Gemini call
+        if creative_brief is None:
+            creative_brief = os.getenv("CREATIVE_BRIEF_MODE", "true").lower() != "false"
+        self.creative_brief = creative_brief
+
+        # Show a few-second flux/schnell draft of the logo while the flux/dev render runs
+        if progressive_logo is None:
+            progressive_logo = os.getenv("LOGO_PROGRESSIVE", "true").lower() != "false"
+        self.progressive_logo = progressive_logo
+
+        # Deadline for packages whose request doesn't set max_seconds; 0 means none
+        self.default_max_seconds = float(os.getenv("PACKAGE_MAX_SECONDS", "600"))
+
+        # Finished packages are persisted so clients can fetch them without regenerating
+        self.package_store = package_store if package_store is not None else create_package_store()
+
+        # Generated files are copied off the expiring FAL CDN when a store is supplied
+        self.asset_store = asset_store
+        # Favicon and icon-size logo variants, rendered from the mirrored logo
+        self.logo_derivatives = logo_derivatives if asset_store is not None else None
+
         try:
             print("Initializing BrandOrchestrator...")
-            self.brand_director = BrandDirector()
+            # Agents share one FAL client and one Gemini model when they are supplied
+            if fal_service is None:
+                fal_service = FALService()
+            self.brand_director = BrandDirector(model=gemini_model, strategy_cache=strategy_cache)
             print("BrandDirector initialized")
-            self.visual_creator = VisualCreator()
+            if gemini_model is None:
+                gemini_model = self.brand_director.model
+            self.visual_creator = VisualCreator(fal_service=fal_service)
             print("VisualCreator initialized")
-            self.social_agent = SocialMediaAgent()
+            self.social_agent = SocialMediaAgent(fal_service=fal_service, model=gemini_model)
             print("SocialMediaAgent initialized")
-            self.video_creator = VideoCreator()
+            self.video_creator = VideoCreator(fal_service=fal_service, model=gemini_model)
             print("VideoCreator initialized")
+            self.brief_writer = CreativeBriefWriter(model=gemini_model)
+            print("CreativeBriefWriter initialized")
             print("BrandOrchestrator initialization complete")
         except Exception as e:
             print(f"Error initializing BrandOrchestrator: {e}")
             import traceback
             traceback.print_exc()
             raise
-    
+
+    def _build_graph(self, tracker: ProgressTracker, deadline: Optional[Deadline] = None) -> TaskGraph:
+        """Declare the pipeline stages, the inputs each one needs and its fallback when out of time"""
+        graph = TaskGraph(deadline)
+        if self.brand_director.streaming:
+            # The logo starts from a draft strategy as soon as the fields its prompt uses have streamed in
+            draft: Optional[asyncio.Future] = asyncio.get_running_loop().create_future()
+            graph.add("strategy", functools.partial(self._stage_strategy, tracker, draft), inputs=["request"],
+                      fallback=functools.partial(self._fallback_strategy, tracker, draft))
+            graph.add("draft", functools.partial(self._stage_draft, draft), inputs=["request"])
+            graph.add("logo", lambda draft: self._stage_logo(tracker, draft), inputs=["draft"],
+                      fallback=lambda draft: self._fallback_logo(tracker, draft))
+        else:
+            graph.add("strategy", functools.partial(self._stage_strategy, tracker, None), inputs=["request"],
+                      fallback=functools.partial(self._fallback_strategy, tracker, None))
+            graph.add("logo", functools.partial(self._stage_logo, tracker), inputs=["strategy"],
+                      fallback=functools.partial(self._fallback_logo, tracker))
+        graph.add("mockup", functools.partial(self._stage_mockup, tracker), inputs=["strategy"],
+                  fallback=functools.partial(self._fallback_mockup, tracker))
+        if self.creative_brief:
+            graph.add("brief", functools.partial(self._stage_brief, tracker), inputs=["strategy"],
+                      fallback=self._fallback_brief)
+            graph.add("social", functools.partial(self._stage_social, tracker), inputs=["strategy", "brief"],
+                      fallback=functools.partial(self._fallback_social, tracker))
+            graph.add("script", functools.partial(self._stage_script, tracker), inputs=["strategy", "brief"],
+                      fallback=functools.partial(self._fallback_script, tracker))
+        else:
+            graph.add("social", functools.partial(self._stage_social, tracker), inputs=["strategy"],
+                      fallback=functools.partial(self._fallback_social, tracker))
+            graph.add("script", functools.partial(self._stage_script, tracker), inputs=["strategy"],
+                      fallback=functools.partial(self._fallback_script, tracker))
+        video_inputs = ["strategy", "script"] if self.early_video_start else ["strategy", "script", "logo"]
+        graph.add("video", functools.partial(self._stage_video, tracker), inputs=video_inputs,
+                  fallback=functools.partial(self._fallback_video, tracker))
+        if self.asset_store is not None:
+            # Images are mirrored while the video is still rendering; out of time, the upstream URLs are kept
+            graph.add("mirror_images", self._stage_mirror_images, inputs=["logo", "mockup", "social"],
+                      fallback=self._fallback_mirror_images)
+            graph.add("mirror_video", self._stage_mirror_video, inputs=["video"], fallback=self._fallback_mirror_video)
+            if self.logo_derivatives is not None:
+                graph.add("derivatives", self._stage_derivatives, inputs=["mirror_images"],
+                          fallback=self._fallback_derivatives)
+        return graph
+
+    async def _stage_strategy(self, tracker: ProgressTracker, draft: Optional[asyncio.Future],
+                              request: Union[BrandRequest, DetailedBrandRequest]) -> BrandStrategy:
+        tracker.stage("Brand Director", "strategy", 10, "Creating comprehensive brand strategy with Gemini...")
+
+        def on_partial(fields: Dict[str, Any]):
+            tracker.streamed_strategy = fields
+            known = {name: fields[name] for name in PARTIAL_STRATEGY_FIELDS if name in fields}
+            if known:
+                tracker.partial_strategy = known
+            progress = 10 + int(80 * len(fields) / len(BrandStrategy.model_fields))
+            tracker.stage("Brand Director", "strategy", min(progress, 90), "Drafting brand strategy...")
+            if draft is not None and not draft.done() and all(name in fields for name in LOGO_PROMPT_FIELDS):
+                try:
+                    draft.set_result(logo_draft_strategy(fields))
+                except ValidationError:
+                    # A logo field is still half-written; try again on the next one
+                    pass
+
+        # Generate brand strategy - pass the entire request for detailed analysis
+        if isinstance(request, DetailedBrandRequest):
+            strategy = await self.brand_director.analyze_startup_idea(request, bypass_cache=request.bypass_cache,
+                                                                      on_partial=on_partial)
+        else:
+            strategy = await self.brand_director.analyze_startup_idea(request.startup_idea, bypass_cache=request.bypass_cache,
+                                                                      on_partial=on_partial)
+
+        if draft is not None and not draft.done():
+            # Cached, or the stream never produced a usable draft
+            draft.set_result(strategy)
+        tracker.partial_strategy = None
+        tracker.agent("Brand Director").result = strategy.model_dump()
+        tracker.stage("Brand Director", "strategy", 100, " Brand strategy created! Now generating assets...",
+                      status=AgentStatus.COMPLETED)
+        return strategy
+
+    async def _stage_draft(self, draft: asyncio.Future, request: Union[BrandRequest, DetailedBrandRequest]) -> BrandStrategy:
+        return await draft
+
+    async def _stage_logo(self, tracker: ProgressTracker, strategy: BrandStrategy) -> GeneratedAsset:
+        tracker.stage("Visual Creator", "logo", 5, " Submitting logo generation...")
+        draft = asyncio.create_task(self._logo_draft(tracker, strategy)) if self.progressive_logo else None
+        try:
+            logo = await self.visual_creator.generate_logo(strategy, tracker.reporter("Visual Creator", "logo", "Logo"))
+            if (logo.metadata or {}).get("error") and draft is not None:
+                # The draft is a real logo of the same prompt; better than a placeholder. With
+                # flux/dev's circuit open the final fails at once, so wait for the draft here.
+                drafted = await draft
+                if drafted is not None:
+                    print("Final logo render failed, keeping the draft")
+                    logo = drafted
+        finally:
+            if draft is not None and not draft.done():
+                draft.cancel()
+        tracker.preview_assets["logo"] = logo
+        self._finish_visuals(tracker, "logo", "Logo completed")
+        return logo
+
+    async def _logo_draft(self, tracker: ProgressTracker, strategy: BrandStrategy) -> Optional[GeneratedAsset]:
+        try:
+            draft = await self.visual_creator.generate_logo_draft(strategy)
+        except Exception as e:
+            print(f"Logo draft failed: {e}")
+            return None
+        tracker.preview_assets["logo"] = draft
+        tracker.stage("Visual Creator", "logo", tracker.stage_progress["logo"], "Logo draft ready, rendering final logo...")
+        return draft
+
+    async def _stage_mockup(self, tracker: ProgressTracker, strategy: BrandStrategy) -> GeneratedAsset:
+        tracker.stage("Visual Creator", "mockup", 5, "Submitting website mockup...")
+        mockup = await self.visual_creator.generate_mockup(strategy, tracker.reporter("Visual Creator", "mockup", "Mockup"))
+        self._finish_visuals(tracker, "mockup", "Website mockup completed")
+        return mockup
+
+    def _finish_visuals(self, tracker: ProgressTracker, stage: str, message: str) -> None:
+        done = [s for s in AGENT_STAGES["Visual Creator"] if s == stage or tracker.stage_progress[s] == 100]
+        if len(done) == len(AGENT_STAGES["Visual Creator"]):
+            tracker.agent("Visual Creator").result = {"assets_count": len(done)}
+            tracker.stage("Visual Creator", stage, 100, " Visual assets ready!", status=AgentStatus.COMPLETED)
+        else:
+            tracker.stage("Visual Creator", stage, 100, message)
+
+    async def _stage_brief(self, tracker: ProgressTracker, strategy: BrandStrategy) -> Dict:
+        tracker.stage("Social Media Agent", "social", 1, " Writing creative brief with Gemini...")
+        tracker.stage("Video Creator", "script", 10, "Writing creative brief with Gemini...")
+        brief = await self.brief_writer.write_brief(strategy)
+        missing = [p["name"] for p in PLATFORMS if p["name"] not in brief["copy"]]
+        if brief["script"] is None:
+            missing.append("video script")
+        if missing:
+            print(f"Creative brief incomplete, falling back per item for: {', '.join(missing)}")
+        return brief
+
+    async def _stage_social(self, tracker: ProgressTracker, strategy: BrandStrategy,
+                            brief: Optional[Dict] = None) -> List[GeneratedAsset]:
+        # Copy and visuals are pipelined per platform inside the agent
+        tracker.stage("Social Media Agent", "social", 1, " Writing social media copy...")
+        social_assets = await self.social_agent.create_social_posts(strategy, tracker.reporter("Social Media Agent", "social"),
+                                                                    brief["copy"] if brief else None)
+        tracker.agent("Social Media Agent").result = {"assets_count": len(social_assets)}
+        tracker.stage("Social Media Agent", "social", 100, " Social content ready!", status=AgentStatus.COMPLETED)
+        return social_assets
+
+    async def _stage_script(self, tracker: ProgressTracker, strategy: BrandStrategy, brief: Optional[Dict] = None) -> Dict:
+        if brief and brief["script"] is not None:
+            script = brief["script"]
+        else:
+            tracker.stage("Video Creator", "script", 10, "Writing video script with Gemini...")
+            script = await self.video_creator.create_video_script(strategy)
+        tracker.stage("Video Creator", "script", 100, "Video script ready")
+        return script
+
+    async def _stage_video(self, tracker: ProgressTracker, strategy: BrandStrategy, script: Dict,
+                           logo: Optional[GeneratedAsset] = None) -> GeneratedAsset:
+        tracker.stage("Video Creator", "video", 5, " Submitting promotional video...")
+        video_asset = await self.video_creator.render_video(strategy, script, logo.url if logo else None,
+                                                            tracker.reporter("Video Creator", "video", "Video"))
+        tracker.agent("Video Creator").result = {"video_url": video_asset.url}
+        tracker.stage("Video Creator", "video", 100, "Promotional video completed", status=AgentStatus.COMPLETED)
+        return video_asset
+
+    async def _stage_mirror_images(self, logo: GeneratedAsset, mockup: GeneratedAsset,
+                                   social: List[GeneratedAsset]) -> List[GeneratedAsset]:
+        return await self.asset_store.mirror_assets([logo, mockup] + social)
+
+    async def _stage_mirror_video(self, video: GeneratedAsset) -> GeneratedAsset:
+        return await self.asset_store.mirror_asset(video)
+
+    async def _stage_derivatives(self, mirror_images: List[GeneratedAsset]) -> List[GeneratedAsset]:
+        logo = mirror_images[0]
+        try:
+            return await self.logo_derivatives.create(logo)
+        except Exception as e:
+            # Derivatives are extras; the package is complete without them
+            print(f"Logo derivatives failed: {e}")
+            return []
+
+    async def _fallback_strategy(self, tracker: ProgressTracker, draft: Optional[asyncio.Future],
+                                 request: Union[BrandRequest, DetailedBrandRequest]) -> BrandStrategy:
+        # Keeps the streamed fields, including any the logo draft already started from
+        strategy = self.brand_director.fallback_strategy(
+            request if isinstance(request, DetailedBrandRequest) else request.startup_idea,
+            tracker.streamed_strategy
+        )
+        if draft is not None and not draft.done():
+            draft.set_result(strategy)
+        tracker.partial_strategy = None
+        tracker.agent("Brand Director").result = strategy.model_dump()
+        tracker.stage("Brand Director", "strategy", 100, "Out of time for the full strategy, continuing with a basic one",
+                      status=AgentStatus.COMPLETED)
+        return strategy
+
+    async def _fallback_logo(self, tracker: ProgressTracker, strategy: BrandStrategy) -> GeneratedAsset:
+        # A finished draft beats a placeholder
+        logo = tracker.preview_assets.get("logo") or placeholder_asset("logo", strategy, "Deadline exceeded")
+        tracker.preview_assets["logo"] = logo
+        self._finish_visuals(tracker, "logo", "Out of time for the final logo")
+        return logo
+
+    async def _fallback_mockup(self, tracker: ProgressTracker, strategy: BrandStrategy) -> GeneratedAsset:
+        self._finish_visuals(tracker, "mockup", "Out of time for the website mockup")
+        return placeholder_asset("mockup", strategy, "Deadline exceeded")
+
+    async def _fallback_brief(self, strategy: BrandStrategy) -> Dict:
+        # Social copy and the script are then written (or templated) per item
+        return {"copy": {}, "script": None}
+
+    async def _fallback_social(self, tracker: ProgressTracker, strategy: BrandStrategy,
+                               brief: Optional[Dict] = None) -> List[GeneratedAsset]:
+        social_assets = [placeholder_asset("social_post", strategy, "Deadline exceeded", p["name"]) for p in PLATFORMS]
+        tracker.agent("Social Media Agent").result = {"assets_count": len(social_assets)}
+        tracker.stage("Social Media Agent", "social", 100, "Out of time for social posts", status=AgentStatus.COMPLETED)
+        return social_assets
+
+    async def _fallback_script(self, tracker: ProgressTracker, strategy: BrandStrategy, brief: Optional[Dict] = None) -> Dict:
+        tracker.stage("Video Creator", "script", 100, "Out of time for the video script, using a template")
+        return self.video_creator.fallback_script(strategy)
+
+    async def _fallback_video(self, tracker: ProgressTracker, strategy: BrandStrategy, script: Dict,
+                              logo: Optional[GeneratedAsset] = None) -> GeneratedAsset:
+        video_asset = placeholder_asset("video", strategy, "Deadline exceeded")
+        tracker.agent("Video Creator").result = {"video_url": video_asset.url}
+        tracker.stage("Video Creator", "video", 100, "Out of time for the promotional video", status=AgentStatus.COMPLETED)
+        return video_asset
+
+    async def _fallback_mirror_images(self, logo: GeneratedAsset, mockup: GeneratedAsset,
+                                      social: List[GeneratedAsset]) -> List[GeneratedAsset]:
+        return [logo, mockup] + social
+
+    async def _fallback_mirror_video(self, video: GeneratedAsset) -> GeneratedAsset:
+        return video
+
+    async def _fallback_derivatives(self, mirror_images: List[GeneratedAsset]) -> List[GeneratedAsset]:
+        return []
+
     async def create_brand_package(self, request: Union[BrandRequest, DetailedBrandRequest]) -> AsyncGenerator[ProgressUpdate, None]:
         """Orchestrate the complete brand package generation with real-time updates"""
         package_id = str(uuid.uuid4())
         start_time = datetime.now()
-        
-        # Initialize progress tracking
-        agents = [
-            AgentProgress(agent_name="Brand Director", status=AgentStatus.PENDING, progress=0, message="Analyzing startup idea..."),
-            AgentProgress(agent_name="Visual Creator", status=AgentStatus.PENDING, progress=0, message="Waiting for brand strategy..."),
-            AgentProgress(agent_name="Social Media Agent", status=AgentStatus.PENDING, progress=0, message="Waiting for brand strategy..."),
-            AgentProgress(agent_name="Video Creator", status=AgentStatus.PENDING, progress=0, message="Waiting for assets...")
-        ]
-        
+        tracker = ProgressTracker(package_id)
+        max_seconds = request.max_seconds or self.default_max_seconds
+        deadline = Deadline(max_seconds) if max_seconds > 0 else None
+        graph = self._build_graph(tracker, deadline)
+
+        tracker.publish("Analyzing your startup idea and creating brand strategy...", overall_progress=5)
+
+        run = asyncio.create_task(graph.run({"request": request}))
+        # Wake the consumer once the graph settles, whatever the outcome
+        run.add_done_callback(lambda _: tracker.queue.put_nowait(None))
+
         try:
-            # Step 1: Brand Strategy Analysis (20% of total progress)
-            yield ProgressUpdate(
-                package_id=package_id,
-                overall_progress=5,
-                current_agent="Brand Director",
-                agents=agents,
-                message="Analyzing your startup idea and creating brand strategy..."
-            )
-            
-            agents[0].status = AgentStatus.IN_PROGRESS
-            agents[0].message = "Creating comprehensive brand strategy..."
-            
-            # Simulate progressive updates during brand analysis
-            for progress in [25, 50, 75, 100]:
-                agents[0].progress = progress
-                yield ProgressUpdate(
-                    package_id=package_id,
-                    overall_progress=int(5 + (progress * 0.15)),  # 0-15% overall
-                    current_agent="Brand Director",
-                    agents=agents.copy(),
-                    message=f"Analyzing brand strategy... {progress}%"
-                )
-                await asyncio.sleep(1)  # Simulate processing time
-            
-            # Generate brand strategy - pass the entire request for detailed analysis
-            try:
-                if isinstance(request, DetailedBrandRequest):
-                    strategy = await self.brand_director.analyze_startup_idea(request)
-                else:
-                    strategy = await self.brand_director.analyze_startup_idea(request.startup_idea)
-                agents[0].status = AgentStatus.COMPLETED
-                agents[0].result = strategy.model_dump()
-                agents[0].message = "Brand strategy completed"
-            except Exception as e:
-                import traceback
-                error_details = traceback.format_exc()
-                print(f"Brand Director error: {e}")
-                print(f"Full traceback: {error_details}")
-                agents[0].status = AgentStatus.FAILED
-                agents[0].message = f"Failed: {str(e)}"
-                
-                # Yield error state and stop
-                yield ProgressUpdate(
-                    package_id=package_id,
-                    overall_progress=0,
-                    current_agent="Error",
-                    agents=agents.copy(),
-                    message=f"Brand Director failed: {str(e)}",
-                    completed=True
-                )
-                return
-            
-            yield ProgressUpdate(
-                package_id=package_id,
-                overall_progress=20,
-                current_agent="Visual Creator",
-                agents=agents.copy(),
-                message=" Brand strategy created! Now generating visual assets..."
-            )
-            
-            # Step 2: Visual Assets Generation (30% of total progress)
-            agents[1].status = AgentStatus.IN_PROGRESS
-            agents[1].message = "Generating logo and website mockup..."
-            
-            # Generate visual assets with progress updates
-            visual_assets = []
-            
-            # Logo generation
-            for progress in [20, 60, 100]:
-                agents[1].progress = progress
-                yield ProgressUpdate(
-                    package_id=package_id,
-                    overall_progress=int(20 + (progress * 0.15)),  # 20-35% overall
-                    current_agent="Visual Creator",
-                    agents=agents.copy(),
-                    message=f" Generating logo... {progress}%"
-                )
-                await asyncio.sleep(1.5)
-            
-            logo = await self.visual_creator.generate_logo(strategy)
-            visual_assets.append(logo)
-            
-            # Mockup generation
-            agents[1].message = "Generating website mockup..."
-            for progress in [20, 60, 100]:
-                agents[1].progress = progress
-                yield ProgressUpdate(
-                    package_id=package_id,
-                    overall_progress=int(35 + (progress * 0.15)),  # 35-50% overall
-                    current_agent="Visual Creator",
-                    agents=agents.copy(),
-                    message=f"Creating website mockup... {progress}%"
-                )
-                await asyncio.sleep(1.5)
-            
-            mockup = await self.visual_creator.generate_mockup(strategy)
-            visual_assets.append(mockup)
-            
-            agents[1].status = AgentStatus.COMPLETED
-            agents[1].result = {"assets_count": len(visual_assets)}
-            agents[1].message = "Visual assets completed"
-            
-            yield ProgressUpdate(
-                package_id=package_id,
-                overall_progress=50,
-                current_agent="Social Media Agent",
-                agents=agents.copy(),
-                message=" Visual assets ready! Creating social media content..."
-            )
-            
-            # Step 3: Social Media Posts (20% of total progress)
-            agents[2].status = AgentStatus.IN_PROGRESS
-            agents[2].message = "Creating social media posts..."
-            
-            for progress in [30, 70, 100]:
-                agents[2].progress = progress
-                yield ProgressUpdate(
-                    package_id=package_id,
-                    overall_progress=int(50 + (progress * 0.20)),  # 50-70% overall
-                    current_agent="Social Media Agent",
-                    agents=agents.copy(),
-                    message=f" Creating social media posts... {progress}%"
-                )
-                await asyncio.sleep(2)
-            
-            social_assets = await self.social_agent.create_social_posts(strategy)
-            
-            agents[2].status = AgentStatus.COMPLETED
-            agents[2].result = {"assets_count": len(social_assets)}
-            agents[2].message = "Social media posts completed"
-            
-            yield ProgressUpdate(
-                package_id=package_id,
-                overall_progress=70,
-                current_agent="Video Creator",
-                agents=agents.copy(),
-                message=" Social content ready! Generating promotional video..."
-            )
-            
-            # Step 4: Video Generation (30% of total progress)
-            agents[3].status = AgentStatus.IN_PROGRESS
-            agents[3].message = "Generating promotional video..."
-            
-            for progress in [25, 50, 80, 100]:
-                agents[3].progress = progress
-                yield ProgressUpdate(
-                    package_id=package_id,
-                    overall_progress=int(70 + (progress * 0.30)),  # 70-100% overall
-                    current_agent="Video Creator",
-                    agents=agents.copy(),
-                    message=f" Creating promotional video... {progress}%"
-                )
-                await asyncio.sleep(2.5)
-            
-            video_asset = await self.video_creator.create_promotional_video(strategy, logo.url)
-            
-            agents[3].status = AgentStatus.COMPLETED
-            agents[3].result = {"video_url": video_asset.url}
-            agents[3].message = "Promotional video completed"
-            
+            while True:
+                update = await tracker.queue.get()
+                if update is None:
+                    break
+                yield update
+
+            results = run.result()
+
             # Compile final results
-            all_assets = visual_assets + social_assets + [video_asset]
+            if "mirror_images" in results:
+                all_assets = results["mirror_images"] + [results["mirror_video"]] + results.get("derivatives", [])
+            else:
+                visual_assets = [results["logo"], results["mockup"]]
+                all_assets = visual_assets + results["social"] + [results["video"]]
             generation_time = int((datetime.now() - start_time).total_seconds())
-            
+
             brand_package = BrandPackage(
                 id=package_id,
-                strategy=strategy,
+                strategy=results["strategy"],
                 assets=all_assets,
                 created_at=start_time.isoformat(),
                 status="completed",
-                generation_time_seconds=generation_time
+                generation_time_seconds=generation_time,
+                stage_timings=graph.timings,
+                deadlines=deadline.report() if deadline else None,
+                request_hash=request_hash(request)
             )
-            
+
+            try:
+                await self.package_store.save(brand_package)
+            except Exception as e:
+                # Persistence is best-effort; the package still goes to the client
+                print(f"Failed to store brand package {package_id}: {e}")
+
             # Final success update
             yield ProgressUpdate(
                 package_id=package_id,
                 overall_progress=100,
                 current_agent="Completed",
-                agents=agents.copy(),
+                agents=tracker.agents,
                 message=" Your complete brand package is ready!",
                 completed=True,
                 result=brand_package
             )
-            
+
+        except StageError as e:
+            if e.stage == "strategy":
+                import traceback
+                print(f"Brand Director error: {e.error}")
+                traceback.print_exception(e.error)
+                agent = tracker.agent("Brand Director")
+                agent.status = AgentStatus.FAILED
+                agent.message = f"Failed: {str(e.error)}"
+
+                # Yield error state and stop
+                yield ProgressUpdate(
+                    package_id=package_id,
+                    overall_progress=0,
+                    current_agent="Error",
+                    agents=tracker.agents,
+                    message=f"Brand Director failed: {str(e.error)}",
+                    completed=True
+                )
+                return
+
+            yield self._failure_update(tracker, e.error)
+
         except Exception as e:
-            # Handle errors gracefully
-            error_message = f" Generation failed: {str(e)}"
-            
-            # Mark current agent as failed
-            for agent in agents:
-                if agent.status == AgentStatus.IN_PROGRESS:
-                    agent.status = AgentStatus.FAILED
-                    agent.message = "Failed due to error"
-                    break
-            
-            yield ProgressUpdate(
-                package_id=package_id,
-                overall_progress=0,
-                current_agent="Error",
-                agents=agents,
-                message=error_message,
-                completed=True
-            )
\ No newline at end of file
+            yield self._failure_update(tracker, e)
+
+        finally:
+            # Stop outstanding work if the client goes away mid-stream
+            if not run.done():
+                run.cancel()
+
+    def _failure_update(self, tracker: ProgressTracker, error: BaseException) -> ProgressUpdate:
+        """Handle errors gracefully by marking in-flight agents as failed"""
+        for agent in tracker.agents:
+            if agent.status == AgentStatus.IN_PROGRESS:
+                agent.status = AgentStatus.FAILED
+                agent.message = "Failed due to error"
+
+        return ProgressUpdate(
+            package_id=tracker.package_id,
+            overall_progress=0,
+            current_agent="Error",
+            agents=tracker.agents,
+            message=f" Generation failed: {str(error)}",
+            completed=True
+        )
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import httpx
+from models import GeneratedAsset
+
+# Bytes read from upstream (and from disk when serving) per chunk
+CHUNK_SIZE = 64 * 1024
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class StoredAsset:
+    """A blob on disk plus the metadata needed to serve it"""
+
+    def __init__(self, digest: str, path: str, size: int, content_type: str):
+        self.digest = digest
+        self.path = path
+        self.size = size
+        self.content_type = content_type
+
+    @property
+    def etag(self) -> str:
+        # The content hash is a strong validator by construction
+        return f'"{self.digest}"'
+
+
+class AssetStore:
+    """Content-addressed local mirror of generated assets.
+
+    Upstream files (FAL CDN URLs expire) are streamed to disk while being
+    hashed and stored at root/ab/cd/<sha256>, so identical files are kept
+    once. Downloads share one HTTP client and run with bounded concurrency.
+    """
+
+    def __init__(self, root: str, public_url: str = "", max_concurrency: int = 4,
+                 client: Optional[httpx.AsyncClient] = None):
+        self.root = root
+        self.public_url = public_url.rstrip("/")
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = client
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.mirrored = 0
+        self.failures = 0
+        self.bytes_downloaded = 0
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def url_for(self, digest: str) -> str:
+        """URL for a stored digest; relative to this backend when no public URL is given"""
+        return f"{self.public_url}/api/assets/{digest}"
+
+    def get(self, digest: str) -> Optional[StoredAsset]:
+        """Stored blob for a digest, or None"""
+        if not DIGEST_PATTERN.match(digest):
+            return None
+        path = self.path_for(digest)
+        try:
+            size = os.path.getsize(path)
+            with open(f"{path}.json") as f:
+                meta = json.load(f)
+        except OSError:
+            return None
+        return StoredAsset(digest, path, size, meta.get("content_type", "application/octet-stream"))
+
+    async def mirror(self, url: str) -> str:
+        """Download url into the store and return its sha256; concurrent calls for one url share a download"""
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._download(url))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def mirror_asset(self, asset: GeneratedAsset) -> GeneratedAsset:
+        """Copy of asset pointing at the local mirror; unchanged if it can't be mirrored"""
+        if not asset.url.startswith(("http://", "https://")) or asset.url.startswith(self.public_url + "/api/assets/"):
+            return asset
+        # Placeholders returned after a failed generation are not worth keeping
+        if (asset.metadata or {}).get("error"):
+            return asset
+        try:
+            digest = await self.mirror(asset.url)
+        except Exception as e:
+            print(f"Asset mirror failed for {asset.url}: {e}")
+            self.failures += 1
+            return asset
+        metadata = {**(asset.metadata or {}), "source_url": asset.url, "sha256": digest}
+        return asset.model_copy(update={"url": self.url_for(digest), "metadata": metadata})
+
+    async def mirror_assets(self, assets: List[GeneratedAsset]) -> List[GeneratedAsset]:
+        return list(await asyncio.gather(*(self.mirror_asset(asset) for asset in assets)))
+
+    async def _download(self, url: str) -> str:
+        temp_path = os.path.join(self.root, "tmp", uuid.uuid4().hex)
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            async with self.semaphore:
+                async with self.client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    content_type = response.headers.get("content-type", "application/octet-stream")
+                    f = await asyncio.to_thread(open, temp_path, "wb")
+                    try:
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            sha256.update(chunk)
+                            size += len(chunk)
+                            await asyncio.to_thread(f.write, chunk)
+                    finally:
+                        await asyncio.to_thread(f.close)
+
+            digest = sha256.hexdigest()
+            await asyncio.to_thread(self._commit, temp_path, digest, content_type)
+            self.mirrored += 1
+            self.bytes_downloaded += size
+            return digest
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    async def store_file(self, path: str, content_type: str) -> str:
+        """Move a local file into the store and return its sha256"""
+        digest = await asyncio.to_thread(self._hash_file, path)
+        await asyncio.to_thread(self._commit, path, digest, content_type)
+        if os.path.exists(path):
+            os.remove(path)
+        return digest
+
+    def _hash_file(self, path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def _commit(self, temp_path: str, digest: str, content_type: str) -> None:
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.json", "w") as f:
+            json.dump({"content_type": content_type}, f)
+        # Blob last, so a visible blob always has its metadata
+        os.replace(temp_path, path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mirrored": self.mirrored,
+            "failures": self.failures,
+            "bytes_downloaded": self.bytes_downloaded,
+            "in_flight": len(self._in_flight)
+        }
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) for a single "bytes=" range, None to serve the whole file.
+
+    Raises ValueError when the range can't be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Other units and multipart ranges are ignored; the full body is a valid answer
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                raise ValueError("Empty suffix range")
+            start, end = max(size - length, 0), size - 1
+    except ValueError:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    if start > end or start >= size:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, end
+
+
+async def iter_file(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file without blocking the event loop"""
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+def create_asset_store() -> Optional[AssetStore]:
+    """Asset mirror from ASSET_MIRROR_* settings, or None when mirroring is disabled.
+
+    Mirroring also needs ASSET_PUBLIC_URL: the frontend runs on its own
+    origin, so relative /api/assets URLs would not resolve there.
+    """
+    if os.getenv("ASSET_MIRROR_ENABLED", "true").lower() == "false":
+        return None
+    public_url = os.getenv("ASSET_PUBLIC_URL", "").strip()
+    if not public_url.startswith(("http://", "https://")):
+        print("Asset mirror disabled: set ASSET_PUBLIC_URL to this backend's absolute URL to enable it")
+        return None
+    return AssetStore(
+        root=os.getenv("ASSET_STORE_DIR", "asset_store"),
+        public_url=public_url,
+        max_concurrency=int(os.getenv("ASSET_MIRROR_CONCURRENCY", "4"))
+    )
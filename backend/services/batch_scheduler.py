@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+from models import ProgressUpdate
+
+
+class BatchScheduler:
+    """Shares a fixed number of generation slots across batches, round-robin.
+
+    Each batch queues its items separately; when a slot frees up it goes to
+    the next batch in rotation, so a batch of fifty ideas can't hold every
+    slot while a batch of three waits behind it. Upstream calls still go
+    through the shared per-model rate limiter.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.waiting: Dict[str, Deque[asyncio.Future]] = {}
+        self.rotation: Deque[str] = deque()
+        self.total_wait = 0.0
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def slot(self, batch_id: str) -> AsyncIterator[None]:
+        """Hold one generation slot for an item of batch_id"""
+        started = time.monotonic()
+        if self.active < self.max_concurrency and not self.rotation:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            if batch_id not in self.waiting:
+                self.waiting[batch_id] = deque()
+                self.rotation.append(batch_id)
+            self.waiting[batch_id].append(future)
+            try:
+                # The releasing item hands its slot over, so active is unchanged
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Slot was handed to us just as we were cancelled; pass it on
+                    self._release()
+                raise
+
+        self.acquired += 1
+        self.total_wait += time.monotonic() - started
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        while self.rotation:
+            batch_id = self.rotation.popleft()
+            queue = self.waiting[batch_id]
+            while queue and queue[0].done():
+                # Cancelled waiters
+                queue.popleft()
+            if not queue:
+                del self.waiting[batch_id]
+                continue
+            future = queue.popleft()
+            if queue:
+                self.rotation.append(batch_id)
+            else:
+                del self.waiting[batch_id]
+            future.set_result(None)
+            return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "waiting_batches": len(self.rotation),
+            "waiting_items": sum(len(queue) for queue in self.waiting.values()),
+            "avg_slot_wait_seconds": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0
+        }
+
+
+class BatchRun:
+    """Runs the items of one batch through the scheduler and merges their progress"""
+
+    def __init__(self, requests: List[Any], run_item: Callable[[Any], AsyncIterator[ProgressUpdate]],
+                 scheduler: BatchScheduler):
+        self.id = str(uuid.uuid4())
+        self.requests = requests
+        self.run_item = run_item
+        self.scheduler = scheduler
+        self.started_at = time.monotonic()
+        self.items: List[Dict[str, Any]] = [
+            {"index": index, "status": "queued", "package_id": None, "seconds": None, "assets": 0, "error": None}
+            for index in range(len(requests))
+        ]
+
+    async def events(self) -> AsyncIterator[Tuple[int, ProgressUpdate]]:
+        """Yield (item index, update) from every item as they arrive"""
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [asyncio.create_task(self._run(index, request, queue)) for index, request in enumerate(self.requests)]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                index, update = await queue.get()
+                if update is None:
+                    remaining -= 1
+                    continue
+                yield index, update
+        finally:
+            # Stop the remaining items if the client disconnects
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, index: int, request: Any, queue: asyncio.Queue) -> None:
+        item = self.items[index]
+        try:
+            async with self.scheduler.slot(self.id):
+                item["status"] = "running"
+                started = time.monotonic()
+                async for update in self.run_item(request):
+                    item["package_id"] = item["package_id"] or update.package_id
+                    if update.completed:
+                        if update.result is not None:
+                            item["status"] = "completed"
+                            item["assets"] = len(update.result.assets)
+                        else:
+                            item["status"] = "failed"
+                            item["error"] = update.message
+                    queue.put_nowait((index, update))
+                item["seconds"] = round(time.monotonic() - started, 3)
+                if item["status"] == "running":
+                    item["status"] = "failed"
+                    item["error"] = "Generation ended without a result"
+        except asyncio.CancelledError:
+            item["status"] = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Batch {self.id} item {index} error: {e}")
+            item["status"] = "failed"
+            item["error"] = str(e)
+        finally:
+            queue.put_nowait((index, None))
+
+    def summary(self) -> Dict[str, Any]:
+        wall_seconds = time.monotonic() - self.started_at
+        durations = sorted(item["seconds"] for item in self.items if item["seconds"] is not None)
+        completed = [item for item in self.items if item["status"] == "completed"]
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not durations:
+                return None
+            return durations[min(len(durations) - 1, int(len(durations) * fraction))]
+
+        return {
+            "batch_id": self.id,
+            "items": len(self.items),
+            "completed": len(completed),
+            "failed": sum(1 for item in self.items if item["status"] == "failed"),
+            "wall_seconds": round(wall_seconds, 3),
+            "items_per_minute": round(len(completed) * 60 / wall_seconds, 2) if wall_seconds > 0 else None,
+            "assets_generated": sum(item["assets"] for item in completed),
+            "avg_item_seconds": round(sum(durations) / len(durations), 3) if durations else None,
+            "p50_item_seconds": percentile(0.5),
+            "p95_item_seconds": percentile(0.95),
+            "results": self.items
+        }
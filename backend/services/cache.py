@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def hash_key(*parts: Any) -> str:
+    """Build a stable cache key from JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def normalize_text(value: str) -> str:
+    """Case- and whitespace-insensitive form so near-identical inputs share a key"""
+    return " ".join(value.lower().split()).rstrip(".!?")
+
+
+class MemoryCache:
+    """In-memory LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at and expires_at < time.time():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.time() + ttl if ttl else 0
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache tier that survives restarts. Values are stored as JSON."""
+
+    def __init__(self, path: str, table: str = "cache", ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            value, expires_at = row
+            if expires_at and expires_at < time.time():
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return False, None
+        return True, json.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.time() + ttl if ttl else 0
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+
+class TieredCache:
+    """Memory LRU in front of an optional SQLite tier, with hit/miss counters.
+
+    Disk hits are promoted into memory. Values must be JSON-serializable
+    when a disk tier is configured.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, ttl_seconds: Optional[float] = None,
+                 db_path: Optional[str] = None):
+        self.name = name
+        self.memory = MemoryCache(max_entries, ttl_seconds)
+        self.disk = SQLiteCache(db_path, table=name, ttl_seconds=ttl_seconds) if db_path else None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        found, value = self.memory.get(key)
+        if found:
+            self.hits += 1
+            return True, value
+
+        if self.disk is not None:
+            found, value = await asyncio.to_thread(self.disk.get, key)
+            if found:
+                self.hits += 1
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return True, value
+
+        self.misses += 1
+        return False, None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        self.memory.set(key, value, ttl_seconds)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.delete, key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.memory),
+            "evictions": self.memory.evictions,
+            "disk_enabled": self.disk is not None
+        }
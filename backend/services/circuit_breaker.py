@@ -0,0 +1,192 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from services.retry_policy import is_retryable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# (consecutive failures that open the breaker, seconds it stays open, seconds a call
+# may take before it counts as failed) per upstream. The call timeout covers one
+# upstream request, not the retries or the wait for a rate limiter slot.
+DEFAULT_BREAKER_SETTINGS: Dict[str, Tuple[int, float, float]] = {
+    # Veo3 failures are slow to surface, so give up on it sooner and for longer
+    "fal-ai/veo3": (3, 120.0, 600.0),
+}
+FALLBACK_BREAKER_SETTINGS: Tuple[int, float, float] = (5, 30.0, 180.0)
+
+def parse_breaker_settings(value: str) -> Dict[str, Tuple[int, float, float]]:
+    """Parse "endpoint=failures:reset_seconds:call_timeout,..." overrides"""
+    settings = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        endpoint, spec = item.rsplit("=", 1)
+        failures, reset_seconds, call_timeout = spec.split(":")
+        settings[endpoint.strip()] = (int(failures), float(reset_seconds), float(call_timeout))
+    return settings
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    # Retrying within the same job can't help until the breaker resets
+    retryable = False
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable (circuit open, retrying in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one upstream endpoint.
+
+    Closed, calls go through and failure_threshold consecutive failures
+    open the breaker. Open, calls fail at once with CircuitOpenError so
+    callers go straight to their fallback. After reset_seconds one trial
+    call is let through (half-open): success closes the breaker, failure
+    opens it again. Only errors that say the upstream is unhealthy count,
+    including calls that run past call_timeout. Bad requests don't, and
+    neither does cancellation: a caller giving up at its own deadline says
+    nothing about the upstream.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 call_timeout: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.call_timeout = call_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def _refresh(self) -> None:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+            self.probing = False
+
+    def available(self) -> bool:
+        """Whether a call made now would be let through"""
+        self._refresh()
+        return self.state == CLOSED or (self.state == HALF_OPEN and not self.probing)
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if a call made now would be rejected, without claiming a trial"""
+        if not self.available():
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def acquire(self) -> None:
+        """Admit one call or raise CircuitOpenError"""
+        self._refresh()
+        if self.state == CLOSED:
+            return
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.name, self.retry_in())
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            print(f"Circuit for {self.name} closed")
+        self.state = CLOSED
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self, error: BaseException) -> None:
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.probing = False
+            self.times_opened += 1
+            print(f"Circuit for {self.name} opened after {self.failures} failures; last: {self.last_error}")
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Run one call through the breaker, recording how it went"""
+        self.acquire()
+        try:
+            async with asyncio.timeout(self.call_timeout):
+                yield
+        except asyncio.CancelledError:
+            # Client went away or hit its deadline; says nothing about the upstream, so just free the trial slot
+            self.probing = False
+            raise
+        except GeneratorExit:
+            # A stream closed early by its reader
+            self.probing = False
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                self.record_failure(e)
+            else:
+                # The upstream answered, just not with what we wanted
+                self.record_success()
+            raise
+        else:
+            self.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        self._refresh()
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(self.retry_in(), 1),
+            "last_error": self.last_error
+        }
+
+
+class CircuitBreakers:
+    """Process-wide registry of per-endpoint breakers"""
+
+    def __init__(self, settings: Optional[Dict[str, Tuple[int, float, float]]] = None):
+        if settings is None:
+            settings = {**DEFAULT_BREAKER_SETTINGS, **parse_breaker_settings(os.getenv("CIRCUIT_BREAKERS", ""))}
+        self.settings = settings
+        self.enabled = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() != "false"
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self.breakers:
+            failures, reset_seconds, call_timeout = self.settings.get(endpoint, FALLBACK_BREAKER_SETTINGS)
+            if not self.enabled:
+                # Never opens and never times calls out
+                failures, call_timeout = 2 ** 31, None
+            self.breakers[endpoint] = CircuitBreaker(endpoint, failures, reset_seconds, call_timeout)
+        return self.breakers[endpoint]
+
+    def guard(self, endpoint: str):
+        """Context manager running one upstream request to `endpoint` through its breaker"""
+        return self.breaker(endpoint).guard()
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
+
+
+_shared_breakers: Optional[CircuitBreakers] = None
+
+def get_circuit_breakers() -> CircuitBreakers:
+    """Circuit breakers shared by every FAL and Gemini call in the process"""
+    global _shared_breakers
+    if _shared_breakers is None:
+        _shared_breakers = CircuitBreakers()
+    return _shared_breakers
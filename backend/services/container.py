@@ -0,0 +1,108 @@
+import os
+from typing import Any, Dict, Optional
+import google.generativeai as genai
+from agents.brand_director import create_strategy_cache
+from services.asset_store import AssetStore, create_asset_store
+from services.batch_scheduler import BatchScheduler
+from services.circuit_breaker import get_circuit_breakers
+from services.fal_service import FALService
+from services.job_manager import JobManager
+from services.logo_derivatives import LogoDerivatives
+from services.package_store import PackageStore, create_package_store
+from services.rate_limiter import get_rate_limiter
+
+
+class ServiceContainer:
+    """Process-wide clients, models and stores shared by agents and routes.
+
+    Created once in the FastAPI lifespan. API clients are built on first
+    use so the server still starts (and reports status) without API keys.
+    """
+
+    def __init__(self, package_store: Optional[PackageStore] = None, job_manager: Optional[JobManager] = None,
+                 asset_store: Optional[AssetStore] = None):
+        self.package_store = package_store if package_store is not None else create_package_store()
+        self.job_manager = job_manager if job_manager is not None else JobManager()
+        self.batch_scheduler = BatchScheduler()
+        # Shared by every BrandDirector, so repeated ideas hit one warm cache
+        self.strategy_cache = create_strategy_cache()
+        # None when ASSET_MIRROR_ENABLED=false; assets then keep their upstream URLs
+        self.asset_store = asset_store if asset_store is not None else create_asset_store()
+        # Derivatives are rendered from the mirrored logo, so they need the asset store
+        self.logo_derivatives: Optional[LogoDerivatives] = None
+        if self.asset_store is not None and os.getenv("LOGO_DERIVATIVES_ENABLED", "true").lower() != "false":
+            self.logo_derivatives = LogoDerivatives(self.asset_store)
+        self._fal_service: Optional[FALService] = None
+        self._gemini_model: Optional[Any] = None
+        self._orchestrator = None
+
+    @property
+    def fal_service(self) -> FALService:
+        """Shared FAL client; raises ValueError when FAL_KEY is missing"""
+        if self._fal_service is None:
+            self._fal_service = FALService()
+        return self._fal_service
+
+    @property
+    def gemini_model(self) -> Any:
+        """Shared Gemini model; raises ValueError when GOOGLE_API_KEY is missing"""
+        if self._gemini_model is None:
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise ValueError("GOOGLE_API_KEY environment variable is required")
+            genai.configure(api_key=api_key)
+
+            try:
+                self._gemini_model = genai.GenerativeModel('gemini-2.5-pro')
+            except Exception as e:
+                print(f"Failed to load gemini-2.5-pro: {e}")
+                self._gemini_model = genai.GenerativeModel('gemini-pro')
+        return self._gemini_model
+
+    def orchestrator(self):
+        """Shared BrandOrchestrator wired to the container's clients"""
+        if self._orchestrator is None:
+            from orchestrator import BrandOrchestrator
+            self._orchestrator = BrandOrchestrator(
+                package_store=self.package_store,
+                asset_store=self.asset_store,
+                logo_derivatives=self.logo_derivatives,
+                fal_service=self.fal_service,
+                gemini_model=self.gemini_model,
+                strategy_cache=self.strategy_cache
+            )
+        return self._orchestrator
+
+    @property
+    def orchestrator_ready(self) -> bool:
+        return self._orchestrator is not None
+
+    def warm_up(self) -> None:
+        """Build clients up front so the first request doesn't pay for setup"""
+        try:
+            self.orchestrator()
+            print("Services initialized")
+        except Exception as e:
+            print(f"Services not fully initialized, will retry on first request: {e}")
+
+    async def aclose(self) -> None:
+        """Release network clients and worker processes on shutdown"""
+        if self.asset_store is not None:
+            await self.asset_store.aclose()
+        if self.logo_derivatives is not None:
+            self.logo_derivatives.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "jobs": self.job_manager.stats(),
+            "rate_limits": get_rate_limiter().stats(),
+            "circuits": get_circuit_breakers().stats(),
+            "batches": self.batch_scheduler.stats()
+        }
+        if self.asset_store is not None:
+            stats["asset_mirror"] = self.asset_store.stats()
+        stats["strategy_cache"] = self.strategy_cache.stats()
+        if self._fal_service is not None:
+            stats["fal_cache"] = self._fal_service.cache.stats()
+            stats["fal_retries"] = self._fal_service.retry.stats()
+        return stats
@@ -1,34 +1,220 @@
 import os
 import asyncio
-from typing import List, Dict, Any, Optional
+import random
+from typing import List, Dict, Any, Optional, Callable, Tuple
 import fal_client as fal
 from models import GeneratedAsset, BrandStrategy
+from services.cache import TieredCache, hash_key
+from services.circuit_breaker import CircuitBreakers, get_circuit_breakers
+from services.rate_limiter import RateLimiter, get_rate_limiter
+from services.retry_policy import RetryExecutor
+
+# Receives (progress 0-100, message) as a FAL job moves through the queue
+ProgressCallback = Callable[[int, str], None]
+
+# Progress reported for each queue state; completion is reported by the caller
+QUEUED_PROGRESS = 10
+IN_PROGRESS_START = 40
+IN_PROGRESS_MAX = 90
+
+# Default result-cache TTL per endpoint, in seconds. FAL CDN URLs expire,
+# so entries must not outlive the files they point at.
+DEFAULT_CACHE_TTLS = {
+    "fal-ai/flux/dev": 3600,
+    "fal-ai/flux/schnell": 3600,
+    "fal-ai/veo3": 6 * 3600,
+}
+
+# Most images one request can return, for endpoints that support num_images
+MULTI_IMAGE_ENDPOINTS = {
+    "fal-ai/flux/dev": 4,
+    "fal-ai/flux/schnell": 4,
+}
+
+# Seeds are kept below this; fan-out seeds (seed + index) wrap around it
+SEED_LIMIT = 2 ** 31
+
+# Stand-ins for assets that couldn't be generated
+PLACEHOLDER_URLS = {
+    "logo": "https://via.placeholder.com/512x512/6366f1/ffffff?text=LOGO",
+    "mockup": "https://via.placeholder.com/800x450/8b5cf6/ffffff?text=WEBSITE+MOCKUP",
+    "video": "https://sample-videos.com/zip/10/mp4/SampleVideo_1280x720_1mb.mp4",
+}
+
+# Strategy fields read by generate_logo; the logo can start once these are known
+LOGO_PROMPT_FIELDS = [
+    "company_name", "industry", "unique_value_proposition", "logo_style", "brand_archetype",
+    "color_scheme", "brand_personality", "visual_elements", "positioning_statement", "target_audience",
+]
+
+_shared_cache: Optional[TieredCache] = None
+
+def get_result_cache() -> TieredCache:
+    """Process-wide FAL result cache shared by every FALService"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = TieredCache(
+            "fal_cache",
+            max_entries=int(os.getenv("FAL_CACHE_SIZE", "512")),
+            ttl_seconds=float(os.getenv("FAL_CACHE_TTL", "3600")),
+            db_path=os.getenv("FAL_CACHE_DB") or None
+        )
+    return _shared_cache
+
+def placeholder_asset(asset_type: str, strategy: BrandStrategy, error: str, platform: Optional[str] = None) -> GeneratedAsset:
+    """Placeholder in place of an asset that failed or ran out of time"""
+    slug = strategy.company_name.lower().replace(' ', '_')
+    if asset_type == "social_post":
+        return GeneratedAsset(
+            type=asset_type,
+            url=f"https://via.placeholder.com/400x400/06b6d4/ffffff?text={platform.upper()}+POST",
+            filename=f"social_{platform}_{slug}.png",
+            metadata={"platform": platform, "error": error}
+        )
+    filename = f"promo_{slug}.mp4" if asset_type == "video" else f"{asset_type}_{slug}.png"
+    return GeneratedAsset(type=asset_type, url=PLACEHOLDER_URLS[asset_type], filename=filename, metadata={"error": error})
+
+def logo_seed(prompt: str) -> int:
+    """Seed pinned to a logo prompt, so the draft and the final render start from the same noise"""
+    return int(hash_key("logo-seed", prompt)[:8], 16) % (2 ** 31)
+
+def parse_cache_ttls(value: str) -> Dict[str, float]:
+    """Parse "endpoint=seconds,endpoint=seconds" overrides"""
+    ttls = {}
+    for item in value.split(","):
+        if "=" in item:
+            endpoint, seconds = item.rsplit("=", 1)
+            ttls[endpoint.strip()] = float(seconds)
+    return ttls
+
+def split_progress(on_progress: Optional[ProgressCallback], labels: List[str]) -> Dict[str, Optional[ProgressCallback]]:
+    """Give each concurrent job its own callback, reporting their average to on_progress"""
+    if on_progress is None:
+        return {label: None for label in labels}
+    
+    progress = {label: 0 for label in labels}
+    
+    def reporter(label: str) -> ProgressCallback:
+        def report(value: int, message: str):
+            progress[label] = value
+            on_progress(int(sum(progress.values()) / len(progress)), f"{label}: {message}")
+        return report
+    
+    return {label: reporter(label) for label in labels}
 
 class FALService:
-    def __init__(self):
+    def __init__(self, cache: Optional[TieredCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 retry: Optional[RetryExecutor] = None, breakers: Optional[CircuitBreakers] = None):
         self.fal_key = os.getenv("FAL_KEY")
         if not self.fal_key:
             raise ValueError("FAL_KEY environment variable is required")
         
         # Configure FAL client
         fal.api_key = self.fal_key
+        
+        # Identical (endpoint, arguments) jobs are served from the result cache
+        self.cache = cache if cache is not None else get_result_cache()
+        self.cache_enabled = os.getenv("FAL_CACHE_ENABLED", "true").lower() != "false"
+        self.cache_ttls = {**DEFAULT_CACHE_TTLS, **parse_cache_ttls(os.getenv("FAL_CACHE_TTLS", ""))}
+        
+        # Per-model token bucket and concurrency cap, shared process-wide
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        
+        # Transient failures are retried with backoff before callers fall back to placeholders
+        self.retry = retry if retry is not None else RetryExecutor(
+            hedging_enabled=os.getenv("FAL_HEDGING", "true").lower() != "false"
+        )
+        
+        # Endpoints that keep failing are skipped for a while so callers fall back without waiting
+        self.breakers = breakers if breakers is not None else get_circuit_breakers()
+        
+        # Requests in flight per regeneration when variants fan out (e.g. Veo3)
+        self.variant_concurrency = int(os.getenv("FAL_VARIANT_CONCURRENCY", "2"))
     
-    async def generate_logo(self, strategy: BrandStrategy) -> GeneratedAsset:
+    async def _subscribe(self, endpoint: str, arguments: Dict[str, Any], on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Run a FAL job through the result cache"""
+        if not self.cache_enabled:
+            return await self._run_with_retries(endpoint, arguments, on_progress)
+        
+        # Arguments include the seed whenever one is pinned
+        cache_key = hash_key(endpoint, arguments)
+        found, result = await self.cache.get(cache_key)
+        if found:
+            if on_progress:
+                on_progress(IN_PROGRESS_MAX, "Served from cache")
+            return result
+        
+        result = await self._run_with_retries(endpoint, arguments, on_progress)
+        await self.cache.set(cache_key, result, self.cache_ttls.get(endpoint))
+        return result
+    
+    async def _run_with_retries(self, endpoint: str, arguments: Dict[str, Any], on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Run a FAL job under the endpoint's retry and hedging policy and circuit breaker"""
+        # Fail fast rather than queue for a slot while the breaker is open
+        self.breakers.breaker(endpoint).check()
+        # Hedged duplicates run silently so progress doesn't jump between jobs
+        return await self.retry.run(
+            endpoint,
+            lambda primary, started: self._run_job(endpoint, arguments, on_progress if primary else None, started)
+        )
+    
+    async def _run_job(self, endpoint: str, arguments: Dict[str, Any], on_progress: Optional[ProgressCallback] = None,
+                       started: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """Run a FAL job, forwarding queue position and log updates to on_progress.
+
+        started is called once a rate limiter slot is held and the job is sent.
+        """
+        log_count = 0
+        
+        def handle_update(status):
+            nonlocal log_count
+            if on_progress is None:
+                return
+            if isinstance(status, fal.Queued):
+                on_progress(QUEUED_PROGRESS, f"Queued at position {status.position}")
+            elif isinstance(status, fal.InProgress):
+                logs = status.logs or []
+                log_count += len(logs)
+                # Each log line nudges progress forward without claiming completion
+                progress = min(IN_PROGRESS_START + 5 * log_count, IN_PROGRESS_MAX)
+                message = logs[-1].get("message", "Generating...") if logs else "Generating..."
+                on_progress(progress, message)
+        
+        limiter = self.rate_limiter.limiter(endpoint)
+        if on_progress and limiter.in_flight >= limiter.max_concurrency:
+            on_progress(QUEUED_PROGRESS // 2, "Waiting for capacity...")
+        
+        async with limiter.slot():
+            if started is not None:
+                started()
+            # The breaker sees each upstream request, not the wait for a slot or retry backoff
+            async with self.breakers.guard(endpoint):
+                return await fal.subscribe_async(
+                    endpoint,
+                    arguments=arguments,
+                    with_logs=on_progress is not None,
+                    on_queue_update=handle_update
+                )
+    
+    async def generate_logo(self, strategy: BrandStrategy, on_progress: Optional[ProgressCallback] = None) -> GeneratedAsset:
         """Generate logo using FLUX model"""
         try:
             # Create detailed prompt for logo generation
             prompt = self._create_logo_prompt(strategy)
+            seed = logo_seed(prompt)
             
             # Use FLUX model for high-quality logo generation
-            result = await fal.subscribe_async(
+            result = await self._subscribe(
                 "fal-ai/flux/dev",
                 arguments={
                     "prompt": prompt,
                     "image_size": "square_hd",
                     "num_inference_steps": 50,
                     "guidance_scale": 7.5,
+                    "seed": seed,
                     "enable_safety_checker": True
-                }
+                },
+                on_progress=on_progress
             )
             
             # Extract image URL
@@ -41,7 +227,8 @@ class FALService:
                 metadata={
                     "prompt": prompt,
                     "model": "flux-dev",
-                    "style": strategy.logo_style
+                    "style": strategy.logo_style,
+                    "seed": seed
                 }
             )
             
@@ -55,19 +242,53 @@ class FALService:
                 metadata={"error": str(e)}
             )
     
-    async def generate_website_mockup(self, strategy: BrandStrategy) -> GeneratedAsset:
+    async def generate_logo_draft(self, strategy: BrandStrategy) -> GeneratedAsset:
+        """Quick 4-step FLUX schnell preview of the logo, shown while flux/dev renders.
+        
+        Uses the same prompt and seed as generate_logo. Errors are raised;
+        the draft is optional, so callers just go without it.
+        """
+        prompt = self._create_logo_prompt(strategy)
+        seed = logo_seed(prompt)
+        
+        result = await self._subscribe(
+            "fal-ai/flux/schnell",
+            arguments={
+                "prompt": prompt,
+                "image_size": "square_hd",
+                "num_inference_steps": 4,
+                "seed": seed,
+                "enable_safety_checker": True
+            }
+        )
+        
+        return GeneratedAsset(
+            type="logo",
+            url=result["images"][0]["url"],
+            filename=f"logo_{strategy.company_name.lower().replace(' ', '_')}_draft.png",
+            metadata={
+                "prompt": prompt,
+                "model": "flux-schnell",
+                "style": strategy.logo_style,
+                "seed": seed,
+                "draft": True
+            }
+        )
+    
+    async def generate_website_mockup(self, strategy: BrandStrategy, on_progress: Optional[ProgressCallback] = None) -> GeneratedAsset:
         """Generate website mockup"""
         try:
             prompt = self._create_mockup_prompt(strategy)
             
-            result = await fal.subscribe_async(
+            result = await self._subscribe(
                 "fal-ai/flux/schnell",  # Faster model for mockups
                 arguments={
                     "prompt": prompt,
                     "image_size": "landscape_16_9",
                     "num_inference_steps": 4,
                     "enable_safety_checker": True
-                }
+                },
+                on_progress=on_progress
             )
             
             image_url = result["images"][0]["url"]
@@ -106,7 +327,7 @@ class FALService:
             try:
                 prompt = self._create_social_post_prompt(strategy, platform["style"])
                 
-                result = await fal.subscribe_async(
+                result = await self._subscribe(
                     "fal-ai/flux/schnell",
                     arguments={
                         "prompt": prompt,
@@ -129,9 +350,6 @@ class FALService:
                     }
                 ))
                 
-                # Add small delay between requests
-                await asyncio.sleep(1)
-                
             except Exception as e:
                 print(f"Social post generation error for {platform['name']}: {e}")
                 # Add placeholder
@@ -150,7 +368,7 @@ class FALService:
             prompt = self._create_video_prompt(strategy)
             
             # Use Veo3 for high-quality video generation with audio
-            result = await fal.subscribe_async(
+            result = await self._subscribe(
                 "fal-ai/veo3",
                 arguments={
                     "prompt": prompt,
@@ -261,70 +479,60 @@ class FALService:
             Color scheme: {strategy.color_scheme.get('primary', '#6366f1')}.
             Professional, engaging, modern design."""
     
-    async def generate_social_posts_with_copy(self, strategy: BrandStrategy, posts_with_copy: List[Dict]) -> List[GeneratedAsset]:
-        """Generate social media posts with provided copy"""
-        assets = []
-        
-        for post_data in posts_with_copy:
-            platform = post_data["platform"]
-            copy = post_data["copy"]
+    async def generate_social_post_with_copy(self, strategy: BrandStrategy, platform: Dict, copy: str, on_progress: Optional[ProgressCallback] = None) -> GeneratedAsset:
+        """Generate a single platform's social media post with provided copy"""
+        try:
+            prompt = self._create_social_post_prompt(
+                strategy, 
+                f"{platform['name'].capitalize()} {platform['post_type']}", 
+                copy
+            )
             
-            try:
-                prompt = self._create_social_post_prompt(
-                    strategy, 
-                    f"{platform['name'].capitalize()} {platform['post_type']}", 
-                    copy
-                )
-                
-                # Determine image size based on platform
-                size_map = {
-                    "instagram": "square_hd",
-                    "linkedin": "landscape_4_3", 
-                    "twitter": "landscape_16_9"
+            # Determine image size based on platform
+            size_map = {
+                "instagram": "square_hd",
+                "linkedin": "landscape_4_3", 
+                "twitter": "landscape_16_9"
+            }
+            
+            result = await self._subscribe(
+                "fal-ai/flux/schnell",
+                arguments={
+                    "prompt": prompt,
+                    "image_size": size_map.get(platform["name"], "square_hd"),
+                    "num_inference_steps": 4,
+                    "enable_safety_checker": True
+                },
+                on_progress=on_progress
+            )
+            
+            image_url = result["images"][0]["url"]
+            
+            return GeneratedAsset(
+                type="social_post",
+                url=image_url,
+                filename=f"social_{platform['name']}_{strategy.company_name.lower().replace(' ', '_')}.png",
+                metadata={
+                    "prompt": prompt,
+                    "platform": platform["name"],
+                    "copy": copy,
+                    "model": "flux-schnell"
                 }
-                
-                result = await fal.subscribe_async(
-                    "fal-ai/flux/schnell",
-                    arguments={
-                        "prompt": prompt,
-                        "image_size": size_map.get(platform["name"], "square_hd"),
-                        "num_inference_steps": 4,
-                        "enable_safety_checker": True
-                    }
-                )
-                
-                image_url = result["images"][0]["url"]
-                
-                assets.append(GeneratedAsset(
-                    type="social_post",
-                    url=image_url,
-                    filename=f"social_{platform['name']}_{strategy.company_name.lower().replace(' ', '_')}.png",
-                    metadata={
-                        "prompt": prompt,
-                        "platform": platform["name"],
-                        "copy": copy,
-                        "model": "flux-schnell"
-                    }
-                ))
-                
-                # Small delay between requests
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                print(f"Social post generation error for {platform['name']}: {e}")
-                # Add placeholder with copy
-                assets.append(GeneratedAsset(
-                    type="social_post",
-                    url=f"https://via.placeholder.com/400x400/06b6d4/ffffff?text={platform['name'].upper()}+POST",
-                    filename=f"social_{platform['name']}_{strategy.company_name.lower().replace(' ', '_')}.png",
-                    metadata={
-                        "platform": platform["name"],
-                        "copy": copy,
-                        "error": str(e)
-                    }
-                ))
-        
-        return assets
+            )
+            
+        except Exception as e:
+            print(f"Social post generation error for {platform['name']}: {e}")
+            # Return placeholder with copy
+            return GeneratedAsset(
+                type="social_post",
+                url=f"https://via.placeholder.com/400x400/06b6d4/ffffff?text={platform['name'].upper()}+POST",
+                filename=f"social_{platform['name']}_{strategy.company_name.lower().replace(' ', '_')}.png",
+                metadata={
+                    "platform": platform["name"],
+                    "copy": copy,
+                    "error": str(e)
+                }
+            )
     
     def _create_video_prompt(self, strategy: BrandStrategy) -> str:
         """Create optimized prompt for 8-second promotional video using Veo3"""
@@ -390,13 +598,67 @@ High production value, engaging storytelling, memorable brand presentation."""
             ]
         }
     
-    async def regenerate_logo(self, strategy: BrandStrategy, custom_prompt: str) -> GeneratedAsset:
-        """Regenerate logo with custom prompt"""
+    async def _generate_variants(self, endpoint: str, arguments: Dict[str, Any], variants: int = 1,
+                                 seed: Optional[int] = None, output_key: str = "images",
+                                 variant_index: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, int]]]:
+        """Run one prompt for several variants and return (output per variant, how to reproduce each).
+
+        Endpoints with multi-image output get a single request with num_images,
+        so a variant is reproduced by the same seed and variant count plus its
+        variant_index. Others fan out one request per variant with seeds seed,
+        seed + 1, ... (wrapping at SEED_LIMIT), a few at a time, so each variant
+        has a seed of its own and is reproduced with variants=1.
+
+        With variant_index, only that variant of the set is returned; on the
+        fan-out path only its request is made.
+        """
+        if seed is None:
+            seed = random.randrange(SEED_LIMIT)
+        indexes = range(variants) if variant_index is None else [variant_index]
+        
+        max_images = MULTI_IMAGE_ENDPOINTS.get(endpoint, 1)
+        if output_key == "images" and variants <= max_images:
+            # The whole set is rendered either way; num_images is part of what makes it reproducible
+            result = await self._subscribe(endpoint, arguments={**arguments, "num_images": variants, "seed": seed})
+            images = result["images"][:variants]
+            indexes = [index for index in indexes if index < len(images)]
+            return [images[index] for index in indexes], [{"seed": seed, "variants": variants, "variant_index": index}
+                                                          for index in indexes]
+        
+        semaphore = asyncio.Semaphore(self.variant_concurrency)
+        
+        async def run(index: int) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self._subscribe(endpoint, arguments={**arguments, "seed": (seed + index) % SEED_LIMIT})
+            output = result[output_key]
+            return output[0] if isinstance(output, list) else output
+        
+        outputs = list(await asyncio.gather(*(run(index) for index in indexes)))
+        return outputs, [{"seed": (seed + index) % SEED_LIMIT, "variants": 1, "variant_index": 0} for index in indexes]
+    
+    def _variant_assets(self, asset_type: str, outputs: List[Dict[str, Any]], reproduce: List[Dict[str, int]],
+                        filename: str, metadata: Dict[str, Any]) -> List[GeneratedAsset]:
+        """One regenerated asset per variant output, tagged with what's needed to reproduce it"""
+        stem, _, extension = filename.rpartition(".")
+        assets = []
+        for index, (output, settings) in enumerate(zip(outputs, reproduce)):
+            assets.append(GeneratedAsset(
+                type=asset_type,
+                url=output["url"],
+                filename=f"{stem}_v{index + 1}.{extension}" if len(outputs) > 1 else filename,
+                # Send seed and variants back to regenerate this variant; variant_index picks it from the set
+                metadata={**metadata, "regenerated": True, **settings}
+            ))
+        return assets
+    
+    async def regenerate_logo(self, strategy: BrandStrategy, custom_prompt: str, variants: int = 1,
+                              seed: Optional[int] = None, variant_index: Optional[int] = None) -> List[GeneratedAsset]:
+        """Regenerate logo variants with custom prompt"""
         try:
             # Use custom prompt while maintaining brand context
             prompt = f"{custom_prompt}\n\nCompany: {strategy.company_name}\nIndustry: {strategy.industry}\nBrand personality: {', '.join(strategy.brand_personality)}\nColor scheme: Primary {strategy.color_scheme.get('primary', '#6366f1')}"
             
-            result = await fal.subscribe_async(
+            images, reproduce = await self._generate_variants(
                 "fal-ai/flux/dev",
                 arguments={
                     "prompt": prompt,
@@ -404,62 +666,59 @@ High production value, engaging storytelling, memorable brand presentation."""
                     "num_inference_steps": 50,
                     "guidance_scale": 7.5,
                     "enable_safety_checker": True
-                }
+                },
+                variants=variants,
+                seed=seed,
+                variant_index=variant_index
             )
             
-            image_url = result["images"][0]["url"]
-            
-            return GeneratedAsset(
-                type="logo",
-                url=image_url,
-                filename=f"logo_{strategy.company_name.lower().replace(' ', '_')}_regenerated.png",
-                metadata={
-                    "prompt": prompt,
-                    "custom_prompt": custom_prompt,
-                    "model": "flux-dev",
-                    "regenerated": True
-                }
+            return self._variant_assets(
+                "logo",
+                images,
+                reproduce,
+                f"logo_{strategy.company_name.lower().replace(' ', '_')}_regenerated.png",
+                {"prompt": prompt, "custom_prompt": custom_prompt, "model": "flux-dev"}
             )
             
         except Exception as e:
             print(f"Logo regeneration error: {e}")
             raise
     
-    async def regenerate_mockup(self, strategy: BrandStrategy, custom_prompt: str) -> GeneratedAsset:
-        """Regenerate website mockup with custom prompt"""
+    async def regenerate_mockup(self, strategy: BrandStrategy, custom_prompt: str, variants: int = 1,
+                                seed: Optional[int] = None, variant_index: Optional[int] = None) -> List[GeneratedAsset]:
+        """Regenerate website mockup variants with custom prompt"""
         try:
             prompt = f"{custom_prompt}\n\nCompany: {strategy.company_name}\nTagline: {strategy.tagline}\nColors: {strategy.color_scheme.get('primary', '#6366f1')}"
             
-            result = await fal.subscribe_async(
+            images, reproduce = await self._generate_variants(
                 "fal-ai/flux/schnell",
                 arguments={
                     "prompt": prompt,
                     "image_size": "landscape_16_9",
                     "num_inference_steps": 4,
                     "enable_safety_checker": True
-                }
+                },
+                variants=variants,
+                seed=seed,
+                variant_index=variant_index
             )
             
-            image_url = result["images"][0]["url"]
-            
-            return GeneratedAsset(
-                type="mockup",
-                url=image_url,
-                filename=f"mockup_{strategy.company_name.lower().replace(' ', '_')}_regenerated.png",
-                metadata={
-                    "prompt": prompt,
-                    "custom_prompt": custom_prompt,
-                    "model": "flux-schnell",
-                    "regenerated": True
-                }
+            return self._variant_assets(
+                "mockup",
+                images,
+                reproduce,
+                f"mockup_{strategy.company_name.lower().replace(' ', '_')}_regenerated.png",
+                {"prompt": prompt, "custom_prompt": custom_prompt, "model": "flux-schnell"}
             )
             
         except Exception as e:
             print(f"Mockup regeneration error: {e}")
             raise
     
-    async def regenerate_social_post(self, strategy: BrandStrategy, custom_prompt: str, platform: str) -> GeneratedAsset:
-        """Regenerate social media post with custom prompt"""
+    async def regenerate_social_post(self, strategy: BrandStrategy, custom_prompt: str, platform: str,
+                                     variants: int = 1, seed: Optional[int] = None,
+                                     variant_index: Optional[int] = None) -> List[GeneratedAsset]:
+        """Regenerate social media post variants with custom prompt"""
         try:
             size_map = {
                 "instagram": "square_hd",
@@ -469,71 +728,65 @@ High production value, engaging storytelling, memorable brand presentation."""
             
             prompt = f"{custom_prompt}\n\nPlatform: {platform}\nCompany: {strategy.company_name}\nBrand style: {', '.join(strategy.brand_personality)}"
             
-            result = await fal.subscribe_async(
+            images, reproduce = await self._generate_variants(
                 "fal-ai/flux/schnell",
                 arguments={
                     "prompt": prompt,
                     "image_size": size_map.get(platform, "square_hd"),
                     "num_inference_steps": 4,
                     "enable_safety_checker": True
-                }
+                },
+                variants=variants,
+                seed=seed,
+                variant_index=variant_index
             )
             
-            image_url = result["images"][0]["url"]
-            
-            return GeneratedAsset(
-                type="social_post",
-                url=image_url,
-                filename=f"social_{platform}_{strategy.company_name.lower().replace(' ', '_')}_regenerated.png",
-                metadata={
-                    "prompt": prompt,
-                    "custom_prompt": custom_prompt,
-                    "platform": platform,
-                    "model": "flux-schnell",
-                    "regenerated": True
-                }
+            return self._variant_assets(
+                "social_post",
+                images,
+                reproduce,
+                f"social_{platform}_{strategy.company_name.lower().replace(' ', '_')}_regenerated.png",
+                {"prompt": prompt, "custom_prompt": custom_prompt, "platform": platform, "model": "flux-schnell"}
             )
             
         except Exception as e:
             print(f"Social post regeneration error: {e}")
             raise
     
-    async def regenerate_video(self, strategy: BrandStrategy, custom_prompt: str) -> GeneratedAsset:
-        """Regenerate promotional video with custom prompt"""
+    async def regenerate_video(self, strategy: BrandStrategy, custom_prompt: str, variants: int = 1,
+                               seed: Optional[int] = None, variant_index: Optional[int] = None) -> List[GeneratedAsset]:
+        """Regenerate promotional video variants with custom prompt"""
         try:
             prompt = f"{custom_prompt}\n\nCompany: {strategy.company_name}\nTagline: {strategy.tagline}\nBrand style: {', '.join(strategy.brand_personality)}"
             
-            result = await fal.subscribe_async(
+            # Veo3 returns one video per request, so variants fan out
+            videos, reproduce = await self._generate_variants(
                 "fal-ai/veo3",
                 arguments={
                     "prompt": prompt,
                     "aspect_ratio": "16:9",
                     "generate_audio": True,
                     "enhance_prompt": True
-                }
+                },
+                variants=variants,
+                seed=seed,
+                output_key="video",
+                variant_index=variant_index
             )
             
-            video_url = result["video"]["url"]
-            
-            return GeneratedAsset(
-                type="video",
-                url=video_url,
-                filename=f"promo_{strategy.company_name.lower().replace(' ', '_')}_regenerated.mp4",
-                metadata={
-                    "prompt": prompt,
-                    "custom_prompt": custom_prompt,
-                    "model": "veo3",
-                    "duration": "8",
-                    "audio_enabled": True,
-                    "regenerated": True
-                }
+            return self._variant_assets(
+                "video",
+                videos,
+                reproduce,
+                f"promo_{strategy.company_name.lower().replace(' ', '_')}_regenerated.mp4",
+                {"prompt": prompt, "custom_prompt": custom_prompt, "model": "veo3", "duration": "8", "audio_enabled": True}
             )
             
         except Exception as e:
             print(f"Video regeneration error: {e}")
             raise
 
-    async def generate_promotional_video_with_script(self, strategy: BrandStrategy, script: Dict, logo_url: Optional[str] = None) -> GeneratedAsset:
+    async def generate_promotional_video_with_script(self, strategy: BrandStrategy, script: Dict, logo_url: Optional[str] = None, on_progress: Optional[ProgressCallback] = None) -> GeneratedAsset:
         """Generate promotional video using Veo3 with detailed script"""
         try:
             prompt = f"""Create an 8-second promotional video for {strategy.company_name}.
@@ -560,14 +813,15 @@ High production value, engaging storytelling, memorable brand presentation."""
             Create a compelling, high-quality promotional video that tells this story with audio and visual synchronization."""
             
             # Use Veo3 for video generation with audio
-            result = await fal.subscribe_async(
+            result = await self._subscribe(
                 "fal-ai/veo3",
                 arguments={
                     "prompt": prompt,
                     "aspect_ratio": "16:9",
                     "generate_audio": True,
                     "enhance_prompt": True
-                }
+                },
+                on_progress=on_progress
             )
             
             video_url = result["video"]["url"]
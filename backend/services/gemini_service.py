@@ -0,0 +1,70 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Tuple
+from services.circuit_breaker import CircuitBreaker, get_circuit_breakers
+from services.rate_limiter import get_rate_limiter
+
+# Alternate models, built on first use, for calls made while a model's breaker is open
+_alternate_models: Dict[str, Any] = {}
+
+
+def model_key(model: Any) -> str:
+    """Limiter key for a GenerativeModel, e.g. "gemini-2.5-pro" """
+    name = getattr(model, "model_name", "gemini")
+    return name.split("/", 1)[1] if name.startswith("models/") else name
+
+
+def model_available(model: Any) -> bool:
+    """Whether calls to `model` currently reach it rather than an alternate or a fast failure"""
+    return get_circuit_breakers().breaker(model_key(model)).available()
+
+
+def route_model(model: Any) -> Tuple[Any, CircuitBreaker]:
+    """The model to call and its breaker: `model`, or the alternate while its breaker is open.
+
+    Without an alternate (GEMINI_ALTERNATE_MODEL empty or the same model),
+    the call goes to `model` and its open breaker fails it immediately.
+    """
+    breakers = get_circuit_breakers()
+    alternate_name = os.getenv("GEMINI_ALTERNATE_MODEL", "gemini-2.5-flash")
+    if model_available(model) or not alternate_name or alternate_name == model_key(model):
+        return model, breakers.breaker(model_key(model))
+
+    if alternate_name not in _alternate_models:
+        import google.generativeai as genai
+        _alternate_models[alternate_name] = genai.GenerativeModel(alternate_name)
+    alternate = _alternate_models[alternate_name]
+    print(f"{model_key(model)} circuit open, using {alternate_name}")
+    return alternate, breakers.breaker(alternate_name)
+
+
+async def generate_content(model: Any, prompt: str, **kwargs) -> Any:
+    """Run model.generate_content off the event loop, under the circuit breaker and shared rate limiter"""
+    model, breaker = route_model(model)
+    breaker.check()
+    async with get_rate_limiter().limit(model_key(model)):
+        # Guarded inside the slot so a half-open trial isn't claimed while queueing
+        async with breaker.guard():
+            return await asyncio.to_thread(model.generate_content, prompt, **kwargs)
+
+
+async def stream_content(model: Any, prompt: str, **kwargs) -> AsyncIterator[str]:
+    """Yield response text chunks as Gemini produces them, under the circuit breaker and shared rate limiter"""
+    model, breaker = route_model(model)
+    breaker.check()
+    async with get_rate_limiter().limit(model_key(model)):
+        async with breaker.guard():
+            response = await asyncio.to_thread(model.generate_content, prompt, stream=True, **kwargs)
+            chunks = iter(response)
+            while True:
+                # Each chunk is pulled off the event loop; the SDK iterator blocks on the network
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    return
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. only finish metadata)
+                    continue
+                if text:
+                    yield text
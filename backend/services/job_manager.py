@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from models import ProgressUpdate
+from services.serializer import dumps
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_SECONDS = 15
+
+
+class Job:
+    """A generation running in the background, with its full event log.
+
+    Events are stored already serialized and numbered from 1, so any number
+    of clients can replay or resume the stream without recomputing work.
+    The plain dict form used by the compact format is only built once a
+    compact client asks for it, then shared by every such client.
+    """
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = "running"
+        self.package_id: Optional[str] = None
+        self.request_hash: Optional[str] = None
+        self.events: List[bytes] = []
+        self.updates: List[ProgressUpdate] = []
+        self._snapshots: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status != "running"
+
+    async def append(self, update: ProgressUpdate) -> None:
+        async with self._changed:
+            self.package_id = self.package_id or update.package_id
+            if update.result is not None:
+                self.request_hash = update.result.request_hash
+            self.events.append(dumps(update))
+            self.updates.append(update)
+            self._changed.notify_all()
+
+    def snapshots(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Dict form of updates[start:end], converting any not yet asked for"""
+        for update in self.updates[len(self._snapshots):end]:
+            self._snapshots.append(update.model_dump(mode="json"))
+        return self._snapshots[start:end]
+
+    async def finish(self, status: str, error: Optional[str] = None) -> None:
+        async with self._changed:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    async def stream(self, last_event_id: int = 0, raw: bool = False) -> AsyncIterator[Optional[Tuple[int, Any]]]:
+        """Yield (event_id, data) after last_event_id, or None as a heartbeat while idle.
+        
+        data is the serialized update, or its dict form when raw is set.
+        """
+        log = self.updates if raw else self.events
+        index = max(last_event_id, 0)
+        while True:
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(
+                        self._changed.wait_for(lambda: len(log) > index or self.done),
+                        timeout=HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pending: List[Any] = []
+                else:
+                    pending = self.snapshots(index, len(log)) if raw else log[index:]
+                finished = self.done and len(log) <= index + len(pending)
+
+            if not pending and not finished:
+                yield None
+            for data in pending:
+                index += 1
+                yield index, data
+            if finished:
+                return
+
+    def summary(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "package_id": self.package_id,
+            "request_hash": self.request_hash,
+            "events": len(self.events),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """Runs generations as background tasks that outlive any single client connection"""
+
+    def __init__(self, retention_seconds: Optional[float] = None):
+        if retention_seconds is None:
+            retention_seconds = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+        self.retention_seconds = retention_seconds
+        self.jobs: Dict[str, Job] = {}
+
+    def submit(self, run: Callable[[], AsyncIterator[ProgressUpdate]]) -> Job:
+        """Start consuming run() in the background and return its job"""
+        self._purge_expired()
+        job = Job(str(uuid.uuid4()))
+        job.task = asyncio.create_task(self._drive(job, run))
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.done or job.task is None:
+            return False
+        job.task.cancel()
+        return True
+
+    async def _drive(self, job: Job, run: Callable[[], AsyncIterator[ProgressUpdate]]) -> None:
+        status, error = "completed", None
+        try:
+            async for update in run():
+                await job.append(update)
+                # The orchestrator reports failures as a completed update without a result
+                if update.completed and update.result is None:
+                    status, error = "failed", update.message
+        except asyncio.CancelledError:
+            status, error = "cancelled", "Job cancelled"
+        except Exception as e:
+            print(f"Background job {job.id} error: {e}")
+            status, error = "failed", str(e)
+        finally:
+            await job.finish(status, error)
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finished_at is not None and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    def stats(self) -> Dict:
+        running = sum(1 for job in self.jobs.values() if not job.done)
+        return {"jobs": len(self.jobs), "running": running}
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import shutil
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from models import GeneratedAsset
+from services.asset_store import AssetStore
+from services.cache import TieredCache
+
+# Bump when the set or rendering of derivatives changes, so cached results are rebuilt
+DERIVATIVES_VERSION = 2
+
+# (variant, pixel size) for the resized PNGs; sizes above the source's are skipped
+PNG_SIZES = [("png_16", 16), ("png_32", 32), ("apple_touch_180", 180), ("png_512", 512)]
+ICO_SIZES = [(16, 16), (32, 32), (48, 48)]
+MONOCHROME_SIZE = 512
+
+
+def render_derivatives(source_path: str, out_dir: str) -> List[Dict[str, Any]]:
+    """Write every logo derivative into out_dir and describe each one.
+
+    Logos are only ever scaled down; upscaling would just blur them. Runs
+    in a worker process, so it only takes and returns plain values.
+    """
+    from PIL import Image, ImageOps
+
+    outputs: List[Dict[str, Any]] = []
+
+    def save(image: "Image.Image", variant: str, extension: str, content_type: str, **params):
+        path = os.path.join(out_dir, f"{variant}.{extension}")
+        image.save(path, **params)
+        outputs.append({
+            "variant": variant,
+            "path": path,
+            "extension": extension,
+            "content_type": content_type,
+            "width": image.width,
+            "height": image.height
+        })
+
+    with Image.open(source_path) as source:
+        logo = source.convert("RGBA")
+    # Icons must be square; pad rather than crop so nothing is cut off
+    side = max(logo.width, logo.height)
+    if logo.width != logo.height:
+        logo = ImageOps.pad(logo, (side, side), color=(255, 255, 255, 0))
+
+    for variant, size in PNG_SIZES:
+        if size <= side:
+            save(logo.resize((size, size), Image.LANCZOS), variant, "png", "image/png", format="PNG", optimize=True)
+
+    ico_sizes = [size for size in ICO_SIZES if size[0] <= side] or [(side, side)]
+    save(logo, "favicon", "ico", "image/x-icon", format="ICO", sizes=ico_sizes)
+    # The ICO holds several sizes; report the largest
+    outputs[-1]["width"], outputs[-1]["height"] = ico_sizes[-1]
+
+    # Single-color mark: dark strokes on a transparent background
+    mono_side = min(side, MONOCHROME_SIZE)
+    gray = ImageOps.grayscale(logo.resize((mono_side, mono_side), Image.LANCZOS))
+    mask = gray.point(lambda value: 255 if value < 128 else 0)
+    monochrome = Image.new("RGBA", mask.size, (0, 0, 0, 0))
+    monochrome.paste((0, 0, 0, 255), mask=mask)
+    save(monochrome, "monochrome", "png", "image/png", format="PNG", optimize=True)
+
+    save(logo, "webp", "webp", "image/webp", format="WEBP", quality=90, method=4)
+    return outputs
+
+
+class LogoDerivatives:
+    """Builds favicon, icon-size, monochrome and WebP versions of a mirrored logo.
+
+    Image work runs on a process pool so it never holds the event loop or
+    the GIL. Results are cached by the source logo's sha256, and every file
+    is stored in the asset store and returned as an extra GeneratedAsset.
+    """
+
+    def __init__(self, asset_store: AssetStore, executor: Optional[Executor] = None,
+                 cache: Optional[TieredCache] = None):
+        self.asset_store = asset_store
+        self._executor = executor
+        self.cache = cache or TieredCache(
+            "logo_derivatives",
+            max_entries=int(os.getenv("LOGO_DERIVATIVES_CACHE_SIZE", "256")),
+            ttl_seconds=30 * 86400,
+            db_path=os.getenv("LOGO_DERIVATIVES_CACHE_DB") or None
+        )
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=int(os.getenv("LOGO_DERIVATIVE_WORKERS", "2")))
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def create(self, logo: GeneratedAsset) -> List[GeneratedAsset]:
+        """Derivative assets for a mirrored logo; empty if the logo isn't in the asset store"""
+        source_digest = (logo.metadata or {}).get("sha256")
+        source = await asyncio.to_thread(self.asset_store.get, source_digest) if source_digest else None
+        if source is None:
+            return []
+
+        cache_key = f"{source_digest}:{DERIVATIVES_VERSION}"
+        found, cached = await self.cache.get(cache_key)
+        if found and await asyncio.to_thread(self._all_stored, cached):
+            return [self._to_asset(logo, item) for item in cached]
+
+        out_dir = os.path.join(self.asset_store.root, "tmp", uuid.uuid4().hex)
+        await asyncio.to_thread(os.makedirs, out_dir)
+        try:
+            loop = asyncio.get_running_loop()
+            outputs = await loop.run_in_executor(self.executor, render_derivatives, source.path, out_dir)
+            items = []
+            for output in outputs:
+                digest = await self.asset_store.store_file(output["path"], output["content_type"])
+                items.append({**{key: value for key, value in output.items() if key != "path"}, "sha256": digest})
+        finally:
+            await asyncio.to_thread(shutil.rmtree, out_dir, ignore_errors=True)
+
+        await self.cache.set(cache_key, items)
+        return [self._to_asset(logo, item) for item in items]
+
+    def _all_stored(self, items: List[Dict[str, Any]]) -> bool:
+        return all(self.asset_store.get(item["sha256"]) for item in items)
+
+    def _to_asset(self, logo: GeneratedAsset, item: Dict[str, Any]) -> GeneratedAsset:
+        base = os.path.splitext(logo.filename)[0]
+        return GeneratedAsset(
+            type="logo_derivative",
+            url=self.asset_store.url_for(item["sha256"]),
+            filename=f"{base}_{item['variant']}.{item['extension']}",
+            metadata={
+                "variant": item["variant"],
+                "width": item["width"],
+                "height": item["height"],
+                "content_type": item["content_type"],
+                "sha256": item["sha256"],
+                "source_sha256": (logo.metadata or {}).get("sha256")
+            }
+        )
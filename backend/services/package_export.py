@@ -0,0 +1,213 @@
+import io
+import re
+import zipfile
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Set
+import httpx
+from models import BrandPackage, BrandStrategy, GeneratedAsset
+from services.asset_store import CHUNK_SIZE, AssetStore, iter_file
+
+# Archive folder for each asset type
+ASSET_FOLDERS = {
+    "logo": "logo",
+    "logo_derivative": "logo/derivatives",
+    "mockup": "mockup",
+    "social_post": "social",
+    "video": "video",
+}
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only, non-seekable file that hands written bytes back to the caller.
+
+    zipfile falls back to data descriptors for non-seekable output, so the
+    archive can be produced front to back without ever rewinding.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def strategy_markdown(strategy: BrandStrategy) -> str:
+    """Human-readable summary of a brand strategy"""
+    def bullets(items: List[str]) -> str:
+        return "\n".join(f"- {item}" for item in items) or "- None"
+
+    lines = [
+        f"# {strategy.company_name}",
+        f"> {strategy.tagline}",
+        "",
+        "## Positioning",
+        strategy.positioning_statement,
+        "",
+        f"**Industry:** {strategy.industry}  ",
+        f"**Target audience:** {strategy.target_audience}",
+        "",
+        "## Value proposition",
+        strategy.unique_value_proposition,
+        "",
+        "## Competitive advantage",
+        strategy.competitive_advantage,
+        "",
+        "## Customer pain points",
+        bullets(strategy.customer_pain_points),
+        "",
+        "## Brand identity",
+        f"**Archetype:** {strategy.brand_archetype}  ",
+        f"**Personality:** {', '.join(strategy.brand_personality)}",
+        "",
+        "### Values",
+        bullets([f"**{v.get('value', '')}**: {v.get('explanation', '')}" for v in strategy.brand_values]),
+        "",
+        "### Story",
+        strategy.brand_story,
+        "",
+        "## Visual identity",
+        bullets([f"{name}: `{value}`" for name, value in strategy.color_scheme.items()]),
+        "",
+        f"**Logo style:** {strategy.logo_style}",
+        "",
+        "### Visual elements",
+        bullets(strategy.visual_elements),
+    ]
+    if strategy.typography_recommendations:
+        lines += ["", "### Typography", bullets([f"{k}: {v}" for k, v in strategy.typography_recommendations.items()])]
+    lines += [
+        "",
+        "## Alternative names",
+        bullets(strategy.alternative_names),
+        "",
+        "## Domains",
+        bullets(strategy.domain_suggestions),
+        "",
+    ]
+    return "\n".join(lines)
+
+
+class PackageExporter:
+    """Streams a brand package as a ZIP archive.
+
+    Each file is read in chunks (from the local asset mirror when possible,
+    otherwise from its upstream URL) and written straight into the archive,
+    so memory per export stays at a few chunks regardless of video size.
+    """
+
+    def __init__(self, asset_store: Optional[AssetStore] = None, client: Optional[httpx.AsyncClient] = None):
+        self.asset_store = asset_store
+        self._client = client
+
+    async def stream(self, package: BrandPackage) -> AsyncIterator[bytes]:
+        sink = _StreamSink()
+        date_time = self._date_time(package.created_at)
+        failed: List[str] = []
+        names: Set[str] = set()
+
+        owns_client = False
+        client = self._client or (self.asset_store.client if self.asset_store else None)
+        if client is None:
+            client = httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0), follow_redirects=True)
+            owns_client = True
+
+        try:
+            with zipfile.ZipFile(sink, mode="w") as archive:
+                self._write_text(archive, "strategy.json", package.strategy.model_dump_json(indent=2), date_time)
+                self._write_text(archive, "strategy.md", strategy_markdown(package.strategy), date_time)
+                yield sink.drain()
+
+                for asset in package.assets:
+                    name = self._entry_name(asset, names)
+                    try:
+                        async with self._open_source(asset, client) as chunks:
+                            info = zipfile.ZipInfo(name, date_time=date_time)
+                            # Images and MP4 are already compressed; deflating them again only costs CPU
+                            info.compress_type = zipfile.ZIP_STORED
+                            with archive.open(info, "w", force_zip64=True) as entry:
+                                async for chunk in chunks:
+                                    entry.write(chunk)
+                                    yield sink.drain()
+                    except Exception as e:
+                        print(f"Export: could not include {asset.url}: {e}")
+                        self._drop_entry(archive, name)
+                        failed.append(f"{name}: {asset.url} ({e})")
+                    yield sink.drain()
+
+                if failed:
+                    self._write_text(archive, "MISSING.txt", "These assets could not be downloaded:\n" + "\n".join(failed) + "\n", date_time)
+            # Central directory, written when the archive closes
+            yield sink.drain()
+        finally:
+            if owns_client:
+                await client.aclose()
+
+    @asynccontextmanager
+    async def _open_source(self, asset: GeneratedAsset, client: httpx.AsyncClient):
+        """Async iterator over the asset's bytes, opened before its archive entry is created"""
+        digest = (asset.metadata or {}).get("sha256")
+        stored = self.asset_store.get(digest) if self.asset_store and digest else None
+        if stored is not None:
+            yield iter_file(stored.path, 0, stored.size - 1)
+            return
+
+        async with client.stream("GET", asset.url) as response:
+            response.raise_for_status()
+            yield response.aiter_bytes(CHUNK_SIZE)
+
+    def _drop_entry(self, archive: zipfile.ZipFile, name: str) -> None:
+        """Leave a partly streamed entry out of the central directory.
+
+        Its bytes have already been sent, but readers go by the central
+        directory, so they never see the truncated file.
+        """
+        info = archive.NameToInfo.pop(name, None)
+        if info is not None:
+            archive.filelist.remove(info)
+
+    def _write_text(self, archive: zipfile.ZipFile, name: str, text: str, date_time) -> None:
+        info = zipfile.ZipInfo(name, date_time=date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        archive.writestr(info, text.encode("utf-8"))
+
+    def _entry_name(self, asset: GeneratedAsset, used: Set[str]) -> str:
+        folder = ASSET_FOLDERS.get(asset.type, "other")
+        filename = re.sub(r"[^A-Za-z0-9._-]+", "_", asset.filename) or "asset"
+        stem, dot, extension = filename.rpartition(".")
+        if not dot:
+            stem, extension = filename, ""
+        name = f"{folder}/{filename}"
+        counter = 2
+        while name in used:
+            name = f"{folder}/{stem}_{counter}{dot}{extension}"
+            counter += 1
+        used.add(name)
+        return name
+
+    def _date_time(self, created_at: str):
+        try:
+            created = datetime.fromisoformat(created_at).replace(tzinfo=None)
+        except ValueError:
+            created = datetime.now()
+        # ZIP timestamps can't predate 1980
+        return max(created, datetime(1980, 1, 1)).timetuple()[:6]
+
+
+def export_filename(package: BrandPackage) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", package.strategy.company_name.lower()).strip("_") or "brand"
+    return f"{slug}_brand_package.zip"
@@ -0,0 +1,142 @@
+import asyncio
+from abc import ABC, abstractmethod
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+from models import BrandPackage
+
+
+class PackageStore(ABC):
+    """Interface for persisting finished brand packages.
+
+    Packages are looked up by id, or by their request_hash (the hash of the
+    request that produced them). Subclass this to plug in another backend.
+    """
+
+    @abstractmethod
+    async def save(self, package: BrandPackage) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, package_id: str) -> Optional[BrandPackage]:
+        ...
+
+    @abstractmethod
+    async def find_by_request_hash(self, request_hash: str) -> Optional[BrandPackage]:
+        """Most recent package generated for the request"""
+
+
+class MemoryPackageStore(PackageStore):
+    """Non-persistent store, useful for development"""
+
+    def __init__(self):
+        self.packages: Dict[str, BrandPackage] = {}
+        self.by_request: Dict[str, str] = {}
+
+    async def save(self, package: BrandPackage) -> None:
+        self.packages[package.id] = package
+        if package.request_hash:
+            self.by_request[package.request_hash] = package.id
+
+    async def get(self, package_id: str) -> Optional[BrandPackage]:
+        return self.packages.get(package_id)
+
+    async def find_by_request_hash(self, request_hash: str) -> Optional[BrandPackage]:
+        package_id = self.by_request.get(request_hash)
+        return self.packages.get(package_id) if package_id else None
+
+
+class SQLitePackageStore(PackageStore):
+    """SQLite-backed store; strategy, assets, stage timings and deadlines are kept as JSON columns"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS packages (
+                    id TEXT PRIMARY KEY,
+                    request_hash TEXT,
+                    created_at TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    generation_time_seconds INTEGER,
+                    strategy TEXT NOT NULL,
+                    assets TEXT NOT NULL,
+                    stage_timings TEXT,
+                    deadlines TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_packages_request_hash ON packages (request_hash, created_at);
+            """)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(packages)")}
+            if "deadlines" not in columns:
+                # Databases created before deadlines were recorded
+                self._conn.execute("ALTER TABLE packages ADD COLUMN deadlines TEXT")
+            self._conn.commit()
+
+    async def save(self, package: BrandPackage) -> None:
+        await asyncio.to_thread(self._save, package)
+
+    async def get(self, package_id: str) -> Optional[BrandPackage]:
+        return await asyncio.to_thread(self._fetch_one, "WHERE id = ?", (package_id,))
+
+    async def find_by_request_hash(self, request_hash: str) -> Optional[BrandPackage]:
+        return await asyncio.to_thread(
+            self._fetch_one, "WHERE request_hash = ? ORDER BY created_at DESC LIMIT 1", (request_hash,)
+        )
+
+    def _save(self, package: BrandPackage) -> None:
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO packages
+                   (id, request_hash, created_at, status, generation_time_seconds, strategy, assets, stage_timings,
+                    deadlines)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    package.id,
+                    package.request_hash,
+                    package.created_at,
+                    package.status,
+                    package.generation_time_seconds,
+                    package.strategy.model_dump_json(),
+                    json.dumps([asset.model_dump() for asset in package.assets]),
+                    json.dumps(package.stage_timings) if package.stage_timings is not None else None,
+                    json.dumps(package.deadlines) if package.deadlines is not None else None
+                )
+            )
+            self._conn.commit()
+
+    def _fetch_one(self, where: str, params: Tuple) -> Optional[BrandPackage]:
+        with self._lock:
+            row = self._conn.execute(
+                f"""SELECT id, request_hash, created_at, status, generation_time_seconds, strategy, assets, stage_timings, deadlines
+                    FROM packages {where}""",
+                params
+            ).fetchone()
+        if row is None:
+            return None
+
+        package_id, request_hash, created_at, status, generation_time, strategy, assets, stage_timings, deadlines = row
+        return BrandPackage(
+            id=package_id,
+            strategy=json.loads(strategy),
+            assets=json.loads(assets),
+            created_at=created_at,
+            status=status,
+            generation_time_seconds=generation_time,
+            stage_timings=json.loads(stage_timings) if stage_timings else None,
+            deadlines=json.loads(deadlines) if deadlines else None,
+            request_hash=request_hash
+        )
+
+
+def create_package_store() -> PackageStore:
+    """Build the store selected by PACKAGE_STORE (sqlite or memory)"""
+    backend = os.getenv("PACKAGE_STORE", "sqlite").lower()
+    if backend == "memory":
+        return MemoryPackageStore()
+    if backend == "sqlite":
+        return SQLitePackageStore(os.getenv("PACKAGE_STORE_PATH", "brand_packages.sqlite3"))
+    raise ValueError(f"Unknown PACKAGE_STORE backend: {backend}")
@@ -0,0 +1,111 @@
+import json
+from typing import Any, Dict, Optional
+
+WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """Pulls completed top-level fields out of a JSON object as its text arrives.
+
+    feed() scans only the new text, tracking string and nesting state, and
+    returns the fields whose values finished in that chunk. Anything before
+    the first "{" (such as a ``` fence) is skipped. The full text is kept in
+    `text` so the caller can still parse and validate the whole document.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.finished = False
+        # What the next top-level token is: "key", "colon", "value" or "comma"
+        self.expect = "key"
+        self.key: Optional[str] = None
+        self.token_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """Add text and return the top-level fields completed by it"""
+        self.text += chunk
+        completed: Dict[str, Any] = {}
+        text = self.text
+
+        while self.position < len(text) and not self.finished:
+            index = self.position
+            char = text[index]
+            self.position += 1
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self._end_token(index + 1, completed)
+                continue
+
+            if self.depth == 0:
+                if char == "{":
+                    self.depth = 1
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1:
+                    self.token_start = index
+            elif char in "{[":
+                if self.depth == 1:
+                    self.token_start = index
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 1:
+                    # End of the object; close any pending number/literal
+                    self._end_scalar(index, completed)
+                    self.finished = True
+                self.depth -= 1
+                if self.depth == 1:
+                    self._end_token(index + 1, completed)
+            elif self.depth == 1:
+                if char == ":":
+                    self.expect = "value"
+                elif char == ",":
+                    self._end_scalar(index, completed)
+                    self.expect = "key"
+                elif char not in WHITESPACE and self.expect == "value" and self.token_start is None:
+                    # Number, true, false or null
+                    self.token_start = index
+
+        return completed
+
+    def _end_token(self, end: int, completed: Dict[str, Any]) -> None:
+        """Close a string or container that just ended at the top level"""
+        if self.token_start is None:
+            return
+        raw = self.text[self.token_start:end]
+        self.token_start = None
+        if self.expect == "key":
+            self.key = json.loads(raw)
+            self.expect = "colon"
+        elif self.expect == "value":
+            self._store(raw, completed)
+
+    def _end_scalar(self, end: int, completed: Dict[str, Any]) -> None:
+        if self.expect == "value" and self.token_start is not None:
+            raw = self.text[self.token_start:end].strip()
+            self.token_start = None
+            self._store(raw, completed)
+
+    def _store(self, raw: str, completed: Dict[str, Any]) -> None:
+        self.expect = "comma"
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            # Leave malformed values to the final full parse
+            return
+        if self.key is not None:
+            self.fields[self.key] = value
+            completed[self.key] = value
@@ -0,0 +1,288 @@
+import asyncio
+import bisect
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+# (requests per second, burst size, max concurrent calls) per upstream model
+DEFAULT_LIMITS: Dict[str, Tuple[float, int, int]] = {
+    "fal-ai/flux/dev": (2.0, 4, 4),
+    "fal-ai/flux/schnell": (5.0, 10, 8),
+    "fal-ai/veo3": (0.2, 2, 2),
+    "gemini-2.5-pro": (2.0, 5, 8),
+    # Alternate while gemini-2.5-pro's circuit is open
+    "gemini-2.5-flash": (4.0, 10, 8),
+}
+FALLBACK_LIMIT: Tuple[float, int, int] = (2.0, 4, 4)
+
+# Priority classes, most urgent first
+PRIORITY_CLASSES = ["interactive", "standard", "bulk"]
+# Share of each model's concurrency reserved per class. A class under its share is
+# served first when a slot frees; idle reserved slots can be borrowed by any class.
+DEFAULT_PRIORITY_SHARES = {"interactive": 0.25, "standard": 0.5, "bulk": 0.25}
+# Upper bounds (seconds) of the queue-wait histogram buckets
+WAIT_BUCKETS = [0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0]
+
+_priority: ContextVar[str] = ContextVar("priority", default="standard")
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def priority_class(name: str) -> Iterator[None]:
+    """Run calls made in this context (and tasks started from it) at the given priority"""
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {name}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def set_priority(name: str) -> None:
+    """Set the priority for the rest of the current task"""
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {name}")
+    _priority.set(name)
+
+
+def parse_shares(value: str) -> Dict[str, float]:
+    """Parse "class=share,..." overrides"""
+    shares = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, share = item.split("=", 1)
+            shares[name.strip()] = float(share)
+    return shares
+
+
+def parse_limits(value: str) -> Dict[str, Tuple[float, int, int]]:
+    """Parse "model=rate:burst:concurrency,..." overrides"""
+    limits = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        model, spec = item.rsplit("=", 1)
+        rate, burst, concurrency = spec.split(":")
+        limits[model.strip()] = (float(rate), int(burst), int(concurrency))
+    return limits
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self) -> None:
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class WaitHistogram:
+    """Counts of queue waits per WAIT_BUCKETS bucket"""
+
+    def __init__(self):
+        self.counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.total = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        buckets = {f"le_{bound:g}": n for bound, n in zip(WAIT_BUCKETS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {"count": count, "avg_seconds": round(self.total / count, 3) if count else 0.0, "buckets": buckets}
+
+
+class PrioritySlots:
+    """Concurrency slots shared by priority classes.
+
+    Each class has a reserved share, but idle slots are never held back:
+    any class may borrow them, so a model nobody calls interactively still
+    runs at full concurrency. Reservations decide who is served next. A
+    free slot goes first to a waiting class still under its reservation,
+    then to whichever class has the best rank. A waiter's rank improves by
+    one class every aging_seconds, so bulk work is never starved. An
+    interactive call therefore jumps the queue and waits at most for the
+    next slot to free up.
+    """
+
+    def __init__(self, max_concurrency: int, shares: Dict[str, float], aging_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+        self.reserved = {name: max(1, int(max_concurrency * shares.get(name, 0))) if shares.get(name, 0) > 0 else 0
+                         for name in PRIORITY_CLASSES}
+        # Never reserve every slot for interactive calls
+        self.reserved["interactive"] = min(self.reserved["interactive"], max_concurrency - 1)
+        self.in_flight = {name: 0 for name in PRIORITY_CLASSES}
+        self.waiters: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {name: deque() for name in PRIORITY_CLASSES}
+
+    async def acquire(self, name: str) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[name].append((time.monotonic(), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled
+                self.release(name)
+            raise
+
+    def release(self, name: str) -> None:
+        self.in_flight[name] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while sum(self.in_flight.values()) < self.max_concurrency:
+            name = self._next_class()
+            if name is None:
+                return
+            _, future = self.waiters[name].popleft()
+            self.in_flight[name] += 1
+            future.set_result(None)
+
+    def _next_class(self) -> Optional[str]:
+        now = time.monotonic()
+        candidates: List[Tuple[bool, float, float, str]] = []
+        for rank, name in enumerate(PRIORITY_CLASSES):
+            queue = self.waiters[name]
+            while queue and queue[0][1].done():
+                # Cancelled waiters
+                queue.popleft()
+            if not queue:
+                continue
+            enqueued = queue[0][0]
+            aged_rank = rank - (now - enqueued) / self.aging_seconds
+            under_reservation = self.in_flight[name] < self.reserved[name]
+            candidates.append((not under_reservation, aged_rank, enqueued, name))
+        return min(candidates)[3] if candidates else None
+
+    def queued(self, name: str) -> int:
+        return sum(1 for _, future in self.waiters[name] if not future.done())
+
+
+class ModelLimiter:
+    """Token bucket plus a priority-aware concurrency cap for one upstream model"""
+
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int,
+                 shares: Optional[Dict[str, float]] = None, aging_seconds: float = 30.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = PrioritySlots(max_concurrency, shares or DEFAULT_PRIORITY_SHARES, aging_seconds)
+        self.max_concurrency = max_concurrency
+        self.queued = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.wait_histograms = {name: WaitHistogram() for name in PRIORITY_CLASSES}
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None) -> AsyncIterator[None]:
+        """Wait for a concurrency slot and a rate token, then hold the slot"""
+        priority = priority or current_priority()
+        started = time.monotonic()
+        self.queued += 1
+        try:
+            await self.slots.acquire(priority)
+            try:
+                await self.bucket.take()
+            except BaseException:
+                self.slots.release(priority)
+                raise
+        finally:
+            self.queued -= 1
+
+        wait = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.wait_histograms[priority].record(wait)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.slots.release(priority)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": self.bucket.rate,
+            "acquired": self.acquired,
+            "avg_wait_seconds": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+            "classes": {
+                name: {
+                    "reserved": self.slots.reserved[name],
+                    "in_flight": self.slots.in_flight[name],
+                    "queued": self.slots.queued(name),
+                    "wait": self.wait_histograms[name].stats()
+                }
+                for name in PRIORITY_CLASSES
+            }
+        }
+
+
+class RateLimiter:
+    """Process-wide registry of per-model limiters"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int, int]]] = None,
+                 shares: Optional[Dict[str, float]] = None, aging_seconds: Optional[float] = None):
+        if limits is None:
+            limits = {**DEFAULT_LIMITS, **parse_limits(os.getenv("RATE_LIMITS", ""))}
+        if shares is None:
+            shares = {**DEFAULT_PRIORITY_SHARES, **parse_shares(os.getenv("PRIORITY_SHARES", ""))}
+        if aging_seconds is None:
+            aging_seconds = float(os.getenv("PRIORITY_AGING_SECONDS", "30"))
+        self.limits = limits
+        self.shares = shares
+        self.aging_seconds = aging_seconds
+        self.limiters: Dict[str, ModelLimiter] = {}
+
+    def limiter(self, model: str) -> ModelLimiter:
+        if model not in self.limiters:
+            rate, burst, concurrency = self.limits.get(model, FALLBACK_LIMIT)
+            self.limiters[model] = ModelLimiter(model, rate, burst, concurrency, self.shares, self.aging_seconds)
+        return self.limiters[model]
+
+    def limit(self, model: str, priority: Optional[str] = None):
+        """Context manager holding a slot for one call to `model`, at the current priority by default"""
+        return self.limiter(model).slot(priority)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+_shared_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Rate limiter shared by every FAL and Gemini call in the process"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = RateLimiter()
+    return _shared_limiter
@@ -0,0 +1,168 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+# call(primary, started): primary is False for hedged duplicates; started() is called once
+# the request actually goes upstream, after any wait for a local rate limiter slot
+Call = Callable[[bool, Callable[[], None]], Awaitable[Any]]
+
+# Latency samples needed before the observed p95 replaces the configured hedge delay
+MIN_HEDGE_SAMPLES = 20
+
+
+class RetryPolicy:
+    """Retry and hedging settings for one endpoint.
+
+    Retries use exponential backoff with full jitter. When hedge is set, a
+    duplicate request is sent if the first hasn't finished by the endpoint's
+    p95 latency, and whichever finishes first wins. Only worth it for cheap,
+    fast endpoints. Latency and the hedge delay are measured from when the
+    request goes upstream, so time queued for a local slot doesn't count.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 10.0,
+                 hedge: bool = False, hedge_delay: float = 5.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+DEFAULT_POLICIES: Dict[str, RetryPolicy] = {
+    "fal-ai/flux/dev": RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=8.0),
+    "fal-ai/flux/schnell": RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4.0, hedge=True, hedge_delay=6.0),
+    # Veo3 is slow and expensive: one retry, never hedged
+    "fal-ai/veo3": RetryPolicy(max_attempts=2, base_delay=5.0, max_delay=30.0),
+}
+FALLBACK_POLICY = RetryPolicy(max_attempts=2, base_delay=1.0, max_delay=8.0)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Retry network errors, timeouts, 408/429 and 5xx; not other client errors"""
+    if getattr(error, "retryable", True) is False:
+        return False
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 429) or status >= 500
+    return not isinstance(error, (ValueError, TypeError, KeyError))
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one endpoint"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self.samples) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class RetryExecutor:
+    """Runs calls under per-endpoint retry and hedging policies"""
+
+    def __init__(self, policies: Optional[Dict[str, RetryPolicy]] = None, hedging_enabled: bool = True):
+        self.policies = policies if policies is not None else dict(DEFAULT_POLICIES)
+        self.hedging_enabled = hedging_enabled
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def policy(self, endpoint: str) -> RetryPolicy:
+        return self.policies.get(endpoint, FALLBACK_POLICY)
+
+    def _count(self, endpoint: str, name: str) -> None:
+        counters = self.counters.setdefault(endpoint, {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0})
+        counters[name] += 1
+
+    async def run(self, endpoint: str, call: Call) -> Any:
+        """Run call(True, started) with retries; call(False, started) is used for hedged duplicates"""
+        policy = self.policy(endpoint)
+        self._count(endpoint, "calls")
+
+        for attempt in range(1, policy.max_attempts + 1):
+            try:
+                if policy.hedge and self.hedging_enabled:
+                    return await self._hedged(endpoint, policy, call)
+                return await self._timed(endpoint, call, True)
+            except Exception as e:
+                if attempt >= policy.max_attempts or not is_retryable(e):
+                    self._count(endpoint, "failures")
+                    raise
+                delay = policy.backoff(attempt)
+                print(f"{endpoint} attempt {attempt} failed ({e}); retrying in {delay:.1f}s")
+                self._count(endpoint, "retries")
+                await asyncio.sleep(delay)
+
+    async def _timed(self, endpoint: str, call: Call, primary: bool,
+                     upstream: Optional[asyncio.Event] = None) -> Any:
+        """Run one call, recording its upstream latency; upstream is set once the request is sent"""
+        started_at: Optional[float] = None
+
+        def started() -> None:
+            nonlocal started_at
+            started_at = time.monotonic()
+            if upstream is not None:
+                upstream.set()
+
+        result = await call(primary, started)
+        if started_at is not None:
+            self.latencies.setdefault(endpoint, LatencyTracker()).record(time.monotonic() - started_at)
+        return result
+
+    async def _hedged(self, endpoint: str, policy: RetryPolicy, call: Call) -> Any:
+        tracker = self.latencies.setdefault(endpoint, LatencyTracker())
+        delay = tracker.p95() or policy.hedge_delay
+
+        upstream = asyncio.Event()
+        primary = asyncio.create_task(self._timed(endpoint, call, True, upstream))
+        pending = {primary}
+        try:
+            # While the primary is queued for a local slot a duplicate would only queue behind it
+            sent = asyncio.create_task(upstream.wait())
+            try:
+                await asyncio.wait({primary, sent}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                sent.cancel()
+            if not primary.done():
+                await asyncio.wait(pending, timeout=delay)
+            if primary.done():
+                return primary.result()
+
+            self._count(endpoint, "hedges")
+            hedge = asyncio.create_task(self._timed(endpoint, call, False))
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count(endpoint, "hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also reached when the caller is cancelled, so no job is left running unobserved
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        for endpoint, counters in self.counters.items():
+            tracker = self.latencies.get(endpoint)
+            p95 = tracker.p95() if tracker else None
+            stats[endpoint] = {**counters, "p95_seconds": round(p95, 3) if p95 is not None else None}
+        return stats
@@ -0,0 +1,74 @@
+import os
+from typing import Any, Callable, Dict, Optional
+import pydantic_core
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional speedup; pydantic-core is always available
+    orjson = None
+
+Serializer = Callable[[Any], bytes]
+
+
+def pydantic_dumps(obj: Any) -> bytes:
+    """Serialize straight to bytes with pydantic-core, no intermediate str"""
+    if isinstance(obj, BaseModel):
+        return obj.__pydantic_serializer__.to_json(obj)
+    return pydantic_core.to_json(obj)
+
+
+def orjson_dumps(obj: Any) -> bytes:
+    """Serialize with orjson; models are dumped to python objects first"""
+    if isinstance(obj, BaseModel):
+        obj = obj.model_dump()
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def auto_dumps(obj: Any) -> bytes:
+    """pydantic-core for models, orjson (when installed) for plain data.
+
+    Dumping a model to python objects for orjson costs more than orjson
+    saves; see benchmark_serialization.py.
+    """
+    if orjson is None or isinstance(obj, BaseModel):
+        return pydantic_dumps(obj)
+    return orjson_dumps(obj)
+
+
+SERIALIZERS: Dict[str, Serializer] = {"auto": auto_dumps, "pydantic": pydantic_dumps}
+if orjson is not None:
+    SERIALIZERS["orjson"] = orjson_dumps
+
+
+def get_serializer(name: Optional[str] = None) -> Serializer:
+    """Serializer by name: "auto" (picked per payload type), "orjson" or "pydantic" """
+    name = name or os.getenv("JSON_SERIALIZER", "auto")
+    if name not in SERIALIZERS:
+        print(f"Unknown or unavailable JSON_SERIALIZER '{name}', using pydantic")
+        name = "pydantic"
+    return SERIALIZERS[name]
+
+
+_active: Optional[Serializer] = None
+
+def dumps(obj: Any) -> bytes:
+    """Serialize with the configured serializer"""
+    global _active
+    if _active is None:
+        _active = get_serializer()
+    return _active(obj)
+
+
+class JSONBytesResponse(Response):
+    """JSON response rendered by the fast serializer.
+
+    Return it directly from a route to skip FastAPI's jsonable_encoder pass.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
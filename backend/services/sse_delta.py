@@ -0,0 +1,80 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# (event type, payload) pairs produced for one progress update
+Frames = List[Tuple[str, Dict[str, Any]]]
+
+TOP_LEVEL_FIELDS = ["package_id", "overall_progress", "current_agent", "message", "completed", "partial_strategy"]
+AGENT_FIELDS = ["agent_name", "status", "progress", "message"]
+
+
+class DeltaEncoder:
+    """Encodes a stream of ProgressUpdate dicts as a snapshot followed by deltas.
+
+    The first update becomes a "snapshot" event with every small field.
+    Later updates become "delta" events carrying only what changed, with
+    agents keyed by their index. Large payloads (an agent's result or the
+    final package) are left out of both and sent once as "result" or
+    "package" events, and each new preview asset (a logo draft, then the
+    final logo in the same slot) as an "asset" event. One encoder is used
+    per client connection.
+    """
+
+    def __init__(self):
+        self.previous: Optional[Dict[str, Any]] = None
+        self.sent_results: Dict[int, Any] = {}
+        self.sent_assets: Dict[str, Any] = {}
+
+    def encode(self, update: Dict[str, Any]) -> Frames:
+        frames: Frames = []
+
+        for index, agent in enumerate(update.get("agents", [])):
+            result = agent.get("result")
+            if result is None:
+                continue
+            # Dict comparison is far cheaper than re-serializing the result
+            if self.sent_results.get(index) != result:
+                self.sent_results[index] = result
+                frames.append(("result", {"agent": index, "agent_name": agent["agent_name"], "result": result}))
+
+        for slot, asset in (update.get("preview_assets") or {}).items():
+            if self.sent_assets.get(slot) != asset:
+                self.sent_assets[slot] = asset
+                frames.append(("asset", {"slot": slot, "asset": asset}))
+
+        if self.previous is None:
+            frames.append(("snapshot", self._small_fields(update)))
+        else:
+            delta = self._diff(self.previous, update)
+            if delta:
+                frames.append(("delta", delta))
+
+        if update.get("result") is not None:
+            frames.append(("package", {"result": update["result"]}))
+
+        self.previous = update
+        return frames
+
+    def _small_fields(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        snapshot = {field: update.get(field) for field in TOP_LEVEL_FIELDS}
+        snapshot["agents"] = [
+            {field: agent.get(field) for field in AGENT_FIELDS} for agent in update.get("agents", [])
+        ]
+        return snapshot
+
+    def _diff(self, previous: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+        delta: Dict[str, Any] = {
+            field: update.get(field) for field in TOP_LEVEL_FIELDS
+            if update.get(field) != previous.get(field)
+        }
+
+        old_agents = previous.get("agents", [])
+        agents: Dict[str, Dict[str, Any]] = {}
+        for index, agent in enumerate(update.get("agents", [])):
+            old = old_agents[index] if index < len(old_agents) else {}
+            changed = {field: agent.get(field) for field in AGENT_FIELDS if agent.get(field) != old.get(field)}
+            if changed:
+                agents[str(index)] = changed
+        if agents:
+            delta["agents"] = agents
+
+        return delta
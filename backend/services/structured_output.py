@@ -0,0 +1,114 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from services.gemini_service import generate_content
+from services.partial_json import IncrementalJSONParser
+
+T = TypeVar("T", bound=BaseModel)
+
+# JSON Schema keys Gemini's response_schema understands
+SCHEMA_KEYS = {"type", "format", "description", "nullable", "enum", "properties", "required", "items"}
+
+
+def gemini_schema(model_cls: Type[BaseModel], fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Gemini response_schema derived from a pydantic model, optionally limited to some fields"""
+    schema = model_cls.model_json_schema()
+    converted = _convert(schema, schema.get("$defs", {}))
+    if fields is not None:
+        converted["properties"] = {name: converted["properties"][name] for name in fields}
+        converted["required"] = [name for name in converted.get("required", []) if name in fields]
+    return converted
+
+
+def _convert(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        node = {**defs[node["$ref"].split("/")[-1]], **{k: v for k, v in node.items() if k != "$ref"}}
+    if "anyOf" in node:
+        # Optional[X] becomes X with nullable set
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        merged = {**_convert(options[0], defs), **{k: v for k, v in node.items() if k != "anyOf"}}
+        merged["nullable"] = len(options) < len(node["anyOf"])
+        node = merged
+
+    converted = {key: value for key, value in node.items() if key in SCHEMA_KEYS}
+    if "properties" in converted:
+        converted["properties"] = {name: _convert(prop, defs) for name, prop in converted["properties"].items()}
+    if "items" in converted:
+        converted["items"] = _convert(converted["items"], defs)
+    return converted
+
+
+def json_config(model_cls: Optional[Type[BaseModel]] = None, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """generation_config for JSON mode, constrained to model_cls's schema when given"""
+    config: Dict[str, Any] = {"response_mime_type": "application/json"}
+    if model_cls is not None:
+        config["response_schema"] = gemini_schema(model_cls, fields)
+    return config
+
+
+def repair_json(text: str) -> Dict[str, Any]:
+    """Parse a JSON object, salvaging what it can from fenced, truncated or trailing-garbage output.
+
+    Falls back to the incremental parser, which skips anything before the
+    first "{", stops at the closing "}" and keeps every top-level field that
+    was complete, so a truncated response only loses its last field.
+    """
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data
+    except json.JSONDecodeError:
+        pass
+
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    if not parser.fields:
+        raise ValueError(f"No JSON object found in response ({len(text)} chars)")
+    if not parser.finished:
+        print(f"Repaired truncated JSON response; kept {len(parser.fields)} complete fields")
+    return parser.fields
+
+
+def invalid_fields(model_cls: Type[BaseModel], data: Dict[str, Any]) -> List[str]:
+    """Top-level fields that are missing or fail validation"""
+    try:
+        model_cls.model_validate(data)
+        return []
+    except ValidationError as e:
+        names: List[str] = []
+        for error in e.errors():
+            name = str(error["loc"][0]) if error["loc"] else ""
+            if name and name not in names:
+                names.append(name)
+        return names
+
+
+async def complete_fields(model: Any, prompt: str, model_cls: Type[T], data: Dict[str, Any],
+                          max_rounds: int = 2) -> T:
+    """Validate data as model_cls, re-asking Gemini only for fields that are missing or invalid"""
+    for round_number in range(max_rounds + 1):
+        missing = invalid_fields(model_cls, data)
+        if not missing:
+            return model_cls.model_validate(data)
+        if round_number == max_rounds:
+            break
+
+        print(f"Re-asking Gemini for {model_cls.__name__} fields: {', '.join(missing)}")
+        for name in missing:
+            data.pop(name, None)
+        follow_up = f"""{prompt}
+
+        An earlier answer already settled these fields; stay consistent with them:
+        {json.dumps(data, indent=2)}
+
+        Respond with a JSON object containing only these fields: {', '.join(missing)}"""
+
+        try:
+            response = await generate_content(model, follow_up, generation_config=json_config(model_cls, missing))
+            extra = repair_json(response.text)
+        except Exception as e:
+            print(f"Follow-up for missing fields failed: {e}")
+            continue
+        data.update({name: value for name, value in extra.items() if name in missing})
+
+    raise ValueError(f"{model_cls.__name__} still invalid after repair: {', '.join(missing)}")
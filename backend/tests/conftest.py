@@ -0,0 +1,75 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Set, Tuple
+import pytest
+from models import BrandStrategy
+
+# Tests import modules the way main.py does, relative to backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def strategy() -> BrandStrategy:
+    """Minimal valid strategy for tests that only need brand context"""
+    return BrandStrategy(
+        company_name="Acme", tagline="Tag", positioning_statement="Pos", industry="Tools", target_audience="Makers",
+        unique_value_proposition="Fast", competitive_advantage="Cheap", brand_personality=["bold"],
+        brand_archetype="Hero", brand_story="Story", color_scheme={"primary": "#000000"}, logo_style="minimal",
+        visual_elements=["circle"]
+    )
+
+
+class StandInUpstream:
+    """Local HTTP server standing in for the FAL CDN.
+
+    Serves the bytes registered in `files` by path, 404 for anything else,
+    and counts requests per path. Paths in `truncated` drop the connection
+    halfway through the body.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, Tuple[bytes, str]] = {}
+        self.requests: Dict[str, int] = {}
+        self.truncated: Set[str] = set()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests[self.path] = upstream.requests.get(self.path, 0) + 1
+                if self.path not in upstream.files:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, content_type = upstream.files[self.path]
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.path in upstream.truncated:
+                    self.wfile.write(body[:len(body) // 2])
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+
+@pytest.fixture
+def upstream() -> Iterator[StandInUpstream]:
+    server = StandInUpstream()
+    server.thread.start()
+    try:
+        yield server
+    finally:
+        server.server.shutdown()
+        server.server.server_close()
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.routes import router
+from models import GeneratedAsset
+from services.asset_store import AssetStore, create_asset_store, parse_range
+from services.container import ServiceContainer
+from services.job_manager import JobManager
+from services.package_store import MemoryPackageStore
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def with_store(root, func, public_url=""):
+    store = AssetStore(str(root), public_url=public_url)
+    try:
+        return await func(store)
+    finally:
+        await store.aclose()
+
+
+def test_mirror_stores_by_sha256(tmp_path, upstream):
+    upstream.files["/logo.png"] = (PNG, "image/png")
+
+    async def mirror(store):
+        digest = await store.mirror(upstream.url("/logo.png"))
+        return digest, store.get(digest)
+
+    digest, stored = run(with_store(tmp_path, mirror))
+    assert digest == hashlib.sha256(PNG).hexdigest()
+    assert stored.size == len(PNG)
+    assert stored.content_type == "image/png"
+    assert stored.etag == f'"{digest}"'
+    with open(stored.path, "rb") as f:
+        assert f.read() == PNG
+
+
+def test_concurrent_mirrors_of_one_url_share_a_download(tmp_path, upstream):
+    upstream.files["/video.mp4"] = (PNG * 10, "video/mp4")
+
+    async def mirror_twice(store):
+        url = upstream.url("/video.mp4")
+        return await asyncio.gather(store.mirror(url), store.mirror(url))
+
+    first, second = run(with_store(tmp_path, mirror_twice))
+    assert first == second
+    assert upstream.requests["/video.mp4"] == 1
+
+
+def test_mirror_asset_points_at_local_copy(tmp_path, upstream):
+    upstream.files["/logo.png"] = (PNG, "image/png")
+    asset = GeneratedAsset(type="logo", url=upstream.url("/logo.png"), filename="logo.png", metadata={"model": "flux-dev"})
+
+    mirrored = run(with_store(tmp_path, lambda store: store.mirror_asset(asset)))
+    digest = hashlib.sha256(PNG).hexdigest()
+    assert mirrored.url == f"/api/assets/{digest}"
+    assert mirrored.metadata == {"model": "flux-dev", "source_url": asset.url, "sha256": digest}
+
+    absolute = run(with_store(tmp_path, lambda store: store.mirror_asset(asset), public_url="https://api.example.com/"))
+    assert absolute.url == f"https://api.example.com/api/assets/{digest}"
+
+
+def test_mirror_asset_keeps_unmirrorable_assets(tmp_path, upstream):
+    missing = GeneratedAsset(type="logo", url=upstream.url("/gone.png"), filename="logo.png")
+    placeholder = GeneratedAsset(type="logo", url=upstream.url("/logo.png"), filename="logo.png", metadata={"error": "boom"})
+
+    async def mirror(store):
+        results = await store.mirror_assets([missing, placeholder])
+        return results, store.failures
+
+    (kept_missing, kept_placeholder), failures = run(with_store(tmp_path, mirror))
+    assert kept_missing == missing
+    assert kept_placeholder == placeholder
+    assert failures == 1
+    # Placeholders are never fetched
+    assert "/logo.png" not in upstream.requests
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("items=0-5", None),
+    ("bytes=0-1,5-9", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=50-10", "bytes=-0", "bytes=abc-"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+@pytest.fixture
+def asset_client(tmp_path, upstream):
+    upstream.files["/logo.png"] = (PNG, "image/png")
+    digest = run(with_store(tmp_path, lambda store: store.mirror(upstream.url("/logo.png"))))
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.state.services = ServiceContainer(package_store=MemoryPackageStore(), job_manager=JobManager(),
+                                          asset_store=AssetStore(str(tmp_path)))
+    with TestClient(app) as client:
+        yield client, digest
+
+
+def test_get_asset_serves_full_body(asset_client):
+    client, digest = asset_client
+    response = client.get(f"/api/assets/{digest}")
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"] == f'"{digest}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_get_asset_range(asset_client):
+    client, digest = asset_client
+    response = client.get(f"/api/assets/{digest}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == PNG[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(PNG)}"
+    assert response.headers["content-length"] == "10"
+
+
+def test_get_asset_unsatisfiable_range(asset_client):
+    client, digest = asset_client
+    response = client.get(f"/api/assets/{digest}", headers={"Range": f"bytes={len(PNG)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(PNG)}"
+
+
+def test_get_asset_if_range_mismatch_serves_full_body(asset_client):
+    client, digest = asset_client
+    response = client.get(f"/api/assets/{digest}", headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == PNG
+
+
+def test_get_asset_not_modified(asset_client):
+    client, digest = asset_client
+    response = client.get(f"/api/assets/{digest}", headers={"If-None-Match": f'"other", "{digest}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == f'"{digest}"'
+
+
+def test_get_asset_unknown_digest(asset_client):
+    client, _ = asset_client
+    assert client.get("/api/assets/" + "0" * 64).status_code == 404
+    assert client.get("/api/assets/not-a-digest").status_code == 404
+
+
+def test_mirroring_needs_an_absolute_public_url(tmp_path, monkeypatch):
+    monkeypatch.setenv("ASSET_STORE_DIR", str(tmp_path))
+    monkeypatch.delenv("ASSET_MIRROR_ENABLED", raising=False)
+    for value in ("", "/api"):
+        monkeypatch.setenv("ASSET_PUBLIC_URL", value)
+        assert create_asset_store() is None
+
+    monkeypatch.setenv("ASSET_PUBLIC_URL", "https://api.example.com/")
+    store = create_asset_store()
+    assert store.url_for("abc") == "https://api.example.com/api/assets/abc"
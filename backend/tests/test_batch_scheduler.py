@@ -0,0 +1,117 @@
+import asyncio
+from typing import List
+from models import BrandPackage, GeneratedAsset, ProgressUpdate
+from services.batch_scheduler import BatchRun, BatchScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def update(message: str, completed: bool = False, result=None) -> ProgressUpdate:
+    return ProgressUpdate(package_id=f"pkg-{message}", overall_progress=100 if completed else 50,
+                          current_agent="Brand Director", agents=[], message=message, completed=completed, result=result)
+
+
+def test_slots_rotate_between_batches():
+    order: List[str] = []
+
+    async def item(scheduler: BatchScheduler, name: str):
+        async with scheduler.slot(name[0]):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        scheduler = BatchScheduler(max_concurrency=1)
+        names = ["a1", "a2", "a3", "a4", "b1", "b2"]
+        await asyncio.gather(*(item(scheduler, name) for name in names))
+        return scheduler.stats()
+
+    stats = run(scenario())
+    # The large batch queued first, but the small one gets every other slot
+    assert order == ["a1", "a2", "b1", "a3", "b2", "a4"]
+    assert stats["active"] == 0
+    assert stats["waiting_items"] == 0
+
+
+def test_cancelled_waiters_give_up_their_place():
+    async def scenario():
+        scheduler = BatchScheduler(max_concurrency=1)
+        release = asyncio.Event()
+        order: List[str] = []
+
+        async def item(batch_id: str, name: str, hold: bool = False):
+            async with scheduler.slot(batch_id):
+                order.append(name)
+                if hold:
+                    await release.wait()
+
+        holder = asyncio.create_task(item("a", "a1", hold=True))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(item("b", "b1"))
+        waiter = asyncio.create_task(item("c", "c1"))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["waiting_items"] == 2
+
+        cancelled.cancel()
+        release.set()
+        await asyncio.gather(holder, waiter, cancelled, return_exceptions=True)
+        return order, scheduler.stats()
+
+    order, stats = run(scenario())
+    assert order == ["a1", "c1"]
+    assert stats["active"] == 0
+    assert stats["waiting_batches"] == 0
+
+
+def test_batch_run_merges_events_and_summarizes(strategy):
+    package = BrandPackage(id="pkg", strategy=strategy, created_at="2025-01-01T00:00:00", status="completed",
+                           assets=[GeneratedAsset(type="logo", url="https://x/logo.png", filename="logo.png")] * 2)
+
+    async def run_item(request: str):
+        yield update(request)
+        if request == "ok":
+            yield update(request, completed=True, result=package)
+        elif request == "failed":
+            yield update("Generation failed", completed=True)
+        elif request == "raises":
+            raise RuntimeError("upstream down")
+
+    async def scenario():
+        batch = BatchRun(["ok", "failed", "raises", "silent"], run_item, BatchScheduler(max_concurrency=2))
+        events = [(index, event.message) async for index, event in batch.events()]
+        return events, batch.summary()
+
+    events, summary = run(scenario())
+
+    assert sorted(events) == [(0, "ok"), (0, "ok"), (1, "Generation failed"), (1, "failed"), (2, "raises"), (3, "silent")]
+    assert (summary["items"], summary["completed"], summary["failed"]) == (4, 1, 3)
+    assert summary["assets_generated"] == 2
+    results = summary["results"]
+    assert [item["status"] for item in results] == ["completed", "failed", "failed", "failed"]
+    assert results[0]["package_id"] == "pkg-ok"
+    assert results[1]["error"] == "Generation failed"
+    assert results[2]["error"] == "upstream down"
+    assert results[3]["error"] == "Generation ended without a result"
+    # Items that raised never recorded a duration
+    assert results[2]["seconds"] is None
+    assert summary["p50_item_seconds"] is not None
+    assert summary["items_per_minute"] > 0
+
+
+def test_batch_run_cancels_items_when_the_client_leaves():
+    async def run_item(request: str):
+        yield update(request)
+        await asyncio.sleep(60)
+
+    async def scenario():
+        scheduler = BatchScheduler(max_concurrency=1)
+        batch = BatchRun(["first", "second"], run_item, scheduler)
+        events = batch.events()
+        await events.__anext__()
+        await events.aclose()
+        return batch.summary(), scheduler.stats()
+
+    summary, stats = run(scenario())
+    assert [item["status"] for item in summary["results"]] == ["cancelled", "cancelled"]
+    assert stats["active"] == 0
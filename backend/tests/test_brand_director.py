@@ -0,0 +1,72 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+from agents.brand_director import BrandDirector, create_strategy_cache
+from models import BrandStrategy
+from services.fal_service import LOGO_PROMPT_FIELDS
+from services.structured_output import json_config
+
+
+def test_prompt_asks_for_the_logo_fields_first():
+    prompt = BrandDirector(model=object()).system_prompt
+    order = [name for name in re.findall(r'^\s*"(\w+)":', prompt, re.MULTILINE) if name in BrandStrategy.model_fields]
+    assert set(order[:len(LOGO_PROMPT_FIELDS) + 1]) == set(LOGO_PROMPT_FIELDS) | {"tagline"}
+
+
+def test_fallback_keeps_streamed_fields_and_name():
+    director = BrandDirector(model=object())
+    strategy = director.fallback_strategy("A tool for bakers", {
+        "company_name": "Crumb",
+        "color_scheme": {"primary": "#111111", "secondary": "#222222", "accent": "#333333"},
+        "brand_personality": "warm",  # not a list, so the generic value is kept
+    })
+
+    assert strategy.company_name == "Crumb"
+    assert strategy.color_scheme["primary"] == "#111111"
+    assert strategy.brand_personality == director.fallback_strategy("A tool for bakers").brand_personality
+    assert "StartupCo" not in strategy.model_dump_json()
+    assert strategy.domain_suggestions[0] == "crumb.com"
+
+
+class StreamingModel:
+    """Stands in for a GenerativeModel, streaming a canned strategy in small chunks"""
+
+    model_name = "models/strategy-test"
+
+    def __init__(self, strategy: dict):
+        self.text = json.dumps(strategy)
+        self.calls = []
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls.append({"stream": stream, **kwargs})
+        return [SimpleNamespace(text=self.text[i:i + 40]) for i in range(0, len(self.text), 40)]
+
+
+def test_streamed_strategy_is_schema_constrained_and_coerced():
+    streamed = BrandDirector(model=object()).fallback_strategy("A tool for bakers").model_dump()
+    streamed["target_audience"] = {"description": "Home bakers", "age": "25-45"}
+    streamed["color_scheme"] = {**streamed["color_scheme"], "rationale": "Warm and inviting"}
+    model = StreamingModel(streamed)
+    partials = []
+
+    strategy = asyncio.run(BrandDirector(model=model, streaming=True).analyze_startup_idea(
+        "A tool for bakers", bypass_cache=True, on_partial=partials.append))
+
+    assert model.calls[0]["stream"] is True
+    assert model.calls[0]["generation_config"] == json_config(BrandStrategy)
+    assert strategy.target_audience == "Home bakers"
+    assert "rationale" not in strategy.color_scheme
+    assert partials[-1]["company_name"] == strategy.company_name
+
+
+def test_directors_sharing_a_cache_reuse_each_others_strategies():
+    cache = create_strategy_cache()
+    strategy = BrandDirector(model=object()).fallback_strategy("A tool for bakers")
+    model = StreamingModel(strategy.model_dump())
+
+    first = BrandDirector(model=model, streaming=True, strategy_cache=cache)
+    second = BrandDirector(model=model, streaming=True, strategy_cache=cache)
+    asyncio.run(first.analyze_startup_idea("A tool for bakers"))
+    assert asyncio.run(second.analyze_startup_idea("A tool for bakers")) == strategy
+    assert len(model.calls) == 1
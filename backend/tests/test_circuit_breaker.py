@@ -0,0 +1,136 @@
+import asyncio
+import time
+import pytest
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from services.retry_policy import is_retryable
+
+
+async def call(breaker: CircuitBreaker, error: BaseException = None, seconds: float = 0.0):
+    async with breaker.guard():
+        if seconds:
+            await asyncio.sleep(seconds)
+        if error is not None:
+            raise error
+
+
+async def fail(breaker: CircuitBreaker, times: int = 1):
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            await call(breaker, ConnectionError("upstream down"))
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    async def scenario():
+        breaker = CircuitBreaker("veo", failure_threshold=2, reset_seconds=60)
+        await fail(breaker)
+        assert breaker.state == CLOSED
+        await fail(breaker)
+        assert breaker.state == OPEN
+
+        started = time.monotonic()
+        with pytest.raises(CircuitOpenError):
+            await call(breaker)
+        assert time.monotonic() - started < 0.05
+        assert breaker.rejected == 1
+
+    asyncio.run(scenario())
+
+
+def test_success_resets_the_failure_count():
+    async def scenario():
+        breaker = CircuitBreaker("veo", failure_threshold=2, reset_seconds=60)
+        await fail(breaker)
+        await call(breaker)
+        await fail(breaker)
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_half_open_lets_one_trial_through():
+    async def scenario():
+        breaker = CircuitBreaker("veo", failure_threshold=1, reset_seconds=0.05)
+        await fail(breaker)
+        await asyncio.sleep(0.06)
+        assert breaker.stats()["state"] == HALF_OPEN
+
+        # A failed trial reopens the breaker
+        await fail(breaker)
+        assert breaker.state == OPEN
+        await asyncio.sleep(0.06)
+
+        trial = asyncio.create_task(call(breaker, seconds=0.05))
+        await asyncio.sleep(0.01)
+        with pytest.raises(CircuitOpenError):
+            await call(breaker)
+        await trial
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_client_errors_do_not_count():
+    async def scenario():
+        breaker = CircuitBreaker("gemini", failure_threshold=1)
+        with pytest.raises(ValueError):
+            await call(breaker, ValueError("bad prompt"))
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_slow_call_times_out_as_a_failure():
+    async def scenario():
+        breaker = CircuitBreaker("veo", failure_threshold=1, call_timeout=0.05)
+        with pytest.raises(TimeoutError):
+            await call(breaker, seconds=1)
+        assert breaker.state == OPEN
+        assert "TimeoutError" in breaker.last_error
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_at_caller_deadline_is_neutral():
+    async def scenario():
+        breaker = CircuitBreaker("veo", failure_threshold=1)
+        for _ in range(3):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(call(breaker, seconds=1), timeout=0.02)
+        assert breaker.state == CLOSED
+        assert breaker.failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_check_fails_fast_without_claiming_the_trial():
+    async def scenario():
+        breaker = CircuitBreaker("veo", failure_threshold=1, reset_seconds=0.05)
+        await fail(breaker)
+        with pytest.raises(CircuitOpenError) as rejected:
+            breaker.check()
+        assert not is_retryable(rejected.value)
+
+        await asyncio.sleep(0.06)
+        breaker.check()
+        breaker.check()
+        await call(breaker)
+        assert breaker.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_plain_cancellation_is_neutral_and_frees_the_trial():
+    async def scenario():
+        breaker = CircuitBreaker("veo", failure_threshold=1, reset_seconds=0.05)
+        await fail(breaker)
+        await asyncio.sleep(0.06)
+
+        trial = asyncio.create_task(call(breaker, seconds=1))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert breaker.state == HALF_OPEN
+        assert breaker.available()
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from agents.creative_brief import CreativeBriefWriter
+
+SCRIPT = {
+    "hook": "Hook", "problem_visualization": "Problem", "solution_reveal": "Reveal",
+    "benefit_demonstration": "Benefit", "cta": "Try it", "key_messages": ["Fast", "Cheap"],
+    "visual_directions": "Bright", "music_mood": "upbeat"
+}
+
+
+class CannedModel:
+    """Stands in for a GenerativeModel, answering every prompt with the same text"""
+
+    model_name = "models/brief-test"
+
+    def __init__(self, response: object):
+        self.text = response if isinstance(response, str) else json.dumps(response)
+
+    def generate_content(self, prompt, **kwargs):
+        return SimpleNamespace(text=self.text)
+
+
+def write_brief(strategy, response: object):
+    return asyncio.run(CreativeBriefWriter(model=CannedModel(response)).write_brief(strategy))
+
+
+def test_brief_keeps_valid_copy_and_script(strategy):
+    brief = write_brief(strategy, {"social_copy": {"instagram": " Post ", "twitter": ""}, "video_script": SCRIPT})
+    assert brief == {"copy": {"instagram": "Post"}, "script": SCRIPT}
+
+
+def test_brief_drops_malformed_pieces(strategy):
+    bad_script = {**SCRIPT, "key_messages": "Fast, Cheap"}
+    assert write_brief(strategy, {"social_copy": ["instagram"], "video_script": bad_script}) == {"copy": {}, "script": None}
+    assert write_brief(strategy, [{"social_copy": {}}]) == {"copy": {}, "script": None}
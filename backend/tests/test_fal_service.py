@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from pydantic import ValidationError
+from models import RegenerateRequest
+from services.fal_service import SEED_LIMIT, FALService
+
+
+class RecordingFAL(FALService):
+    """FALService whose jobs answer with a URL naming the seed they ran with"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def _subscribe(self, endpoint, arguments, on_progress=None):
+        self.calls.append(arguments)
+        if endpoint == "fal-ai/veo3":
+            return {"video": {"url": f"https://example.com/{arguments['seed']}.mp4"}}
+        return {"images": [{"url": f"https://example.com/{arguments['seed']}_{index}.png"}
+                           for index in range(arguments["num_images"])]}
+
+
+def test_fanned_out_variants_each_record_their_own_seed(monkeypatch, strategy):
+    monkeypatch.setenv("FAL_KEY", "test")
+    fal = RecordingFAL()
+
+    videos = asyncio.run(fal.regenerate_video(strategy, "Upbeat", variants=3, seed=100))
+    assert [video.url for video in videos] == [f"https://example.com/{seed}.mp4" for seed in (100, 101, 102)]
+    assert [(v.metadata["seed"], v.metadata["variants"], v.metadata["variant_index"]) for v in videos] == [
+        (100, 1, 0), (101, 1, 0), (102, 1, 0)
+    ]
+
+    # Sending one variant's seed and variants back reproduces just that variant
+    again = asyncio.run(fal.regenerate_video(strategy, "Upbeat", variants=videos[1].metadata["variants"],
+                                             seed=videos[1].metadata["seed"]))
+    assert [video.url for video in again] == [videos[1].url]
+    assert fal.calls[-1] == fal.calls[1]
+
+
+def test_multi_image_variants_share_the_request_seed(monkeypatch, strategy):
+    monkeypatch.setenv("FAL_KEY", "test")
+    fal = RecordingFAL()
+
+    logos = asyncio.run(fal.regenerate_logo(strategy, "Sharper", variants=2, seed=7))
+    assert len(fal.calls) == 1
+    assert [(l.metadata["seed"], l.metadata["variants"], l.metadata["variant_index"]) for l in logos] == [
+        (7, 2, 0), (7, 2, 1)
+    ]
+    assert [logo.filename.rsplit("_", 1)[1] for logo in logos] == ["v1.png", "v2.png"]
+
+
+def test_variant_index_regenerates_one_variant(monkeypatch, strategy):
+    monkeypatch.setenv("FAL_KEY", "test")
+    fal = RecordingFAL()
+
+    videos = asyncio.run(fal.regenerate_video(strategy, "Upbeat", variants=3, seed=100, variant_index=2))
+    assert [video.url for video in videos] == ["https://example.com/102.mp4"]
+    assert [call["seed"] for call in fal.calls] == [102]
+
+    # Multi-image sets are rendered whole, since num_images is part of the seed's output
+    logos = asyncio.run(fal.regenerate_logo(strategy, "Sharper", variants=2, seed=7, variant_index=1))
+    assert [logo.url for logo in logos] == ["https://example.com/7_1.png"]
+    assert logos[0].metadata["variant_index"] == 1
+
+
+def test_fanned_out_seeds_wrap_at_the_seed_limit(monkeypatch, strategy):
+    monkeypatch.setenv("FAL_KEY", "test")
+    fal = RecordingFAL()
+
+    videos = asyncio.run(fal.regenerate_video(strategy, "Upbeat", variants=2, seed=SEED_LIMIT - 1))
+    assert [video.metadata["seed"] for video in videos] == [SEED_LIMIT - 1, 0]
+
+
+def test_variant_index_must_be_in_the_set(strategy):
+    with pytest.raises(ValidationError):
+        RegenerateRequest(asset_type="logo", original_prompt="a", new_prompt="b", brand_strategy=strategy,
+                          variants=2, variant_index=2)
+    with pytest.raises(ValidationError):
+        RegenerateRequest(asset_type="logo", original_prompt="a", new_prompt="b", brand_strategy=strategy,
+                          seed=2 ** 31)
@@ -0,0 +1,47 @@
+import asyncio
+import json
+from models import ProgressUpdate
+from services.job_manager import Job
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def update(progress: int) -> ProgressUpdate:
+    return ProgressUpdate(package_id="pkg-1", overall_progress=progress, current_agent="Brand Director",
+                          agents=[], message=f"{progress}%")
+
+
+async def read(job: Job, raw: bool, last_event_id: int = 0):
+    return [event async for event in job.stream(last_event_id, raw=raw) if event is not None]
+
+
+def test_full_readers_never_build_the_dict_form():
+    async def scenario():
+        job = Job("job-1")
+        for progress in (10, 50):
+            await job.append(update(progress))
+        await job.finish("completed")
+        return job, await read(job, raw=False)
+
+    job, events = run(scenario())
+    assert [(event_id, json.loads(data)["overall_progress"]) for event_id, data in events] == [(1, 10), (2, 50)]
+    assert job._snapshots == []
+
+
+def test_compact_readers_share_the_dict_form():
+    async def scenario():
+        job = Job("job-1")
+        for progress in (10, 50, 100):
+            await job.append(update(progress))
+        await job.finish("completed")
+        resumed = await read(job, raw=True, last_event_id=2)
+        replayed = await read(job, raw=True)
+        return job, resumed, replayed
+
+    job, resumed, replayed = run(scenario())
+    assert resumed == [(3, update(100).model_dump(mode="json"))]
+    assert [event_id for event_id, _ in replayed] == [1, 2, 3]
+    assert replayed[2][1] is resumed[0][1]
+    assert len(job._snapshots) == 3
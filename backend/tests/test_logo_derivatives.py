@@ -0,0 +1,82 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from models import GeneratedAsset
+from services.asset_store import AssetStore
+from services.cache import TieredCache
+from services.logo_derivatives import LogoDerivatives, render_derivatives
+
+
+def write_logo(path: str, width: int, height: int) -> str:
+    image = Image.new("RGBA", (width, height), (255, 255, 255, 0))
+    image.paste((20, 20, 120, 255), (width // 4, height // 4, width * 3 // 4, height * 3 // 4))
+    image.save(path, format="PNG")
+    return path
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def test_small_logos_are_never_upscaled(tmp_path):
+    source = write_logo(str(tmp_path / "logo.png"), 300, 200)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    outputs = {output["variant"]: output for output in render_derivatives(source, str(out_dir))}
+
+    assert set(outputs) == {"png_16", "png_32", "apple_touch_180", "favicon", "monochrome", "webp"}
+    assert all(output["width"] <= 300 and output["width"] == output["height"] for output in outputs.values())
+    assert (outputs["monochrome"]["width"], outputs["webp"]["width"]) == (300, 300)
+    for output in outputs.values():
+        assert os.path.getsize(output["path"]) > 0
+
+
+def test_large_logos_get_every_size(tmp_path):
+    source = write_logo(str(tmp_path / "logo.png"), 1024, 1024)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    outputs = {output["variant"]: output for output in render_derivatives(source, str(out_dir))}
+
+    assert outputs["png_512"]["width"] == 512
+    assert outputs["favicon"]["width"] == 48
+    assert outputs["monochrome"]["width"] == 512
+
+
+def test_create_stores_derivatives_and_caches_them(tmp_path):
+    executor = CountingExecutor()
+
+    async def scenario():
+        store = AssetStore(str(tmp_path / "store"), public_url="https://api.example.com")
+        digest = await store.store_file(write_logo(str(tmp_path / "logo.png"), 600, 600), "image/png")
+        logo = GeneratedAsset(type="logo", url=store.url_for(digest), filename="logo_acme.png",
+                              metadata={"sha256": digest})
+        derivatives = LogoDerivatives(store, executor=executor, cache=TieredCache("logo_derivatives_test"))
+        try:
+            first = await derivatives.create(logo)
+            second = await derivatives.create(logo)
+            unmirrored = await derivatives.create(logo.model_copy(update={"metadata": {}}))
+            return store, digest, first, second, unmirrored
+        finally:
+            derivatives.shutdown()
+            await store.aclose()
+
+    store, digest, first, second, unmirrored = asyncio.run(scenario())
+
+    assert executor.submitted == 1
+    assert first == second
+    assert unmirrored == []
+    assert {asset.metadata["variant"] for asset in first} >= {"favicon", "png_512", "webp"}
+    for asset in first:
+        assert asset.type == "logo_derivative"
+        assert asset.metadata["source_sha256"] == digest
+        assert asset.url == f"https://api.example.com/api/assets/{asset.metadata['sha256']}"
+        assert store.get(asset.metadata["sha256"]) is not None
@@ -0,0 +1,118 @@
+import asyncio
+from typing import List
+import pytest
+from orchestrator import Deadline, StageError, TaskGraph
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_stages_start_once_their_inputs_exist():
+    log: List[str] = []
+
+    def stage(name: str, delay: float = 0.0):
+        async def func(**inputs):
+            log.append(f"start {name}")
+            await asyncio.sleep(delay)
+            log.append(f"end {name}")
+            return f"{name}({','.join(f'{k}={v}' for k, v in sorted(inputs.items()))})"
+        return func
+
+    graph = TaskGraph()
+    graph.add("strategy", stage("strategy"), ["idea"])
+    graph.add("logo", stage("logo", 0.05), ["strategy"])
+    graph.add("social", stage("social", 0.01), ["strategy"])
+    graph.add("mirror", stage("mirror"), ["logo", "social"])
+
+    results = run(graph.run({"idea": "x"}))
+
+    assert results["mirror"] == "mirror(logo=logo(strategy=strategy(idea=x)),social=social(strategy=strategy(idea=x)))"
+    assert log[:4] == ["start strategy", "end strategy", "start logo", "start social"]
+    # Social doesn't wait for the slower logo, and mirror waits for both
+    assert log.index("end social") < log.index("end logo") < log.index("start mirror")
+    assert set(graph.timings) == {"strategy", "logo", "social", "mirror"}
+
+
+def test_failed_stage_cancels_the_rest():
+    cancelled_stages: List[str] = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled_stages.append("slow")
+            raise
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    graph = TaskGraph()
+    graph.add("slow", slow)
+    graph.add("broken", broken)
+
+    with pytest.raises(StageError) as info:
+        run(graph.run())
+    assert info.value.stage == "broken"
+    assert str(info.value.error) == "boom"
+    assert cancelled_stages == ["slow"]
+
+
+def test_unsatisfiable_inputs_are_reported():
+    async def stage(**inputs):
+        return None
+
+    graph = TaskGraph()
+    graph.add("logo", stage, ["strategy"])
+    with pytest.raises(ValueError, match="strategy"):
+        run(graph.run())
+    with pytest.raises(ValueError, match="Duplicate"):
+        graph.add("logo", stage)
+
+
+def test_overrunning_stage_uses_its_fallback():
+    async def slow(strategy):
+        await asyncio.sleep(60)
+
+    async def fast(strategy):
+        return f"video for {strategy}"
+
+    async def fallback(strategy):
+        return f"placeholder for {strategy}"
+
+    deadline = Deadline(1.0, {"logo": 0.05, "video": 0.5})
+    graph = TaskGraph(deadline)
+    graph.add("logo", slow, ["strategy"], fallback=fallback)
+    graph.add("video", fast, ["strategy"], fallback=fallback)
+
+    results = run(graph.run({"strategy": "Acme"}))
+
+    assert results["logo"] == "placeholder for Acme"
+    assert results["video"] == "video for Acme"
+    assert deadline.missed == ["logo"]
+    report = deadline.report()
+    assert report["budgets"] == {"logo": 0.05, "video": 0.5}
+    assert graph.timings["logo"] < 1.0
+
+
+def test_budgets_are_capped_by_the_time_left():
+    deadline = Deadline(0.2, {"late": 1.0})
+    assert deadline.budget("late") <= 0.2
+    deadline.expires_at -= 1.0
+    assert deadline.remaining() == 0.0
+    assert deadline.budget("late") == 0.0
+    assert deadline.budgets["late"] == 0.0
+
+
+def test_stages_without_fallback_ignore_the_deadline():
+    async def stage():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    deadline = Deadline(0.01, {"strategy": 1.0})
+    graph = TaskGraph(deadline)
+    graph.add("strategy", stage)
+
+    assert run(graph.run())["strategy"] == "done"
+    assert deadline.missed == []
+    assert deadline.budgets == {}
@@ -0,0 +1,75 @@
+import asyncio
+import io
+import zipfile
+import httpx
+from models import BrandPackage, GeneratedAsset
+from services.package_export import PackageExporter, export_filename
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+MP4 = bytes(range(256)) * 2048
+
+
+def make_package(strategy, assets) -> BrandPackage:
+    return BrandPackage(id="pkg", strategy=strategy, assets=assets, created_at="2025-01-02T03:04:05", status="completed")
+
+
+def export(package: BrandPackage) -> zipfile.ZipFile:
+    async def collect():
+        async with httpx.AsyncClient() as client:
+            return b"".join([chunk async for chunk in PackageExporter(client=client).stream(package)])
+
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(collect())))
+    assert archive.testzip() is None
+    return archive
+
+
+def test_archive_contains_strategy_and_assets(strategy, upstream):
+    upstream.files["/logo.png"] = (PNG, "image/png")
+    upstream.files["/video.mp4"] = (MP4, "video/mp4")
+    package = make_package(strategy, [
+        GeneratedAsset(type="logo", url=upstream.url("/logo.png"), filename="logo.png"),
+        GeneratedAsset(type="logo", url=upstream.url("/logo.png"), filename="logo.png"),
+        GeneratedAsset(type="video", url=upstream.url("/video.mp4"), filename="promo video.mp4"),
+    ])
+
+    archive = export(package)
+
+    assert archive.namelist() == ["strategy.json", "strategy.md", "logo/logo.png", "logo/logo_2.png", "video/promo_video.mp4"]
+    assert archive.read("logo/logo_2.png") == PNG
+    assert archive.read("video/promo_video.mp4") == MP4
+    assert archive.getinfo("video/promo_video.mp4").compress_type == zipfile.ZIP_STORED
+    assert BrandPackage.model_validate_json(package.model_dump_json()).strategy.model_dump_json(indent=2) == archive.read("strategy.json").decode()
+    assert archive.read("strategy.md").decode().startswith("# Acme\n> Tag")
+    assert archive.getinfo("strategy.json").date_time == (2025, 1, 2, 3, 4, 4)
+    assert export_filename(package) == "acme_brand_package.zip"
+
+
+def test_failed_assets_are_listed_in_missing(strategy, upstream):
+    upstream.files["/logo.png"] = (PNG, "image/png")
+    package = make_package(strategy, [
+        GeneratedAsset(type="mockup", url=upstream.url("/gone.png"), filename="mockup.png"),
+        GeneratedAsset(type="logo", url=upstream.url("/logo.png"), filename="logo.png"),
+    ])
+
+    archive = export(package)
+
+    assert archive.namelist() == ["strategy.json", "strategy.md", "logo/logo.png", "MISSING.txt"]
+    missing = archive.read("MISSING.txt").decode()
+    assert f"mockup/mockup.png: {upstream.url('/gone.png')}" in missing
+    assert "404" in missing
+
+
+def test_asset_failing_mid_stream_leaves_no_truncated_entry(strategy, upstream):
+    upstream.files["/video.mp4"] = (MP4, "video/mp4")
+    upstream.files["/logo.png"] = (PNG, "image/png")
+    upstream.truncated.add("/video.mp4")
+    package = make_package(strategy, [
+        GeneratedAsset(type="video", url=upstream.url("/video.mp4"), filename="video.mp4"),
+        GeneratedAsset(type="logo", url=upstream.url("/logo.png"), filename="logo.png"),
+    ])
+
+    archive = export(package)
+
+    assert archive.namelist() == ["strategy.json", "strategy.md", "logo/logo.png", "MISSING.txt"]
+    assert archive.read("logo/logo.png") == PNG
+    assert "video/video.mp4" in archive.read("MISSING.txt").decode()
@@ -0,0 +1,66 @@
+import asyncio
+import sqlite3
+import pytest
+from agents.brand_director import BrandDirector
+from models import BrandPackage, GeneratedAsset
+from services.package_store import MemoryPackageStore, PackageStore, SQLitePackageStore
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_package(package_id="pkg-1", created_at="2026-01-01T00:00:00", request_hash="hash-1"):
+    return BrandPackage(
+        id=package_id,
+        strategy=BrandDirector(model=object()).fallback_strategy("A tool for bakers"),
+        assets=[GeneratedAsset(type="logo", url="/api/assets/abc", filename="logo.png")],
+        created_at=created_at,
+        status="completed",
+        generation_time_seconds=42,
+        stage_timings={"strategy": 3.5, "logo": 12.0},
+        deadlines={"max_seconds": 60.0, "budgets": {"strategy": 15.0}, "missed": ["video"]},
+        request_hash=request_hash
+    )
+
+
+def test_sqlite_round_trips_the_whole_package(tmp_path):
+    store = SQLitePackageStore(str(tmp_path / "packages.sqlite3"))
+    package = make_package()
+    run(store.save(package))
+
+    assert run(store.get("pkg-1")) == package
+    assert run(store.find_by_request_hash("hash-1")) == package
+    assert run(store.get("missing")) is None
+
+
+def test_find_by_request_hash_returns_the_latest_package(tmp_path):
+    for store in (MemoryPackageStore(), SQLitePackageStore(str(tmp_path / "packages.sqlite3"))):
+        run(store.save(make_package("old", "2026-01-01T00:00:00")))
+        run(store.save(make_package("new", "2026-01-02T00:00:00")))
+        assert run(store.find_by_request_hash("hash-1")).id == "new"
+        assert run(store.find_by_request_hash("hash-2")) is None
+
+
+def test_sqlite_adds_the_deadlines_column_to_existing_databases(tmp_path):
+    path = str(tmp_path / "packages.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE packages (
+        id TEXT PRIMARY KEY, request_hash TEXT, created_at TEXT NOT NULL, status TEXT NOT NULL,
+        generation_time_seconds INTEGER, strategy TEXT NOT NULL, assets TEXT NOT NULL, stage_timings TEXT)""")
+    conn.commit()
+    conn.close()
+
+    store = SQLitePackageStore(path)
+    package = make_package()
+    run(store.save(package))
+    assert run(store.get("pkg-1")).deadlines == package.deadlines
+
+
+def test_stores_must_implement_the_whole_interface():
+    class SaveOnly(PackageStore):
+        async def save(self, package: BrandPackage) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        SaveOnly()
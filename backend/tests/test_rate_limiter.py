@@ -0,0 +1,72 @@
+import asyncio
+from services.rate_limiter import DEFAULT_PRIORITY_SHARES, ModelLimiter
+
+
+def limiter(max_concurrency: int, aging_seconds: float = 30.0) -> ModelLimiter:
+    # A generous bucket so only the concurrency cap matters
+    return ModelLimiter("test", rate=1000.0, burst=1000, max_concurrency=max_concurrency,
+                        shares=DEFAULT_PRIORITY_SHARES, aging_seconds=aging_seconds)
+
+
+async def hold(model: ModelLimiter, priority: str, release: asyncio.Event, order: list, label: str) -> None:
+    async with model.slot(priority):
+        order.append(label)
+        await release.wait()
+
+
+def test_idle_interactive_reservation_is_borrowed():
+    async def scenario():
+        model = limiter(2)
+        release = asyncio.Event()
+        order: list = []
+        tasks = [asyncio.create_task(hold(model, "standard", release, order, f"s{i}")) for i in range(2)]
+        await asyncio.sleep(0.01)
+        # Veo3-sized limiter: both standard calls run even though one slot is reserved for interactive
+        assert model.in_flight == 2
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+
+def test_interactive_waiter_gets_the_next_free_slot():
+    async def scenario():
+        model = limiter(2)
+        first, rest = asyncio.Event(), asyncio.Event()
+        order: list = []
+        running = [asyncio.create_task(hold(model, "bulk", first, order, "running")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        queued = [asyncio.create_task(hold(model, "standard", rest, order, "standard")),
+                  asyncio.create_task(hold(model, "bulk", rest, order, "bulk"))]
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(hold(model, "interactive", rest, order, "interactive"))
+        await asyncio.sleep(0.01)
+
+        first.set()
+        await asyncio.gather(*running)
+        await asyncio.sleep(0.01)
+        assert order[2] == "interactive"
+        rest.set()
+        await asyncio.gather(*queued, interactive)
+
+    asyncio.run(scenario())
+
+
+def test_aging_lets_bulk_overtake_newer_standard_calls():
+    async def scenario():
+        model = limiter(1, aging_seconds=0.05)
+        first, rest = asyncio.Event(), asyncio.Event()
+        order: list = []
+        running = asyncio.create_task(hold(model, "standard", first, order, "running"))
+        await asyncio.sleep(0.01)
+        bulk = asyncio.create_task(hold(model, "bulk", rest, order, "bulk"))
+        await asyncio.sleep(0.15)
+        standard = asyncio.create_task(hold(model, "standard", rest, order, "standard"))
+        await asyncio.sleep(0.01)
+
+        first.set()
+        rest.set()
+        await asyncio.gather(running, bulk, standard)
+        assert order == ["running", "bulk", "standard"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,39 @@
+import asyncio
+from services.retry_policy import RetryExecutor, RetryPolicy
+
+
+def executor(hedge_delay: float) -> RetryExecutor:
+    return RetryExecutor({"flux": RetryPolicy(max_attempts=1, hedge=True, hedge_delay=hedge_delay)})
+
+
+def make_call(queued: float, upstream: float, hedge_upstream: float = None):
+    """Call that waits `queued` for a local slot, then `upstream` for the request itself"""
+    calls = []
+
+    async def call(primary, started):
+        calls.append(primary)
+        await asyncio.sleep(queued if primary else 0)
+        started()
+        await asyncio.sleep(upstream if primary or hedge_upstream is None else hedge_upstream)
+        return "primary" if primary else "hedge"
+
+    return call, calls
+
+
+def test_queue_wait_does_not_trigger_a_hedge_or_count_as_latency():
+    retry = executor(hedge_delay=0.1)
+    call, calls = make_call(queued=0.3, upstream=0.05)
+
+    assert asyncio.run(retry.run("flux", call)) == "primary"
+    assert calls == [True]
+    assert retry.counters["flux"]["hedges"] == 0
+    assert retry.latencies["flux"].samples[0] < 0.2
+
+
+def test_slow_upstream_is_hedged_after_the_request_is_sent():
+    retry = executor(hedge_delay=0.05)
+    call, calls = make_call(queued=0.1, upstream=1.0, hedge_upstream=0.01)
+
+    assert asyncio.run(retry.run("flux", call)) == "hedge"
+    assert calls == [True, False]
+    assert retry.counters["flux"]["hedge_wins"] == 1
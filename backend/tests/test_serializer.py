@@ -0,0 +1,21 @@
+import json
+from models import AgentProgress, AgentStatus
+from services.serializer import SERIALIZERS, auto_dumps, get_serializer
+
+PROGRESS = AgentProgress(agent_name="Brand Director", status=AgentStatus.IN_PROGRESS, progress=40, message="Drafting")
+
+
+def test_auto_is_the_default(monkeypatch):
+    monkeypatch.delenv("JSON_SERIALIZER", raising=False)
+    assert get_serializer() is auto_dumps
+
+
+def test_auto_serializes_models_with_pydantic_core():
+    assert auto_dumps(PROGRESS) == PROGRESS.__pydantic_serializer__.to_json(PROGRESS)
+
+
+def test_every_serializer_agrees_on_content():
+    snapshot = PROGRESS.model_dump(mode="json")
+    for serializer in SERIALIZERS.values():
+        assert json.loads(serializer(PROGRESS)) == snapshot
+        assert json.loads(serializer(snapshot)) == snapshot
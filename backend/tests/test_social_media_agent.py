@@ -0,0 +1,44 @@
+import asyncio
+import time
+from agents.social_media_agent import PLATFORMS, SocialMediaAgent
+from models import GeneratedAsset
+
+COPY = {platform["name"]: f"{platform['name']} copy" for platform in PLATFORMS}
+
+
+class SlowImages:
+    """Stands in for FALService, taking a fixed time per social image"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_social_post_with_copy(self, strategy, platform, copy, on_progress=None) -> GeneratedAsset:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.seconds)
+        finally:
+            self.in_flight -= 1
+        return GeneratedAsset(type="social_post", url=f"https://example.com/{platform['name']}.png",
+                              filename=f"{platform['name']}.png", metadata={"copy": copy})
+
+
+def test_concurrency_limit_applies_per_package(strategy):
+    images = SlowImages(0.1)
+    agent = SocialMediaAgent(fal_service=images, model=None, max_concurrency=1)
+
+    async def two_packages():
+        return await asyncio.gather(agent.create_social_posts(strategy, prewritten_copy=COPY),
+                                    agent.create_social_posts(strategy, prewritten_copy=COPY))
+
+    started = time.monotonic()
+    first, second = asyncio.run(two_packages())
+    elapsed = time.monotonic() - started
+
+    assert [asset.metadata["copy"] for asset in first] == list(COPY.values())
+    assert len(second) == len(PLATFORMS)
+    # One image at a time within each package, but the packages don't wait on each other
+    assert images.max_in_flight == 2
+    assert elapsed < 0.1 * len(PLATFORMS) * 2